@@ -20,11 +20,15 @@ setup(
         ],
         "dev": [
             "ipdb"
+        ],
+        "http2": [
+            "httpx[http2]"
         ]
     },
     entry_points="""
     [console_scripts]
     tap-tiktok-ads=tap_tiktok_ads:main
+    tap-tiktok-ads-tenants=tap_tiktok_ads.tenants:main
     """,
     packages=["tap_tiktok_ads"],
     package_data = {
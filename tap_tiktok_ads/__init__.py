@@ -1,49 +1,84 @@
 #!/usr/bin/env python3
+import os
 import singer
 from singer import utils
 
-from tap_tiktok_ads.client import TikTokClient
-from tap_tiktok_ads.discover import discover
-from tap_tiktok_ads.sync import sync
+# The modules of the tap are imported when used, so that the discovery does not import the client
+# and the sync, see tests/unittests/test_import_time.py for the import time budget
 
 REQUIRED_CONFIG_KEYS = ['start_date', 'access_token', 'accounts']
 LOGGER = singer.get_logger()
 
 
-@utils.handle_top_exception(LOGGER)
-def main():
-    # Parse command line arguments
-    args = utils.parse_args(REQUIRED_CONFIG_KEYS)
+def get_verification_cache(args):
+    """
+        Returns the cache of the verifications next to the state file, or the config file without state file,
+        None if the `verification_cache_ttl` is not set
+    """
+    ttl = float(args.config.get('verification_cache_ttl') or 0)
+    if not ttl:
+        return None
+    from tap_tiktok_ads.verification_cache import VerificationCache, VERIFICATION_CACHE_FILE # pylint: disable=import-outside-toplevel
+    path = getattr(args, 'state_path', None) or getattr(args, 'config_path', None)
+    directory = os.path.dirname(os.path.abspath(path)) if path else os.getcwd()
+    return VerificationCache(os.path.join(directory, VERIFICATION_CACHE_FILE), ttl)
+
 
+def get_accounts(config):
+    """
+        Returns the list of account IDs of the comma-separated string of accounts of the config
+    """
     # get comma-separated string of accounts
-    accounts = args.config['accounts'].replace(" ", "")
+    accounts = config['accounts'].replace(" ", "")
     # raise error if no accounts is passed
     if not accounts:
         raise Exception("Please provide atleast 1 Account ID.")
     try:
         # create list of accounts
         # typecasting account to determine string is an integer
-        accounts_list = [str(int(account)) for account in accounts.split(",")]
+        return [str(int(account)) for account in accounts.split(",")]
     except ValueError:
         raise Exception("Provided list of account IDs contains invalid IDs. Kindly check your Account IDs.") from None
+
+
+@utils.handle_top_exception(LOGGER)
+def main():
+    # Parse command line arguments
+    args = utils.parse_args(REQUIRED_CONFIG_KEYS)
+
     # update string to list in the config
-    args.config['accounts'] = accounts_list
+    args.config['accounts'] = get_accounts(args.config)
+
+    from tap_tiktok_ads.discover import discover # pylint: disable=import-outside-toplevel
+
+    # The discovery does not request the API, the credentials are verified by the sync
+    if args.discover:
+        catalog = discover()
+        catalog.dump()
+        return
+
+    from tap_tiktok_ads.client import TikTokClient # pylint: disable=import-outside-toplevel
+    from tap_tiktok_ads.sync import sync # pylint: disable=import-outside-toplevel
 
     with TikTokClient(access_token=args.config['access_token'],
                       advertiser_id=args.config['accounts'],
                       sandbox=args.config.get('sandbox', "false"),
-                      request_timeout=args.config.get('request_timeout')) as tik_tok_client:
-
-        # If discover flag was passed, run discovery mode and dump output to stdout
-        if args.discover:
+                      request_timeout=args.config.get('request_timeout'),
+                      max_workers=args.config.get('max_workers', 1),
+                      pool_maxsize=args.config.get('pool_maxsize'),
+                      http2=args.config.get('http2', "false"),
+                      verification_cache=get_verification_cache(args),
+                      max_requests_per_second=args.config.get('max_requests_per_second')) as tik_tok_client:
+        # the accounts found invalid by the verification are not synced
+        args.config['accounts'] = tik_tok_client.valid_accounts
+        if args.catalog:
+            catalog = args.catalog
+        else:
             catalog = discover()
-            catalog.dump()
-        # Otherwise run in sync mode
+        if str(args.config.get('daemon', "false")).lower() == "true":
+            from tap_tiktok_ads.daemon import run_daemon # pylint: disable=import-outside-toplevel
+            run_daemon(tik_tok_client, args.config, args.state, catalog)
         else:
-            if args.catalog:
-                catalog = args.catalog
-            else:
-                catalog = discover()
             sync(tik_tok_client, args.config, args.state, catalog)
 
 
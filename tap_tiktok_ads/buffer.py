@@ -0,0 +1,145 @@
+import gzip
+import heapq
+import operator
+import pickle
+import tempfile
+import singer
+
+LOGGER = singer.get_logger()
+
+# number of records pickled together in the spill files, a block per file is held in memory while reading
+SPILL_BLOCK_SIZE = 1000
+# maximum number of distinct strings shared by the compact records of a buffer
+MAX_SHARED_STRINGS = 100000
+
+
+class CompactRecords:
+    """
+        Packs records into a compact form: the keys of a record are stored once per distinct layout and the
+        values in a tuple, nested records are packed the same way. Repeated string values are shared between
+        the records. Records decoded from JSON never contain tuples, so a tuple value is a packed record.
+    """
+
+    def __init__(self):
+        self.layouts = {}
+        self.layout_keys = []
+        self.strings = {}
+
+    def pack(self, record):
+        """ Returns the packed form of the record """
+        keys = tuple(record)
+        layout = self.layouts.get(keys)
+        if layout is None:
+            layout = self.layouts[keys] = len(self.layout_keys)
+            self.layout_keys.append(keys)
+        return (layout, tuple(self.pack_value(value) for value in record.values()))
+
+    def pack_value(self, value):
+        """ Returns the packed form of a value of the record """
+        if isinstance(value, dict):
+            return self.pack(value)
+        if isinstance(value, str):
+            shared_value = self.strings.get(value)
+            if shared_value is not None:
+                return shared_value
+            if len(self.strings) < MAX_SHARED_STRINGS:
+                self.strings[value] = value
+        return value
+
+    def unpack(self, packed_record):
+        """ Returns the record of the packed form as a new dict """
+        layout, values = packed_record
+        return {key: self.unpack(value) if isinstance(value, tuple) else value
+                for key, value in zip(self.layout_keys[layout], values)}
+
+
+class RecordBuffer:
+    """
+        Holds records in memory up to `max_records`, the records past the threshold are spilled to compressed
+        temporary files. With a `sort_key` each spilled run is sorted and the records are iterated with an
+        external merge sort, so the memory used does not grow with the number of records. The order of the
+        records with equal keys is kept. `max_records` of 0 keeps all the records in memory. With `compact`
+        the records are held in the packed form of `CompactRecords` and expanded to dicts when iterated.
+    """
+
+    def __init__(self, max_records=0, sort_key=None, compact=False):
+        self.max_records = max_records
+        self.sort_key = sort_key
+        self.compact_records = CompactRecords() if compact else None
+        # the records are held with their sort key, if any, so that the key is computed once
+        self.records = []
+        self.runs = []
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def append(self, record):
+        """ Add the record to the buffer """
+        item = self.compact_records.pack(record) if self.compact_records else record
+        if self.sort_key:
+            item = (self.sort_key(record), item)
+        self.records.append(item)
+        self.length += 1
+        if self.max_records and len(self.records) >= self.max_records:
+            self.spill()
+
+    def extend(self, records):
+        """ Add the records to the buffer """
+        for record in records:
+            self.append(record)
+
+    def spill(self):
+        """ Write the records held in memory to a compressed temporary file """
+        if self.sort_key:
+            self.records.sort(key=operator.itemgetter(0))
+        run = tempfile.TemporaryFile(prefix='tap_tiktok_ads_')
+        with gzip.GzipFile(fileobj=run, mode='wb', compresslevel=1) as spill_file:
+            for index in range(0, len(self.records), SPILL_BLOCK_SIZE):
+                pickle.dump(self.records[index:index + SPILL_BLOCK_SIZE], spill_file, pickle.HIGHEST_PROTOCOL)
+        self.runs.append(run)
+        LOGGER.debug('Spilled %s records to disk, %s spill files', len(self.records), len(self.runs))
+        self.records = []
+
+    @staticmethod
+    def read_run(run):
+        """ Yields the records of a spill file """
+        run.seek(0)
+        with gzip.GzipFile(fileobj=run, mode='rb') as spill_file:
+            while True:
+                try:
+                    yield from pickle.load(spill_file)
+                except EOFError:
+                    return
+
+    def __iter__(self):
+        """
+            Yields the records in the order they were added, or sorted by the `sort_key`. The buffer can be
+            iterated again, but not while records are added.
+        """
+        if self.sort_key:
+            self.records.sort(key=operator.itemgetter(0))
+        # the records in memory are added last so that they come after the spilled ones with equal keys
+        runs = [self.read_run(run) for run in self.runs] + [iter(self.records)]
+        if self.sort_key:
+            items = heapq.merge(*runs, key=operator.itemgetter(0)) if self.runs else runs[0]
+            items = (item for _, item in items)
+        else:
+            items = (item for run in runs for item in run)
+        if self.compact_records:
+            return (self.compact_records.unpack(item) for item in items)
+        return items
+
+    def close(self):
+        """ Remove the spill files and the records held in memory """
+        for run in self.runs:
+            run.close()
+        self.runs = []
+        self.records = []
+        self.length = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
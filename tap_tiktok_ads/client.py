@@ -1,16 +1,33 @@
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlencode
 import backoff
 import json
 import requests
 import backoff
+import threading
+import time
 import singer
 
+from requests.adapters import HTTPAdapter, DEFAULT_POOLSIZE
+from urllib3.util.retry import Retry
 from singer import metrics
 
 # max tries for backoff
 MAX_TRIES = 5
 # default timeout for requests
 REQUEST_TIMEOUT = 300
+# number of retries of the connection errors at the transport level, the request is not sent yet
+CONNECT_RETRIES = 3
+# maximum number of advertiser IDs per request of the advertiser/info/ endpoint
+ADVERTISER_INFO_CHUNK_SIZE = 100
+# number of seconds during which the advertisers requested at startup are used by the advertisers stream
+ADVERTISER_INFO_MAX_AGE = 600
+# error codes of the advertiser/info/ requests with an invalid or inaccessible advertiser ID
+INVALID_ACCOUNT_ERROR_CODES = (40001, 51008)
+# error codes of the requests exceeding the quota of the access token
+QUOTA_ERROR_CODES = (40100,)
+# number of seconds during which an access token which exceeded its quota is not used if other tokens are available
+QUOTA_COOLDOWN = 60
 
 LOGGER = singer.get_logger()
 ENDPOINT_VERSION = "v1.3"
@@ -22,6 +39,15 @@ class TikTokAdsClientError(Exception):
         self.message = message
         self.response = response
 
+def get_error_code(e):
+    """ Returns the error code of the response of the exception, None without response """
+    if e.response is None:
+        return None
+    try:
+        return e.response.json().get("code")
+    except ValueError:
+        return None
+
 def should_retry(e):
     """ Return true if exception is required to retry otherwise return false """
     response = e.response
@@ -34,18 +60,160 @@ def should_retry(e):
         # Tap raises Exception: ConnectionResetError(104, 'Connection reset by peer').
         return True
 
+def new_session(pool_maxsize):
+    """
+        Returns a session keeping alive up to `pool_maxsize` connections to the API, retrying the connection errors
+    """
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(pool_maxsize=pool_maxsize,
+                                          max_retries=Retry(total=CONNECT_RETRIES, connect=CONNECT_RETRIES, read=0,
+                                                            status=0, backoff_factor=0.5)))
+    return session
+
+def get_connection_stats(session):
+    """
+        Returns the number of requests, new connections, reused connections and TLS handshakes of the session
+    """
+    stats = {'requests': 0, 'new_connections': 0, 'reused_connections': 0, 'tls_handshakes': 0}
+    pools = session.get_adapter('https://').poolmanager.pools
+    for key in pools.keys():
+        pool = pools.get(key)
+        if pool is None:
+            continue
+        stats['requests'] += pool.num_requests
+        stats['new_connections'] += pool.num_connections
+        if pool.scheme == 'https':
+            # each new connection is opened with a TLS handshake
+            stats['tls_handshakes'] += pool.num_connections
+    stats['reused_connections'] = max(stats['requests'] - stats['new_connections'], 0)
+    return stats
+
+class RateLimiter:
+    """
+        Spaces the requests of the clients sharing the limiter to at most `requests_per_second`
+    """
+
+    def __init__(self, requests_per_second):
+        self.interval = 1 / float(requests_per_second)
+        self.next_request_time = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """ Wait until the next request can be sent """
+        with self.lock:
+            now = time.monotonic()
+            wait = self.next_request_time - now
+            self.next_request_time = max(now, self.next_request_time) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+class TokenPool:
+    """
+        Access tokens authorized for the same accounts. Each request is sent with the token with the most remaining
+        budget: the earliest next request time of the RateLimiter of the token, then the least used token.
+        The tokens have a RateLimiter of `requests_per_second` unless one shared with other pools is provided
+        in `rate_limiters`. A token exceeding its quota is set aside for `QUOTA_COOLDOWN` seconds while other
+        tokens are available.
+    """
+
+    def __init__(self, access_tokens, requests_per_second=None, rate_limiters=None):
+        self.access_tokens = list(access_tokens)
+        rate_limiters = rate_limiters or {}
+        self.rate_limiters = {access_token: rate_limiters.get(access_token) or
+                              (RateLimiter(requests_per_second) if requests_per_second else None)
+                              for access_token in self.access_tokens}
+        self.exhausted_until = dict.fromkeys(self.access_tokens, 0)
+        self.requests = dict.fromkeys(self.access_tokens, 0)
+        self.lock = threading.Lock()
+
+    def get_next_request_time(self, access_token):
+        """ Returns the time from which the next request can be sent with the token """
+        rate_limiter = self.rate_limiters[access_token]
+        return rate_limiter.next_request_time if rate_limiter else 0
+
+    def acquire(self):
+        """ Returns the access token of the next request, once the request can be sent with the token """
+        with self.lock:
+            now = time.monotonic()
+            available_tokens = [access_token for access_token in self.access_tokens if self.exhausted_until[access_token] <= now]
+            if not available_tokens:
+                # all the tokens exceeded their quota, the token available first is retried with backoff
+                available_tokens = [min(self.access_tokens, key=self.exhausted_until.get)]
+            access_token = min(available_tokens, key=lambda token: (self.get_next_request_time(token), self.requests[token]))
+            self.requests[access_token] += 1
+        if self.rate_limiters[access_token]:
+            self.rate_limiters[access_token].acquire()
+        return access_token
+
+    def fail_over(self, access_token):
+        """ Set aside the token which exceeded its quota, returns True if another token is available """
+        with self.lock:
+            now = time.monotonic()
+            self.exhausted_until[access_token] = now + QUOTA_COOLDOWN
+            return any(self.exhausted_until[token] <= now for token in self.access_tokens)
+
+def get_access_tokens(access_token):
+    """
+        Returns the list of access tokens of a token, a comma-separated string of tokens or a list of tokens
+    """
+    if access_token is None:
+        return []
+    if isinstance(access_token, str):
+        access_token = access_token.split(',')
+    return [token.strip() for token in access_token if token.strip()]
+
 class TikTokClient:
     def __init__(self,
                  access_token,
                  advertiser_id,
                  sandbox=False,
                  user_agent=None,
-                 request_timeout=REQUEST_TIMEOUT):
-        self.__access_token = access_token
+                 request_timeout=REQUEST_TIMEOUT,
+                 max_workers=1,
+                 pool_maxsize=None,
+                 http2=False,
+                 verification_cache=None,
+                 session=None,
+                 rate_limiters=None,
+                 max_requests_per_second=None):
+        self.__access_tokens = get_access_tokens(access_token)
+        self.__access_token = self.__access_tokens[0] if self.__access_tokens else None
+        # the requests are spread over the access tokens if several are provided, each with its own rate.
+        # `rate_limiters` are the RateLimiters by access token shared with the clients of other tenants.
+        self.token_pool = None
+        rate_limiter = None
+        if len(self.__access_tokens) > 1:
+            self.token_pool = TokenPool(self.__access_tokens, max_requests_per_second, rate_limiters)
+        elif self.__access_token:
+            rate_limiter = (rate_limiters or {}).get(self.__access_token)
+            if rate_limiter is None and max_requests_per_second:
+                rate_limiter = RateLimiter(max_requests_per_second)
         self.__user_agent = user_agent
-        self.__session = requests.Session()
+        self.max_workers = int(max_workers or 1)
+        # (requested_at, advertiser IDs, records) of the advertisers requested by the verification
+        self.__advertisers_info = None
+        # The connections are kept alive in a pool sized for the concurrent requests of the tap, one more
+        # for the prefetching of the pages, so that no connection is discarded and opened again
+        self.pool_maxsize = int(pool_maxsize or 0) or max(DEFAULT_POOLSIZE, int(max_workers or 1) + 1)
+        self.http2 = str(http2).lower() == "true"
+        # a session provided is shared with other clients, it is closed and its connections reported by its owner
+        self.__owns_session = session is None
+        if session is not None:
+            self.__session = session
+        elif self.http2:
+            # the concurrent requests are multiplexed, a single connection is opened unless its streams are exhausted
+            from tap_tiktok_ads.http2 import Http2Session # pylint: disable=import-outside-toplevel
+            self.__session = Http2Session(self.pool_maxsize, CONNECT_RETRIES)
+        else:
+            self.__session = new_session(self.pool_maxsize)
+        # RateLimiter of the requests of the single access token, shared by the clients of the token
+        self.rate_limiter = rate_limiter
         self.__base_url = None
         self.__verified = False
+        # verifications of the previous runs, the token and accounts verified within its TTL are not verified again
+        self.verification_cache = verification_cache
+        # last response received by each thread
+        self.__last_response = threading.local()
         self.sandbox  = True if str(sandbox).lower() == "true" else False
 
         # base URL prefix
@@ -54,6 +222,8 @@ class TikTokClient:
         if self.sandbox:
             self.__base_url_prefix = 'sandbox-ads'
         self.__advertiser_id = advertiser_id
+        # validity of each account, the invalid accounts are skipped by the sync
+        self.account_validity = {}
 
         # set request timeout from config param "request_timeout" value
         # If value is 0,"0","" or not passed then it set default to 300 seconds.
@@ -74,20 +244,72 @@ class TikTokClient:
                           max_tries=MAX_TRIES,
                           factor=2)
     def __enter__(self):
+        if self.verification_cache:
+            from tap_tiktok_ads.verification_cache import get_verification_key # pylint: disable=import-outside-toplevel
+            verification_key = get_verification_key(','.join(self.__access_tokens), self.__advertiser_id, self.sandbox)
+            if self.verification_cache.is_verified(verification_key):
+                LOGGER.info('Access token and accounts verified by a previous run, skipping the verification.')
+                self.__verified = True
+                return self
         self.__verified = self.check_access_token()
+        # the accounts are verified again while some are invalid
+        if self.__verified and self.verification_cache and all(self.account_validity.values()):
+            self.verification_cache.set_verified(verification_key)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.__session.close()
+        if self.__owns_session:
+            self.log_connection_stats()
+            self.__session.close()
+
+    def get_connection_stats(self):
+        """
+            Returns the number of requests, new connections, reused connections and TLS handshakes of the session
+        """
+        if isinstance(self.__session, requests.Session):
+            return get_connection_stats(self.__session)
+        return self.__session.get_connection_stats()
+
+    def log_connection_stats(self):
+        """ Log the connection reuse statistics of the session as counter metrics """
+        for name, value in self.get_connection_stats().items():
+            metrics.log(LOGGER, metrics.Point('counter', 'http_{}'.format(name), value,
+                                              {'pool_maxsize': self.pool_maxsize, 'http2': self.http2}))
 
     def check_access_token(self):
         if self.__access_token is None:
             raise Exception('Error: Missing access_token.')
+        # each access token of the pool is verified
+        for access_token in self.__access_tokens:
+            resp = self.get_user_info(access_token)
+        # if the check_access_token() succeeds, then check the account access with the account ids provided in config.
+        if resp['message'] == 'OK':
+            self.__verified = True
+            if self.__base_url_prefix == 'sandbox-ads':
+                return True
+            # Call the advertisers API with the account ids to check whether the accounts are valid or not.
+            requested_at = time.time()
+            records, errors = self.request_advertisers_info(self.__advertiser_id)
+            self.account_validity = {advertiser_id: advertiser_id not in errors for advertiser_id in self.__advertiser_id}
+            if errors and not self.valid_accounts:
+                # none of the accounts can be synced
+                raise next(iter(errors.values()))
+            for advertiser_id, error in errors.items():
+                LOGGER.warning('Skipping the account %s: %s', advertiser_id, error.message)
+            # the advertisers are kept for the advertisers stream
+            self.__advertisers_info = (requested_at, self.valid_accounts, records)
+            return True
+
+    def get_user_info(self, access_token):
+        """ Returns the response of the user/info endpoint for the access token """
         headers = {}
         if self.__user_agent:
             headers['User-Agent'] = self.__user_agent
-        headers['Access-Token'] = self.__access_token
+        headers['Access-Token'] = access_token
         headers['Accept'] = 'application/json'
+        rate_limiter = self.token_pool.rate_limiters[access_token] if self.token_pool else self.rate_limiter
+        if rate_limiter:
+            rate_limiter.acquire()
         response = self.__session.get(
             url='https://{}.tiktok.com/open_api/{}/user/info'.format(self.__base_url_prefix, ENDPOINT_VERSION),
             headers=headers,
@@ -101,21 +323,62 @@ class TikTokClient:
 
         if error_code != 0: # `0` error code indicates successful request
             raise TikTokAdsClientError(message, response) # raise the exception with the message retrieved
-        # if the check_access_token() succeeds, then check the account access with the account ids provided in config.
-        if resp['message'] == 'OK':
-            self.__verified = True
-            headers = {
-                "Access-Token": self.__access_token
-            }
-            params = {
-                "advertiser_ids": json.dumps(self.__advertiser_id)
-            }
-            if self.__base_url_prefix == 'sandbox-ads':
-                return True
-            # Call the advertisers API with the account ids to check whether the accounts are valid or not.
-            adv_response = self.get(path='advertiser/info/', headers=headers,
-                                        params=params)
-            return bool(adv_response.get('message') == 'OK')
+        return resp
+
+    @property
+    def valid_accounts(self):
+        """ Returns the accounts not found invalid by the verification """
+        return [advertiser_id for advertiser_id in self.__advertiser_id if self.account_validity.get(advertiser_id, True)]
+
+    def request_advertisers_info(self, advertiser_ids):
+        """
+            Returns the advertisers of the IDs from the advertiser/info/ endpoint and the error of each invalid ID.
+            The IDs are requested concurrently in chunks of the maximum number of IDs per request, a chunk failing
+            is split in halves to isolate the invalid IDs, as a single invalid ID fails the whole request.
+        """
+        headers = {
+            "Access-Token": self.__access_token
+        }
+        chunks = [advertiser_ids[index:index + ADVERTISER_INFO_CHUNK_SIZE]
+                  for index in range(0, len(advertiser_ids), ADVERTISER_INFO_CHUNK_SIZE)]
+
+        def request_chunk(chunk):
+            try:
+                response = self.get(path='advertiser/info/', headers=dict(headers),
+                                    params={"advertiser_ids": json.dumps(chunk)})
+            except TikTokAdsClientError as e:
+                # the other errors, e.g. a persisting system error, fail the verification of all the accounts
+                if get_error_code(e) not in INVALID_ACCOUNT_ERROR_CODES:
+                    raise
+                if len(chunk) == 1:
+                    return [], {chunk[0]: e}
+                middle = len(chunk) // 2
+                records, errors = request_chunk(chunk[:middle])
+                other_records, other_errors = request_chunk(chunk[middle:])
+                return records + other_records, {**errors, **other_errors}
+            return response.get('data', {}).get('list', []), {}
+
+        if len(chunks) <= 1 or self.max_workers == 1:
+            results = [request_chunk(chunk) for chunk in chunks]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as executor:
+                results = list(executor.map(request_chunk, chunks))
+        records = [record for chunk_records, _ in results for record in chunk_records]
+        errors = {advertiser_id: error for _, chunk_errors in results for advertiser_id, error in chunk_errors.items()}
+        return records, errors
+
+    def get_advertisers_info(self, advertiser_ids):
+        """
+            Returns the advertisers of the IDs, requested by the verification if it is less than
+            `ADVERTISER_INFO_MAX_AGE` seconds old, otherwise requested again
+        """
+        if self.__advertisers_info:
+            requested_at, requested_ids, records = self.__advertisers_info
+            if requested_ids == list(advertiser_ids) and time.time() - requested_at < ADVERTISER_INFO_MAX_AGE:
+                # the records are transformed by the stream
+                return [dict(record) for record in records]
+        records, _ = self.request_advertisers_info(list(advertiser_ids))
+        return records
 
     # Backoff the request after 5 minutes in case of 50000 error code
     @backoff.on_exception(backoff.constant,
@@ -124,11 +387,23 @@ class TikTokClient:
                           interval=300, # 5 minutes
                           giveup=lambda e: not should_retry(e),
                           jitter=None)
+    def request(self, method, url=None, path=None, retry_timeouts=True, **kwargs):
+        """
+            Send the request, the timeouts are retried with backoff unless `retry_timeouts` is False
+            for the callers handling the timeouts themselves
+        """
+        if retry_timeouts:
+            return self.send_with_timeout_retries(method, url=url, path=path, **kwargs)
+        return self.send(method, url=url, path=path, **kwargs)
+
     @backoff.on_exception(backoff.expo,
                           requests.Timeout, # backoff for "Timeout" error
                           max_tries=MAX_TRIES,
                           factor=2)
-    def request(self, method, url=None, path=None, **kwargs):
+    def send_with_timeout_retries(self, method, url=None, path=None, **kwargs):
+        return self.send(method, url=url, path=path, **kwargs)
+
+    def send(self, method, url=None, path=None, **kwargs):
         if not self.__verified:
             self.__verified = self.check_access_token()
 
@@ -148,7 +423,6 @@ class TikTokClient:
 
         if 'headers' not in kwargs:
             kwargs['headers'] = {}
-        kwargs['headers']['Access-Token'] = self.__access_token
         kwargs['headers']['Accept'] = 'application/json'
 
         query = ''
@@ -162,19 +436,32 @@ class TikTokClient:
         if method == 'POST':
             kwargs['headers']['Content-Type'] = 'application/json'
 
-        with metrics.http_request_timer(endpoint) as timer:
-            response = self.__session.request(method, url + query, timeout=self.__request_timeout, **kwargs)
-            timer.tags[metrics.Tag.http_status_code] = response.status_code
+        while True:
+            access_token = self.token_pool.acquire() if self.token_pool else self.__access_token
+            # the headers are copied as they are sent again with another token on quota errors
+            request_kwargs = {**kwargs, 'headers': {**kwargs['headers'], 'Access-Token': access_token}}
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            with metrics.http_request_timer(endpoint) as timer:
+                response = self.__session.request(method, url + query, timeout=self.__request_timeout, **request_kwargs)
+                timer.tags[metrics.Tag.http_status_code] = response.status_code
 
-        if response.status_code != 200:
-            raise Exception(f'Error code: {response.status_code}')
-
-        try:
-            json_response = response.json()
-        except:
-            json_response = {}
-        error_code = json_response.get("code")
-        message = json_response.get('message', 'Unknown Error occurred.')
+            if response.status_code != 200:
+                raise Exception(f'Error code: {response.status_code}')
+            self.__last_response.response = response
+
+            try:
+                json_response = response.json()
+            except:
+                json_response = {}
+            error_code = json_response.get("code")
+            message = json_response.get('message', 'Unknown Error occurred.')
+            # the request exceeding the quota of the token is sent again with another token of the pool
+            if error_code in QUOTA_ERROR_CODES and self.token_pool and self.token_pool.fail_over(access_token):
+                LOGGER.warning('Access token %s of the pool exceeded its quota, switching to another token.',
+                               self.token_pool.access_tokens.index(access_token) + 1)
+                continue
+            break
         if "Service error:" in message:
             message = "Error encountered accessing the accounts with the given account ids. Kindly check your account ids."
 
@@ -182,6 +469,12 @@ class TikTokClient:
             raise TikTokAdsClientError(message, response) # raise the exception with the message retrieved
         return json_response
 
+    @property
+    def last_response_bytes(self):
+        """ Returns the size in bytes of the last response received by the current thread """
+        response = getattr(self.__last_response, 'response', None)
+        return len(response.content) if response is not None else 0
+
     def get(self, url=None, path=None, **kwargs):
         return self.request('GET', url=url, path=path, **kwargs)
 
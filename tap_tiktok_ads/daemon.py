@@ -0,0 +1,42 @@
+import signal
+import threading
+import time
+import singer
+
+from tap_tiktok_ads.sync import sync
+
+LOGGER = singer.get_logger()
+
+# default number of seconds between the start of two sync cycles
+DEFAULT_DAEMON_INTERVAL = 900
+
+
+def run_daemon(tik_tok_client, config, state, catalog, stop_event=None):
+    """
+        Sync the streams every `daemon_interval` seconds until SIGINT or SIGTERM, or `daemon_cycles` cycles.
+        The client with its connections and the state are kept between the cycles, each cycle writes the
+        schema, record and state messages of a sync. A signal stops the daemon after the current cycle.
+    """
+    interval = float(config.get('daemon_interval') or DEFAULT_DAEMON_INTERVAL)
+    max_cycles = int(config.get('daemon_cycles') or 0)
+    stop_event = stop_event or threading.Event()
+
+    previous_handlers = {}
+    if threading.current_thread() is threading.main_thread():
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            previous_handlers[signal_number] = signal.signal(signal_number, lambda *_: stop_event.set())
+    try:
+        cycle = 0
+        while not stop_event.is_set():
+            cycle += 1
+            started = time.monotonic()
+            LOGGER.info('Starting sync cycle %s', cycle)
+            sync(tik_tok_client, config, state, catalog)
+            LOGGER.info('Sync cycle %s completed in %.1f seconds', cycle, time.monotonic() - started)
+            if max_cycles and cycle >= max_cycles:
+                break
+            stop_event.wait(max(interval - (time.monotonic() - started), 0))
+    finally:
+        for signal_number, handler in previous_handlers.items():
+            signal.signal(signal_number, handler)
+    LOGGER.info('Daemon stopped after %s sync cycles', cycle)
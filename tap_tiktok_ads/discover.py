@@ -1,8 +1,26 @@
+import copy
 from singer import Schema, CatalogEntry, Catalog
-from tap_tiktok_ads.schemas import get_schemas
+from tap_tiktok_ads.schemas import get_schemas, get_schemas_hash
 from tap_tiktok_ads.streams import STREAMS
 
+# catalog discovered in the process by hash of the schemas it was built from
+CATALOG_CACHE = {}
+
 def discover():
+    """
+        Returns the catalog of the streams, built once per process while the schema files are unchanged.
+        Each caller gets its own copy of the catalog, which it may modify.
+    """
+    schemas_hash = get_schemas_hash()
+    catalog = CATALOG_CACHE.get(schemas_hash)
+    if catalog is None:
+        catalog = build_catalog()
+        CATALOG_CACHE.clear()
+        CATALOG_CACHE[schemas_hash] = catalog
+    return copy.deepcopy(catalog)
+
+def build_catalog():
+    """ Returns the catalog built from the schema files """
     schemas, field_metadata = get_schemas()
     streams = []
     for stream_name, raw_schema in schemas.items():
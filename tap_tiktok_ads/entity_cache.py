@@ -0,0 +1,126 @@
+import json
+import os
+import threading
+import time
+import singer
+
+from tap_tiktok_ads.files import write_json
+
+LOGGER = singer.get_logger()
+
+
+class EntityCache:
+    """
+        Entities of the advertisers by entity type, indexed by ID, shared by the streams of a run. The entities
+        of an advertiser are requested on first use with `fetch_entities(advertiser_id, entity_type, modified_after)`
+        or provided by the stream syncing them. If a `path` is provided, the entities are kept in the file between
+        runs, written once by `save` at the end of the sync: they are used as is for `ttl` seconds, afterwards only the entities modified since they were
+        requested are requested again. An unknown ID triggers a single new request per entity type during the run,
+        for the entities created since they were first requested.
+    """
+
+    def __init__(self, fetch_entities, id_keys, path=None, ttl=0):
+        self.fetch_entities = fetch_entities
+        # ID field of each entity type
+        self.id_keys = id_keys
+        self.path = path
+        self.ttl = ttl
+        # {advertiser_id: {entity_type: {'modified_after': ..., 'fetched_at': ..., 'records': {entity_id: record}}}}
+        self.entities = {}
+        # (advertiser_id, entity_type) of the entities requested during the run, and requested again for unknown IDs
+        self.refreshed = set()
+        self.retried = set()
+        # True if entities were added since the cache was loaded or saved
+        self.dirty = False
+        self.lock = threading.RLock()
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as cache_file:
+                self.entities = json.load(cache_file)
+
+    def refresh(self, advertiser_id, entity_type):
+        """
+            Request the entities modified since the last request and merge them into the cache
+        """
+        cached = self.entities.setdefault(advertiser_id, {}).setdefault(entity_type, {'modified_after': None, 'records': {}})
+        fetched_at = time.time()
+        records = self.fetch_entities(advertiser_id, entity_type, cached['modified_after'])
+        self.add_entities(advertiser_id, entity_type, records, fetched_at)
+        LOGGER.info('Entity cache of %s for advertiser %s: %s requested, %s cached',
+                    entity_type, advertiser_id, len(records), len(cached['records']))
+
+    def add_entities(self, advertiser_id, entity_type, records, fetched_at, replace=False):
+        """
+            Add the entities requested at `fetched_at` to the cache, replacing all the cached entities if `replace`
+        """
+        with self.lock:
+            cached = self.entities.setdefault(advertiser_id, {}).setdefault(entity_type, {'modified_after': None, 'records': {}})
+            if replace:
+                cached['modified_after'] = None
+                cached['records'] = {}
+            id_key = self.id_keys[entity_type]
+            for record in records:
+                cached['records'][str(record[id_key])] = record
+                modify_time = record.get('modify_time') or record.get('create_time')
+                if modify_time and (cached['modified_after'] is None or modify_time > cached['modified_after']):
+                    cached['modified_after'] = modify_time
+            cached['fetched_at'] = fetched_at
+            self.refreshed.add((advertiser_id, entity_type))
+            self.dirty = True
+
+    def set_entities(self, advertiser_id, entity_type, records, fetched_at):
+        """
+            Replace the cached entities of the advertiser with all its active and deleted entities,
+            requested at `fetched_at` by the stream syncing them
+        """
+        self.add_entities(str(advertiser_id), entity_type, records, fetched_at, replace=True)
+
+    def is_fresh(self, advertiser_id, entity_type):
+        """
+            Returns True if the entities were requested during the run or less than `ttl` seconds ago
+        """
+        advertiser_id = str(advertiser_id)
+        with self.lock:
+            if (advertiser_id, entity_type) in self.refreshed:
+                return True
+            fetched_at = self.entities.get(advertiser_id, {}).get(entity_type, {}).get('fetched_at')
+            return fetched_at is not None and time.time() - fetched_at < self.ttl
+
+    def get_entities(self, advertiser_id, entity_type, current=False):
+        """
+            Returns the entities of the advertiser indexed by ID, requested on first use during the run. With
+            `current` the entities kept within the TTL are refreshed with the entities modified since, so that
+            the entities created since the previous run are included.
+        """
+        advertiser_id = str(advertiser_id)
+        with self.lock:
+            if (advertiser_id, entity_type) not in self.refreshed if current else not self.is_fresh(advertiser_id, entity_type):
+                self.refresh(advertiser_id, entity_type)
+            return self.entities[advertiser_id][entity_type]['records']
+
+    def get_entity(self, advertiser_id, entity_type, entity_id):
+        """
+            Returns the entity of the ID or None if the entity is unknown
+        """
+        if entity_id is None:
+            return None
+        advertiser_id = str(advertiser_id)
+        entity_id = str(entity_id)
+        entities = self.get_entities(advertiser_id, entity_type)
+        if entity_id not in entities:
+            with self.lock:
+                # the entity may have been created after the entities were requested
+                if (advertiser_id, entity_type) not in self.retried:
+                    self.retried.add((advertiser_id, entity_type))
+                    self.refresh(advertiser_id, entity_type)
+                entities = self.entities[advertiser_id][entity_type]['records']
+        return entities.get(entity_id)
+
+    def save(self):
+        """
+            Write the cache to the file, if any and if entities were added, replacing the previous file at once
+        """
+        with self.lock:
+            if not self.path or not self.dirty:
+                return
+            write_json(self.path, self.entities)
+            self.dirty = False
@@ -0,0 +1,14 @@
+import json
+import os
+import tempfile
+
+
+def write_json(path, value):
+    """
+        Write the value to the file, replacing the previous file at once so that an interrupted write does
+        not leave a truncated file. The temporary file is created next to the file, on the same filesystem.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=directory, delete=False) as json_file:
+        json.dump(value, json_file)
+    os.replace(json_file.name, path)
@@ -0,0 +1,58 @@
+import threading
+import weakref
+import requests
+
+
+class Http2Session:
+    """
+        Session sending the requests over HTTP/2 with `httpx`, with the interface of the `requests.Session` used by
+        the client. The concurrent requests share the streams of at most `max_connections` multiplexed connections.
+        The timeouts and connection errors are raised as the `requests` exceptions, so that they are retried the same.
+    """
+
+    def __init__(self, max_connections, connect_retries=0):
+        try:
+            import httpx # pylint: disable=import-outside-toplevel
+        except ImportError:
+            raise Exception("The http2 transport requires the httpx package with HTTP/2 support. "
+                            "Kindly install it with `pip install tap-tiktok-ads[http2]`.") from None
+        self.httpx = httpx
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.client = httpx.Client(transport=httpx.HTTPTransport(http2=True, limits=limits, retries=connect_retries))
+        # network streams of the connections seen, a stream is shared by the requests multiplexed on its connection
+        self.network_streams = weakref.WeakSet()
+        self.num_requests = 0
+        self.num_connections = 0
+        self.lock = threading.Lock()
+
+    def request(self, method, url, timeout=None, **kwargs):
+        """ Send the request and returns the response, raising the `requests` exceptions """
+        try:
+            response = self.client.request(method, url, timeout=timeout, **kwargs)
+        except self.httpx.TimeoutException as e:
+            raise requests.Timeout(str(e)) from e
+        except self.httpx.TransportError as e:
+            raise requests.ConnectionError(str(e)) from e
+        network_stream = response.extensions.get('network_stream')
+        with self.lock:
+            self.num_requests += 1
+            if network_stream is not None and network_stream not in self.network_streams:
+                self.network_streams.add(network_stream)
+                self.num_connections += 1
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def close(self):
+        self.client.close()
+
+    def get_connection_stats(self):
+        """
+            Returns the number of requests, new connections, reused connections and TLS handshakes of the session
+        """
+        with self.lock:
+            return {'requests': self.num_requests,
+                    'new_connections': self.num_connections,
+                    'reused_connections': max(self.num_requests - self.num_connections, 0),
+                    'tls_handshakes': self.num_connections}
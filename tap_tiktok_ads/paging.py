@@ -0,0 +1,100 @@
+import threading
+import singer
+
+LOGGER = singer.get_logger()
+
+# smallest page size tried by the tuner
+MIN_PAGE_SIZE = 50
+# the page size is reduced if the payload of a full page is estimated above this size
+MAX_PAGE_BYTES = 32 * 1024 * 1024
+# weight of the last measurement in the moving averages
+SMOOTHING = 0.5
+
+
+class PageSizeTuner:
+    """
+        Tunes the page size of an endpoint to maximize the number of rows fetched per second. The page sizes
+        are halved from the configured page size, so a smaller page size always divides the offset of the
+        records already fetched and a scan can switch to it without skipping or repeating records. The tuner
+        moves to the neighbouring page size with the better throughput, shrinks the page if the latency
+        exceeds the target or the payload is too large, and after a timeout.
+    """
+
+    def __init__(self, max_page_size, target_latency):
+        self.page_sizes = [max_page_size]
+        while self.page_sizes[-1] % 2 == 0 and self.page_sizes[-1] // 2 >= MIN_PAGE_SIZE:
+            self.page_sizes.append(self.page_sizes[-1] // 2)
+        self.target_latency = target_latency
+        # index of the current page size, the tuning starts from the configured page size
+        self.index = 0
+        # moving average of the rows per second of the full pages for each page size
+        self.throughput = {}
+        self.bytes_per_row = None
+        self.lock = threading.Lock()
+
+    @property
+    def page_size(self):
+        """ Returns the current page size """
+        return self.page_sizes[self.index]
+
+    def get_page_size(self, offset):
+        """
+            Returns the largest page size, up to the current page size, from which the page starting at
+            the offset can be requested
+        """
+        with self.lock:
+            for page_size in self.page_sizes[self.index:]:
+                if offset % page_size == 0:
+                    return page_size
+            return self.page_sizes[-1]
+
+    def record(self, page_size, rows, seconds, size_bytes=0):
+        """
+            Update the page size from the latency and the size of the response of a page
+        """
+        with self.lock:
+            if rows and size_bytes:
+                self.bytes_per_row = self.average(self.bytes_per_row, size_bytes / rows)
+            index = self.page_sizes.index(page_size)
+            if rows == page_size and seconds > 0:
+                # partial pages are not representative of the throughput of the page size
+                self.throughput[page_size] = self.average(self.throughput.get(page_size), rows / seconds)
+
+            if seconds > self.target_latency or (self.bytes_per_row and page_size * self.bytes_per_row > MAX_PAGE_BYTES):
+                self.set_index(index + 1)
+            elif page_size in self.throughput and index == self.index:
+                smaller_page_size = self.page_sizes[index + 1] if index + 1 < len(self.page_sizes) else None
+                larger_page_size = self.page_sizes[index - 1] if index > 0 else None
+                if smaller_page_size and self.throughput.get(smaller_page_size, 0) > self.throughput[page_size]:
+                    self.set_index(index + 1)
+                elif larger_page_size and seconds * 2 < self.target_latency and \
+                        (not self.bytes_per_row or larger_page_size * self.bytes_per_row <= MAX_PAGE_BYTES) and \
+                        self.throughput.get(larger_page_size, self.throughput[page_size]) >= self.throughput[page_size]:
+                    # the larger page size is tried again while its throughput is not worse
+                    self.set_index(index - 1)
+
+    def shrink(self, page_size):
+        """
+            Reduce the page size after a timeout of a page. Returns False if the page size cannot be reduced.
+        """
+        with self.lock:
+            index = self.page_sizes.index(page_size)
+            self.throughput[page_size] = 0
+            if index + 1 >= len(self.page_sizes):
+                return False
+            self.set_index(max(self.index, index + 1))
+            return True
+
+    def set_index(self, index):
+        """ Move to the page size of the index """
+        index = min(max(index, 0), len(self.page_sizes) - 1)
+        if index != self.index:
+            LOGGER.info('Page size changed from %s to %s', self.page_sizes[self.index], self.page_sizes[index])
+            self.index = index
+
+    @staticmethod
+    def average(value, measurement):
+        """ Returns the moving average updated with the measurement """
+        if value is None:
+            return measurement
+        return SMOOTHING * measurement + (1 - SMOOTHING) * value
@@ -0,0 +1,59 @@
+import heapq
+import itertools
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import singer
+
+LOGGER = singer.get_logger()
+
+# Lanes of the scheduled date windows, lower value is started first
+INCREMENTAL_LANE = 0
+BACKFILL_LANE = 1
+
+
+class WindowScheduler:
+    """
+        Fetches the scheduled date windows concurrently. Pending windows of the incremental lane are always
+        started before the backfill ones, so the backfill only uses the idle workers. The records are
+        processed from the main thread, in the order the windows were added for each sequence key.
+    """
+
+    def __init__(self, max_workers=1):
+        self.max_workers = max_workers
+        self.__pending = []
+        self.__counter = itertools.count()
+        # number of windows added and index of the next window to process for each sequence key
+        self.__added = {}
+        self.__next = {}
+        self.__results = {}
+
+    def add(self, lane, sequence_key, fetch, process):
+        """
+            Schedule a window, `fetch` is called from a worker thread and its result is passed to `process`
+            on the main thread once all the previous windows of the same sequence key are processed.
+        """
+        index = self.__added.get(sequence_key, 0)
+        self.__added[sequence_key] = index + 1
+        self.__next.setdefault(sequence_key, 0)
+        heapq.heappush(self.__pending, (lane, next(self.__counter), sequence_key, index, fetch, process))
+
+    def __process_completed(self, sequence_key):
+        """ Process the fetched windows of the sequence key which are next in order """
+        results = self.__results.setdefault(sequence_key, {})
+        while self.__next[sequence_key] in results:
+            process, records = results.pop(self.__next[sequence_key])
+            process(records)
+            self.__next[sequence_key] += 1
+
+    def run(self):
+        """ Fetch and process all the scheduled windows """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            in_flight = {}
+            while self.__pending or in_flight:
+                while self.__pending and len(in_flight) < self.max_workers:
+                    _, _, sequence_key, index, fetch, process = heapq.heappop(self.__pending)
+                    in_flight[executor.submit(fetch)] = (sequence_key, index, process)
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    sequence_key, index, process = in_flight.pop(future)
+                    self.__results.setdefault(sequence_key, {})[index] = (process, future.result())
+                    self.__process_completed(sequence_key)
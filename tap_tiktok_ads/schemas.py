@@ -1,3 +1,4 @@
+import hashlib
 import json
 import os
 from singer import metadata
@@ -10,6 +11,14 @@ from tap_tiktok_ads.streams import STREAMS
 def get_abs_path(path):
     return os.path.join(os.path.dirname(os.path.realpath(__file__)), path)
 
+def get_schemas_hash():
+    """ Returns the hash of the content of the schema files """
+    schemas_hash = hashlib.sha256()
+    for stream_name in STREAMS:
+        with open(get_abs_path(f'schemas/{stream_name}.json'), 'rb') as file:
+            schemas_hash.update(file.read())
+    return schemas_hash.hexdigest()
+
 def get_schemas():
     """ Load schemas from schemas folder """
     schemas = {}
@@ -1,11 +1,25 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import closing
 from datetime import timedelta, datetime, timezone
+from decimal import Decimal, InvalidOperation
+import functools
+import hashlib
+import itertools
 import json
+import queue
+import threading
+import time
+import requests
 import singer
 from dateutil.parser import parse
 from singer.utils import now
 from singer import utils, Transformer, UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING, metadata
 
-from tap_tiktok_ads.client import TikTokClient
+from tap_tiktok_ads.buffer import RecordBuffer
+from tap_tiktok_ads.client import TikTokClient, REQUEST_TIMEOUT
+from tap_tiktok_ads.entity_cache import EntityCache
+from tap_tiktok_ads.paging import PageSizeTuner
+from tap_tiktok_ads.scheduler import WindowScheduler, INCREMENTAL_LANE, BACKFILL_LANE
 
 LOGGER = singer.get_logger()
 
@@ -139,20 +153,100 @@ ENDPOINT_AD_MANAGEMENT = [
 ]
 ENDPOINT_INSIGHTS = [
     'ad_insights',
+    'ad_insights_hourly',
     'ad_insights_by_age_and_gender',
     'ad_insights_by_country',
     'ad_insights_by_platform',
     'campaign_insights_by_province'
 ]
+# Metrics of `ad_insights` which can be summed up to the campaign and adgroup level. Non-additive
+# metrics like `reach` and `frequency` can not be derived from the ad level rows and are excluded.
+ADDITIVE_METRICS = [
+    "spend",
+    "impressions",
+    "clicks",
+    "conversion",
+    "real_time_conversion",
+    "result",
+    "real_time_result",
+    "secondary_goal_result",
+    "video_play_actions",
+    "video_watched_2s",
+    "video_watched_6s",
+    "video_views_p25",
+    "video_views_p50",
+    "video_views_p75",
+    "video_views_p100",
+    "profile_visits",
+    "likes",
+    "comments",
+    "shares",
+    "follows",
+    "clicks_on_music_disc"
+]
+# Ratio metrics recomputed from the summed up additive metrics as (numerator, denominator, multiplier)
+DERIVED_RATIO_METRICS = {
+    "cpc": ("spend", "clicks", 1),
+    "cpm": ("spend", "impressions", 1000),
+    "ctr": ("clicks", "impressions", 100),
+    "cost_per_conversion": ("spend", "conversion", 1),
+    "cost_per_result": ("spend", "result", 1)
+}
+# ID field of the entities of the ad management streams
+ENTITY_ID_KEYS = {
+    "campaigns": "campaign_id",
+    "adgroups": "adgroup_id",
+    "ads": "ad_id"
+}
+# Attributes of the insights joined from the entities with `join_entity_attributes`, as (entity type, entity field)
+ENTITY_ATTRIBUTES = {
+    "ad_name": ("ads", "ad_name"),
+    "ad_text": ("ads", "ad_text"),
+    "call_to_action": ("ads", "call_to_action"),
+    "image_mode": ("ads", "image_mode"),
+    "adgroup_name": ("adgroups", "adgroup_name"),
+    "billing_event": ("adgroups", "billing_event"),
+    "budget": ("adgroups", "budget"),
+    "placement_type": ("adgroups", "placement_type"),
+    "promotion_type": ("adgroups", "promotion_type"),
+    "campaign_name": ("campaigns", "campaign_name"),
+    "campaign_budget": ("campaigns", "budget"),
+    "objective_type": ("campaigns", "objective_type"),
+    "rf_campaign_type": ("campaigns", "rf_campaign_type"),
+    "app_promotion_type": ("campaigns", "app_promotion_type")
+}
+# Default number of days synced in the incremental lane for a new advertiser, older days are backfilled
+DEFAULT_INCREMENTAL_DAYS = 30
+# Datetime format of the time filters of the entity endpoints
+FILTER_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Maximum number of IDs supported by the ID filters of the entity endpoints
+MAX_FILTER_IDS = 100
+# Default number of days between the full scans of the children in the hierarchical sync mode
+DEFAULT_HIERARCHY_FULL_SCAN_DAYS = 7
+# Maximum number of IDs supported by the `IN` filter of the report API
+MAX_PARTITION_SIZE = 100
+# latency target of the pages with `adaptive_page_size`, as a ratio of the request timeout
+PAGE_LATENCY_TARGET_RATIO = 0.25
+# number of records transformed at once before being added to the sort buffer of `process_batch`
+TRANSFORM_CHUNK_SIZE = 1000
+# Margin added on both sides of the active date range, covers the advertiser timezone offset of `stat_time_day`
+ACTIVE_RANGE_BUFFER = timedelta(days=1)
 
-def get_date_batches(start_date, end_date):
+def get_bool_config(config, key):
     """
-        Returns batches with start_date and end_date for the date_windowing from the provided start_date and end_date
+        Returns True if the config param is set to true, config values can be passed as booleans or strings
+    """
+    return str(config.get(key) or "false").lower() == "true"
+
+def get_date_batches(start_date, end_date, window_days=30):
+    """
+        Returns batches with start_date and end_date for the date_windowing from the provided start_date and end_date.
+        Each batch covers at most `window_days` days, single day batches also cover the current incomplete day.
     """
     date_batches = []
-    if end_date.date() > start_date.date():
+    if end_date.date() > start_date.date() or (window_days == 1 and end_date > start_date):
         while start_date < end_date:
-            next_batch = start_date + timedelta(days=29)
+            next_batch = start_date + timedelta(days=window_days - 1)
             date_batch = {
                 'start_date': start_date,
                 'end_date': end_date if next_batch > end_date else next_batch
@@ -161,6 +255,101 @@ def get_date_batches(start_date, end_date):
             start_date = next_batch + timedelta(days=1)
     return date_batches
 
+def get_active_date_range(records):
+    """
+        Returns the date range in which the ads could have delivered using `create_time`, `modify_time` and
+        `operation_status` of the ads. The `end_date` is None if any of the non deleted ads is still enabled.
+        Returns None if the advertiser has no ads.
+    """
+    if not records:
+        return None
+    start_date = min(utils.strptime_to_utc(record['create_time']) for record in records)
+    end_date = None
+    if not any(record.get('operation_status') == 'ENABLE' and record.get('current_status') != 'DELETE'
+               for record in records):
+        end_date = max(utils.strptime_to_utc(record.get('modify_time') or record['create_time'])
+                       for record in records) + ACTIVE_RANGE_BUFFER
+    return {
+        'start_date': start_date - ACTIVE_RANGE_BUFFER,
+        'end_date': end_date
+    }
+
+def prune_date_batches(date_batches, active_range):
+    """
+        Drops the date batches outside the active date range and clips the remaining ones to the range
+    """
+    if active_range is None:
+        return []
+    pruned_batches = []
+    for date_batch in date_batches:
+        if date_batch['end_date'].date() < active_range['start_date'].date():
+            continue
+        if active_range['end_date'] and date_batch['start_date'].date() > active_range['end_date'].date():
+            continue
+        start_date = max(date_batch['start_date'], active_range['start_date'])
+        end_date = date_batch['end_date']
+        if active_range['end_date']:
+            end_date = min(end_date, active_range['end_date'])
+        pruned_batches.append({
+            'start_date': start_date,
+            'end_date': end_date
+        })
+    return pruned_batches
+
+def to_decimal(value):
+    """
+        Returns the metric value as Decimal, the API returns metrics as strings and '-' for unavailable values
+    """
+    if value is None:
+        return Decimal(0)
+    try:
+        return Decimal(str(value).replace(",", ""))
+    except InvalidOperation:
+        return Decimal(0)
+
+def rollup_ad_insights_records(records, group_keys):
+    """
+        Aggregates the transformed ad_insights records by the provided keys, summing up the additive metrics
+        and recomputing the ratio metrics from the sums
+    """
+    rollups = {}
+    for record in records:
+        key = tuple(record.get(group_key) for group_key in group_keys)
+        if key not in rollups:
+            rollups[key] = {group_key: record.get(group_key) for group_key in group_keys}
+            # names are not part of the key but are the same for all the ads of a campaign/adgroup
+            for name_key in ('campaign_name', 'adgroup_name'):
+                if name_key in record:
+                    rollups[key][name_key] = record[name_key]
+            for metric in ADDITIVE_METRICS:
+                rollups[key][metric] = Decimal(0)
+        for metric in ADDITIVE_METRICS:
+            rollups[key][metric] += to_decimal(record.get(metric))
+
+    rollup_records = []
+    for rollup in rollups.values():
+        for metric, (numerator, denominator, multiplier) in DERIVED_RATIO_METRICS.items():
+            if rollup[denominator]:
+                rollup[metric] = rollup[numerator] * multiplier / rollup[denominator]
+            else:
+                rollup[metric] = Decimal(0)
+        for metric in list(ADDITIVE_METRICS) + list(DERIVED_RATIO_METRICS):
+            rollup[metric] = float(rollup[metric])
+        rollup_records.append(rollup)
+    return rollup_records
+
+def merge_records(records, deleted_records, id_keys):
+    """
+        Yields the active records followed by the deleted records. An active record with the same ID keys,
+        the advertiser and entity IDs, as a deleted record is skipped, as the entity got deleted between the
+        two requests. The primary key is not used since the deletion updates the `modify_time` of the entity.
+    """
+    deleted_keys = {tuple(record.get(key) for key in id_keys) for record in deleted_records}
+    for record in records:
+        if tuple(record.get(key) for key in id_keys) not in deleted_keys:
+            yield record
+    yield from deleted_records
+
 def pre_transform(stream_name, records, bookmark_value):
     """
         Transforms records for every stream before writing to output as per stream category
@@ -252,6 +441,25 @@ class Stream():
     path = None
     req_advertiser_id = True
     params = {}
+    # WindowScheduler of the sync when the backfill lane is enabled
+    scheduler = None
+    # number of days per date window of the report API
+    window_days = 30
+    # filter of the entity endpoints for the lower bound of the modification time
+    modified_filter_field = "modified_after"
+    # ID of the entity indexed for the hierarchical sync of its children
+    hierarchy_id_key = None
+    # parent stream and the ID filter used to request only the children of the changed parents
+    hierarchy_parent = None
+    hierarchy_filter_field = None
+    # child stream requested for the changed entities of this stream
+    hierarchy_child = None
+    # IDs of the streams selected in the catalog, None if unknown
+    selected_stream_ids = None
+    # EntityCache shared by the streams of the run, see `get_entity_cache`
+    entity_cache = None
+    # Stream from whose records this stream is derived, derived streams are synced along with their parent
+    parent_stream = None
 
     def __init__(self,
                  client: TikTokClient,
@@ -260,7 +468,22 @@ class Stream():
         self.state = state
         self.config = config
         self.client = client
+        # the advertiser and date window of the requests are set per instance, the streams of several
+        # runs can be synced concurrently in one process
+        self.params = dict(self.params)
         self.page_size = int(config.get('page_size', 1000))
+        # with `adaptive_page_size` the page size is tuned per endpoint, up to the configured page size
+        self.adaptive_page_size = get_bool_config(config, 'adaptive_page_size')
+        self.page_size_tuners = {}
+        # number of pages fetched ahead of the page being written, pages are not prefetched by default
+        self.prefetch_pages = int(config.get('prefetch_pages') or 0)
+        # number of records held in memory by a buffer before spilling to disk, records are not spilled by default
+        self.buffer_max_records = int(config.get('buffer_max_records') or 0)
+        self.compact_buffers = get_bool_config(config, 'compact_buffers')
+        # number of concurrent requests, requests are made serially by default
+        self.max_workers = int(config.get('max_workers') or 1)
+        # start of the previous full scan by advertiser, for the full scans of the hierarchical sync
+        self.full_scan_since = {}
 
     def write_bookmark(self, stream, value):
         """
@@ -283,33 +506,67 @@ class Stream():
             return self.state['bookmarks'][stream_name]
         return {}
 
+    def get_advertiser_state(self, key, stream_id, advertiser_id):
+        """
+            Returns the value saved in the state under the key for provided stream and advertiser
+        """
+        return self.state.get(key, {}).get(stream_id, {}).get(str(advertiser_id))
+
+    def write_advertiser_state(self, key, stream_id, advertiser_id, value):
+        """
+            Write the value in the state under the key for provided stream and advertiser, removed if None
+        """
+        values = self.state.setdefault(key, {}).setdefault(stream_id, {})
+        if value is None:
+            values.pop(str(advertiser_id), None)
+        else:
+            values[str(advertiser_id)] = value
+        singer.write_state(self.state)
+
     # Each API call to TikTok with a stat_time_day dimension only support a range
     # of 30 days. Because of this we need to separate the interval between start_date
     # and end_date into batches of 30 days max.
+    def get_start_date(self, stream_id, advertiser_id):
+        """
+            Returns the bookmark of the advertiser for provided stream or the start_date from config
+        """
+        if ('bookmarks' in self.state) and (stream_id in self.state['bookmarks'] and (str(advertiser_id) in self.state['bookmarks'][stream_id])):
+            return parse(self.state['bookmarks'][stream_id][str(advertiser_id)])
+        return parse(self.config['start_date'])
+
     def get_date_batches(self, stream_id, advertiser_id):
         """
             Returns batches with start_date and end_date for the date_windowing using bookmark/start_date
         """
-        if ('bookmarks' in self.state) and (stream_id in self.state['bookmarks'] and (str(advertiser_id) in self.state['bookmarks'][stream_id])):
-            start_date = parse(self.state['bookmarks'][stream_id][str(advertiser_id)])
-        else:
-            start_date = parse(self.config['start_date'])
+        start_date = self.get_start_date(stream_id, advertiser_id)
 
         if 'end_date' in self.config:
             end_date = parse(self.config['end_date'])
         else:
             end_date = now()
-        return get_date_batches(start_date, end_date)
+        return get_date_batches(start_date, end_date, self.window_days)
 
-    def process_batch(self, stream, records, advertiser_id):
+    def process_batch(self, stream, records, advertiser_id, write_bookmarks=True):
         """
-            Process records for the stream by transforming it to the desired format, writing it to output, and bookmark writing
+            Process records for the stream by transforming it to the desired format, writing it to output, and bookmark writing.
+            Returns the bookmark value of the last written record.
         """
         bookmark_column = self.replication_keys[0] # pylint: disable=unsubscriptable-object
         bookmark_data = self.get_bookmark(stream.tap_stream_id)
         bookmark_value = get_bookmark_value(stream.tap_stream_id, bookmark_data, advertiser_id, self.config['start_date'])
-        transformed_records = pre_transform(stream.tap_stream_id, records, bookmark_value)
-        sorted_records = sorted(transformed_records, key=lambda x: x[bookmark_column])
+        # the full scans of the hierarchical sync also write the records modified before the bookmark,
+        # the bookmark is not moved back by them
+        modified_since = self.get_modified_since(advertiser_id, bookmark_value)
+        # the records are sorted in a buffer, transformed in chunks as the records may be in a buffer too
+        sorted_records = self.new_buffer(sort_key=lambda x: x[bookmark_column])
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= TRANSFORM_CHUNK_SIZE:
+                sorted_records.extend(pre_transform(stream.tap_stream_id, chunk, modified_since))
+                chunk = []
+        sorted_records.extend(pre_transform(stream.tap_stream_id, chunk, modified_since))
+        last_bookmark_value = None
         for record in sorted_records:
             with Transformer(integer_datetime_fmt=UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING) as transformer:
                 # for 'insights' stream, 'advertiser_id' is not getting populated and it is one for the Primary Keys
@@ -319,7 +576,12 @@ class Stream():
                                                            metadata.to_map(stream.metadata))
                 # write one or more rows to the stream:
                 singer.write_record(stream.tap_stream_id, transformed_record)
+                if bookmark_column and modified_since != bookmark_value and \
+                        utils.strptime_to_utc(transformed_record[bookmark_column]) < utils.strptime_to_utc(bookmark_value):
+                    continue
                 if bookmark_column:
+                    last_bookmark_value = transformed_record[bookmark_column]
+                if bookmark_column and write_bookmarks:
                     # update bookmark to latest value
                     if stream.tap_stream_id in ENDPOINT_ADVERTISERS:
                         self.write_bookmark(stream.tap_stream_id, transformed_record[bookmark_column])
@@ -328,50 +590,404 @@ class Stream():
                             bookmark_data = {}
                         bookmark_data[advertiser_id] = transformed_record[bookmark_column]
                         self.write_bookmark(stream.tap_stream_id, bookmark_data)
+        if self.hierarchy_id_key and get_bool_config(self.config, 'hierarchical_sync'):
+            self.update_hierarchy_index(stream.tap_stream_id, advertiser_id, sorted_records)
+        sorted_records.close()
+        return last_bookmark_value
 
-    def sync_pages(self, stream):
+    @property
+    def resumable_partitions(self):
+        """ Whether the partitions (pages or ID chunks) synced by a previous run can be skipped when resuming """
+        return True
+
+    def process_partition(self, stream, records, advertiser_id):
         """
-            Returns page with records for processing for provided stream
+            Process the records of a partition (page or ID chunk) without writing the bookmark.
+            Returns the bookmark value of the last written record.
+        """
+        return self.process_batch(stream, records, advertiser_id, write_bookmarks=False)
+
+    def process_partitioned_window(self, stream, advertiser_id, write_bookmarks=True):
+        """
+            Called once all the partitions are synced
+        """
+
+    def get_page_size_tuner(self, path):
+        """
+            Returns the page size tuner of the endpoint, the latency target is a quarter of the request timeout
+        """
+        if path not in self.page_size_tuners:
+            request_timeout = float(self.config.get('request_timeout') or 0) or REQUEST_TIMEOUT
+            # the partitions of a date window may request the endpoint concurrently
+            self.page_size_tuners.setdefault(path, PageSizeTuner(self.page_size, request_timeout * PAGE_LATENCY_TARGET_RATIO))
+        return self.page_size_tuners[path]
+
+    def request_page(self, path, params, offset):
+        """
+            Returns the response of the page starting at the offset and its page size. With `adaptive_page_size`
+            the page size is tuned from the latency and the size of the responses of the endpoint, a page
+            timing out is requested again with a smaller page size.
         """
         headers = {
             "Access-Token": self.config['access_token']
         }
-        advertiser_id = str(self.params['advertiser_id'])
-        # add page size param
-        self.params['page_size'] = self.page_size
-        records = []
+        if not self.adaptive_page_size:
+            response = self.client.get(path=path, headers=headers,
+                                       params={**params, 'page_size': self.page_size, 'page': offset // self.page_size + 1})
+            return response, self.page_size
+        tuner = self.get_page_size_tuner(path)
+        while True:
+            page_size = tuner.get_page_size(offset)
+            start_time = time.monotonic()
+            # the timeouts are retried with a smaller page size at once, and with backoff from the smallest one
+            try:
+                response = self.client.get(path=path, headers=headers,
+                                           params={**params, 'page_size': page_size, 'page': offset // page_size + 1},
+                                           retry_timeouts=page_size == tuner.page_sizes[-1])
+            except requests.Timeout:
+                if not tuner.shrink(page_size):
+                    raise
+                LOGGER.warning('Request of %s timed out with page size %s, retrying with page size %s',
+                               path, page_size, tuner.page_size)
+                continue
+            rows = len(response['data']['list']) if response['message'] == 'OK' else 0
+            tuner.record(page_size, rows, time.monotonic() - start_time, self.client.last_response_bytes)
+            return response, page_size
+
+    def new_buffer(self, sort_key=None):
+        """
+            Returns a buffer for the records held during the sync, spilled to disk past `buffer_max_records`
+            and held in a compact form with `compact_buffers`
+        """
+        return RecordBuffer(self.buffer_max_records, sort_key, self.compact_buffers)
+
+    def get_all_pages(self, path, params, records=None, deleted=False):
+        """
+            Returns the records of all the pages for provided path and query params,
+            added to the provided list or buffer if any. The records of the deleted entities are
+            marked with the `current_status` DELETE before being added.
+        """
+        records = [] if records is None else records
+        fetched_records = 0
         total_records = 0
-        page = 1
-        while (len(records) < total_records) or (page == 1):
-            self.params['page'] = page
-            response = self.client.get(path=self.path, headers=headers,
-                                         params=self.params)
+        offset = 0
+        while (fetched_records < total_records) or (offset == 0):
+            response, page_size = self.request_page(path, params, offset)
             if response['message'] == 'OK':
                 total_records = response['data']['page_info']['total_number']
-                records = records + response['data']['list']
-            page = page + 1
+                if deleted:
+                    # Tiktok does not differentiate between ACTIVE/DELETE records in response
+                    for item in response['data']['list']:
+                        item["current_status"] = "DELETE"
+                records.extend(response['data']['list'])
+                fetched_records += len(response['data']['list'])
+            offset = (offset // page_size + 1) * page_size
+        return records
+
+    def fetch_entities(self, advertiser_id, entity_type, modified_after=None):
+        """
+            Returns the active and deleted entities of the advertiser, modified since `modified_after` if provided
+        """
+        path = STREAMS[entity_type].path
+        filtering = {}
+        if modified_after:
+            filtering[self.modified_filter_field] = modified_after
+        params = {'advertiser_id': advertiser_id}
+        records = self.get_all_pages(path, {**params, 'filtering': json.dumps(filtering)} if filtering else params)
+        return self.get_all_pages(path, {**params, 'filtering': json.dumps({**filtering, "primary_status": "STATUS_DELETE"})},
+                                  records, deleted=True)
+
+    def get_entity_cache(self):
+        """
+            Returns the entity cache of the stream, the cache shared by the streams of the run if any
+        """
+        if self.entity_cache is None:
+            self.entity_cache = EntityCache(self.fetch_entities, ENTITY_ID_KEYS, self.config.get('entity_cache_path'),
+                                            float(self.config.get('entity_cache_ttl') or 0))
+        return self.entity_cache
+
+    def get_filtering(self, stream_id, advertiser_id):
+        """
+            Returns the filters of the entity request. With `server_side_filtering` enabled the ad management
+            streams only request the entities modified since the bookmark of the advertiser.
+        """
+        filtering = {}
+        if stream_id in ENDPOINT_AD_MANAGEMENT and get_bool_config(self.config, 'server_side_filtering'):
+            bookmark_data = self.get_bookmark(stream_id)
+            if advertiser_id in bookmark_data:
+                modified_since = self.get_modified_since(advertiser_id, bookmark_data[advertiser_id])
+                filtering[self.modified_filter_field] = utils.strptime_to_utc(modified_since).strftime(FILTER_DATETIME_FORMAT)
+        return filtering
+
+    def get_modified_since(self, advertiser_id, bookmark_value):
+        """
+            Returns the lower bound of the modification time of the entities synced for the advertiser: the
+            bookmark, or the start of the previous full scan of the hierarchical sync if earlier
+        """
+        full_scan_since = self.full_scan_since.get(str(advertiser_id))
+        if full_scan_since and (bookmark_value is None or
+                                utils.strptime_to_utc(full_scan_since) < utils.strptime_to_utc(bookmark_value)):
+            return full_scan_since
+        return bookmark_value
+
+    def get_scan_params(self, filtering, parent_ids=None):
+        """
+            Returns the query params of the requests for the filters, one per chunk of parent IDs if provided
+        """
+        if parent_ids is None:
+            params = {**self.params}
+            if filtering:
+                params['filtering'] = json.dumps(filtering)
+            return [params]
+        return [{**self.params, 'filtering': json.dumps({**filtering, self.hierarchy_filter_field: parent_ids[index:index + MAX_FILTER_IDS]})}
+                for index in range(0, len(parent_ids), MAX_FILTER_IDS)]
+
+    def get_filtered_pages(self, filtering, parent_ids=None, deleted=False):
+        """
+            Returns the records of all the pages for the filters, requested in chunks of parent IDs if provided
+        """
+        records = self.new_buffer()
+        for params in self.get_scan_params(filtering, parent_ids):
+            self.get_all_pages(self.path, params, records, deleted)
+        return records
+
+    def write_advertiser_bookmark(self, stream_id, advertiser_id, value):
+        """
+            Write the bookmark of the advertiser for provided stream
+        """
+        bookmark_data = self.get_bookmark(stream_id) or {}
+        bookmark_data[advertiser_id] = value
+        self.write_bookmark(stream_id, bookmark_data)
+
+    def fetch_pages(self, path, params, offset, pages, stop):
+        """
+            Fetch the pages from the offset into the queue until the last page, the stop event is set, or an error
+            is raised. The end of the pages is signalled by None, an error by the raised exception.
+        """
+        try:
+            while not stop.is_set():
+                response, page_size = self.request_page(path, params, offset)
+                pages.put((offset, page_size, response))
+                if response['message'] != 'OK':
+                    break
+                offset = (offset // page_size + 1) * page_size
+                if not response['data']['list'] or offset >= response['data']['page_info']['total_number']:
+                    break
+            pages.put(None)
+        except Exception as exc: # pylint: disable=broad-except
+            pages.put(exc)
+
+    def get_pages(self, path, params, offset=0):
+        """
+            Yields the offset, page size and response of the pages from the offset. With `prefetch_pages` the next
+            pages are fetched by a background thread into a bounded queue while the current page is processed,
+            so the fetching stops once the queue is full, e.g. when writing the records is blocked.
+        """
+        if not self.prefetch_pages:
+            while True:
+                response, page_size = self.request_page(path, params, offset)
+                yield offset, page_size, response
+                if response['message'] != 'OK':
+                    return
+                offset = (offset // page_size + 1) * page_size
+                if not response['data']['list'] or offset >= response['data']['page_info']['total_number']:
+                    return
+
+        pages = queue.Queue(maxsize=self.prefetch_pages)
+        stop = threading.Event()
+        fetcher = threading.Thread(target=self.fetch_pages, args=(path, params, offset, pages, stop), daemon=True)
+        fetcher.start()
+        try:
+            while True:
+                page = pages.get()
+                if page is None:
+                    return
+                if isinstance(page, Exception):
+                    raise page
+                yield page
+        finally:
+            # unblock the fetching thread if the pages are not all consumed
+            stop.set()
+            while fetcher.is_alive():
+                try:
+                    pages.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+
+    def sync_checkpointed_pages(self, stream, advertiser_id, scans):
+        """
+            Sync the scans page by page. Each page is written as soon as it is fetched. With `page_checkpoints`
+            the last completed page is checkpointed in the state, so an interrupted sync resumes from the next
+            page. The scan is restarted from the first page if the `total_number` of records changed since the
+            checkpoint. The bookmark is written once all the scans are complete.
+        """
+        stream_id = stream.tap_stream_id
+        write_checkpoints = get_bool_config(self.config, 'page_checkpoints')
+        checkpoint = {
+            'scans_hash': hashlib.sha1(json.dumps(scans, sort_keys=True).encode('utf-8')).hexdigest(),
+            'scan': 0,
+            'page': 0,
+            'page_size': self.page_size,
+            'total_number': None,
+            'bookmark': None,
+            # start of the insights date window of the scans, the windows are planned from it on resume
+            'start_date': self.params.get('start_date')
+        }
+        previous_checkpoint = self.get_advertiser_state('page_checkpoints', stream_id, advertiser_id)
+        if write_checkpoints and self.resumable_partitions and previous_checkpoint and \
+                previous_checkpoint['scans_hash'] == checkpoint['scans_hash']:
+            checkpoint = previous_checkpoint
+            LOGGER.info('Resuming %s for advertiser %s from page %s', stream_id, advertiser_id, checkpoint['page'] + 1)
+
+        while checkpoint['scan'] < len(scans):
+            params, deleted = scans[checkpoint['scan']]
+            offset = checkpoint['page'] * checkpoint.get('page_size', self.page_size)
+            while offset is not None:
+                with closing(self.get_pages(self.path, params, offset)) as pages:
+                    offset = None
+                    for page_offset, page_size, response in pages:
+                        if response['message'] != 'OK':
+                            break
+                        total_records = response['data']['page_info']['total_number']
+                        if checkpoint['total_number'] is not None and total_records != checkpoint['total_number']:
+                            # the pages shifted since the checkpoint, the records of the scan are requested again
+                            LOGGER.warning('Total number of records of %s changed from %s to %s, restarting from the first page',
+                                           stream_id, checkpoint['total_number'], total_records)
+                            checkpoint['page'] = 0
+                            checkpoint['total_number'] = None
+                            offset = 0
+                            break
+                        records = response['data']['list']
+                        if deleted:
+                            for item in records:
+                                item["current_status"] = "DELETE"
+                        bookmark_value = self.process_partition(stream, records, advertiser_id)
+                        if bookmark_value and (checkpoint['bookmark'] is None or bookmark_value > checkpoint['bookmark']):
+                            checkpoint['bookmark'] = bookmark_value
+                        checkpoint['page'] = page_offset // page_size + 1
+                        checkpoint['page_size'] = page_size
+                        checkpoint['total_number'] = total_records
+                        if write_checkpoints:
+                            self.write_advertiser_state('page_checkpoints', stream_id, advertiser_id, checkpoint)
+            checkpoint['scan'] += 1
+            checkpoint['page'] = 0
+            checkpoint['total_number'] = None
+
+        self.process_partitioned_window(stream, advertiser_id)
+        if checkpoint['bookmark']:
+            self.write_advertiser_bookmark(stream_id, advertiser_id, checkpoint['bookmark'])
+        if write_checkpoints:
+            self.write_advertiser_state('page_checkpoints', stream_id, advertiser_id, None)
 
+    def get_changed_parent_ids(self, advertiser_id):
+        """
+            Returns the IDs of the parents whose children are requested in the hierarchical sync mode, i.e. the
+            enabled parents and the parents changed since their children were last synced. Returns None if all
+            the children of the advertiser are requested: without index of the parents, and every
+            `hierarchy_full_scan_days` as the children modified under unchanged disabled parents are only
+            requested by these full scans.
+        """
+        if not self.hierarchy_parent or not get_bool_config(self.config, 'hierarchical_sync'):
+            return None
+        parent_index = self.get_advertiser_state('hierarchy', self.hierarchy_parent, advertiser_id)
+        if parent_index is None:
+            return None
+        full_scan = self.get_advertiser_state('hierarchy_full_scans', self.tap_stream_id, advertiser_id)
+        full_scan_days = float(self.config.get('hierarchy_full_scan_days') or DEFAULT_HIERARCHY_FULL_SCAN_DAYS)
+        if full_scan is None or parse(full_scan) + timedelta(days=full_scan_days) <= now():
+            LOGGER.info('Requesting all %s of advertiser %s for the full scan of the hierarchical sync',
+                        self.tap_stream_id, advertiser_id)
+            return None
+        parent_ids = sorted(set(parent_index['enabled']) | set(parent_index['changed']))
+        LOGGER.info('Requesting %s of advertiser %s for %s changed or enabled %s',
+                    self.tap_stream_id, advertiser_id, len(parent_ids), self.hierarchy_parent)
+        return parent_ids
+
+    def update_hierarchy_index(self, stream_id, advertiser_id, records):
+        """
+            Update the index of the enabled and changed entity IDs of the advertiser, used to request
+            only the children of those entities in the hierarchical sync mode. The changes are consumed by
+            the child stream, they are only indexed if it is selected. Otherwise its next sync is a full scan.
+        """
+        index = self.get_advertiser_state('hierarchy', stream_id, advertiser_id) or {'enabled': [], 'changed': []}
+        enabled_ids = set(index['enabled'])
+        changed_ids = set(index['changed'])
+        index_changes = self.selected_stream_ids is None or self.hierarchy_child in self.selected_stream_ids
+        if not index_changes:
+            changed_ids = set()
+            self.write_advertiser_state('hierarchy_full_scans', self.hierarchy_child, advertiser_id, None)
+        for record in records:
+            entity_id = str(record[self.hierarchy_id_key])
+            if index_changes:
+                changed_ids.add(entity_id)
+            if record.get('operation_status') == 'ENABLE' and record.get('current_status') != 'DELETE':
+                enabled_ids.add(entity_id)
+            else:
+                enabled_ids.discard(entity_id)
+        self.write_advertiser_state('hierarchy', stream_id, advertiser_id, {
+            'enabled': sorted(enabled_ids),
+            'changed': sorted(changed_ids)
+        })
+
+    def sync_pages(self, stream):
+        """
+            Returns page with records for processing for provided stream
+        """
+        advertiser_id = str(self.params['advertiser_id'])
+        parent_ids = self.get_changed_parent_ids(advertiser_id)
+        hierarchical = self.hierarchy_parent and get_bool_config(self.config, 'hierarchical_sync')
+        scan_started_at = now()
+        if hierarchical and parent_ids is None:
+            # the full scan requests the children modified since the previous full scan, the children
+            # modified under the parents not requested since then may be older than the bookmark
+            previous_full_scan = self.get_advertiser_state('hierarchy_full_scans', self.tap_stream_id, advertiser_id)
+            if previous_full_scan:
+                self.full_scan_since[advertiser_id] = previous_full_scan
+        filtering = self.get_filtering(stream.tap_stream_id, advertiser_id)
+        include_deleted = stream.tap_stream_id in ENDPOINT_AD_MANAGEMENT and get_bool_config(self.config, 'include_deleted')
+        # the entities shared by the streams of the run are used and updated by the scans of all the entities
+        entity_cache = None
+        if stream.tap_stream_id in ENTITY_ID_KEYS and not filtering and parent_ids is None:
+            entity_cache = self.entity_cache
+        if entity_cache is not None and entity_cache.is_fresh(advertiser_id, stream.tap_stream_id):
+            LOGGER.info("Using the cached entities for stream - %s", stream.tap_stream_id)
+            entities = entity_cache.get_entities(advertiser_id, stream.tap_stream_id).values()
+            # records are transformed in place, the cached entities are copied
+            self.process_batch(stream, [dict(record) for record in entities
+                                        if include_deleted or record.get("current_status") != "DELETE"], advertiser_id)
+        elif get_bool_config(self.config, 'page_checkpoints') or self.prefetch_pages:
+            scans = [(params, False) for params in self.get_scan_params(filtering, parent_ids)]
+            if include_deleted:
+                scans += [(params, True) for params in self.get_scan_params({**filtering, "primary_status": "STATUS_DELETE"}, parent_ids)]
+            self.sync_checkpointed_pages(stream, advertiser_id, scans)
         # Exclusively query to retrieve the deleted records for streams - Ads, AdGroups and Campaigns
-        if stream.tap_stream_id in ENDPOINT_AD_MANAGEMENT and str(self.config.get('include_deleted') or "false").lower() == "true":
+        elif include_deleted:
             LOGGER.info(f"Fetching the deleted records for stream - {stream.tap_stream_id}")
-            deleted_records = []
-            total_records = 0
-            page = 1
-            # Add the 'filtering' query param
-            self.params['filtering'] = json.dumps({"primary_status": "STATUS_DELETE"})
-            while (len(deleted_records) < total_records) or (page == 1):
-                self.params['page'] = page
-                response = self.client.get(path=self.path, headers=headers,
-                                            params=self.params)
-                if response['message'] == 'OK':
-                    total_records = response['data']['page_info']['total_number']
-                    deleted_records = deleted_records + response['data']['list']
-                page = page + 1
-            # Setting the custom 'current_status' as 'DELETE', Tiktok does not differentiate between ACTIVE/DELETE records in response.
-            for item in deleted_records:
-                item["current_status"] = "DELETE"
-            records = records + deleted_records
-        self.process_batch(stream, records, advertiser_id)
+            fetched_at = time.time()
+            # The active and deleted records are requested concurrently
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, 2)) as executor:
+                active_future = executor.submit(self.get_filtered_pages, filtering, parent_ids)
+                # Add the 'filtering' query param, the deleted records get the custom 'current_status' DELETE
+                deleted_future = executor.submit(self.get_filtered_pages, {**filtering, "primary_status": "STATUS_DELETE"}, parent_ids, True)
+                active_records = active_future.result()
+                deleted_records = deleted_future.result()
+            if entity_cache is not None:
+                entity_cache.set_entities(advertiser_id, stream.tap_stream_id,
+                                          [dict(record) for record in itertools.chain(active_records, deleted_records)], fetched_at)
+            self.process_batch(stream, merge_records(active_records, deleted_records,
+                                                     ['advertiser_id', ENTITY_ID_KEYS[stream.tap_stream_id]]), advertiser_id)
+        else:
+            self.process_batch(stream, self.get_filtered_pages(filtering, parent_ids), advertiser_id)
+        if hierarchical:
+            # the changes of the parents are consumed once their children are synced
+            parent_index = self.get_advertiser_state('hierarchy', self.hierarchy_parent, advertiser_id)
+            if parent_index is not None:
+                parent_index['changed'] = []
+                self.write_advertiser_state('hierarchy', self.hierarchy_parent, advertiser_id, parent_index)
+            if parent_ids is None:
+                self.full_scan_since.pop(advertiser_id, None)
+                self.write_advertiser_state('hierarchy_full_scans', self.tap_stream_id, advertiser_id,
+                                            utils.strftime(scan_started_at))
 
     def do_sync(self, stream):
         """ Sync data from tap source """
@@ -391,19 +1007,13 @@ class Advertisers(Stream):
 
     def sync_advertisers(self, stream):
         """Returns records of advertisers for the processing"""
-        headers = {
-            "Access-Token": self.config['access_token']
-        }
-        response = self.client.get(path=self.path, headers=headers,
-                                     params=self.params)
-        if response['message'] == 'OK':
-            records = response['data']['list']
-            self.process_batch(stream, records, None)
+        # the advertisers requested by the verification of the accounts are used if fresh
+        records = self.client.get_advertisers_info(self.config['accounts'])
+        self.process_batch(stream, records, None)
 
     def do_sync(self, stream):
         """ Sync data from tap source for advertisers"""
         if 'accounts' in self.config and self.req_advertiser_id:
-            self.params['advertiser_ids'] = json.dumps(self.config['accounts'])
             self.sync_advertisers(stream)
 
 class Campaigns(Stream):
@@ -412,6 +1022,8 @@ class Campaigns(Stream):
     replication_keys  = ['modify_time']
     path = "campaign/get/"
     params = {}
+    hierarchy_id_key = "campaign_id"
+    hierarchy_child = "adgroups"
 
 class AdGroups(Stream):
     tap_stream_id = "adgroups"
@@ -419,6 +1031,10 @@ class AdGroups(Stream):
     replication_keys  = ['modify_time']
     path = "adgroup/get/"
     params = {}
+    hierarchy_id_key = "adgroup_id"
+    hierarchy_parent = "campaigns"
+    hierarchy_filter_field = "campaign_ids"
+    hierarchy_child = "ads"
 
 class Ads(Stream):
     tap_stream_id = "ads"
@@ -426,20 +1042,332 @@ class Ads(Stream):
     replication_keys  = ['modify_time']
     path = "ad/get/"
     params = {}
+    hierarchy_parent = "adgroups"
+    hierarchy_filter_field = "adgroup_ids"
 
 class Insights(Stream):
+    # `IN` filter of the report API and the entities whose IDs are used to partition the date windows
+    partition_filter_field = "ad_ids"
+    partition_entity = "ads"
+    # whether the date windows are always fetched concurrently, see `WindowScheduler`
+    concurrent_windows = False
+
+    def __init__(self, client: TikTokClient, config, state = {}):
+        super().__init__(client, config, state)
+        # number of IDs per partition of the date window, date windows are not partitioned by default
+        self.partition_size = min(int(config.get('insights_partition_size') or 0), MAX_PARTITION_SIZE)
+        # number of days synced in the incremental lane for an advertiser without bookmark
+        self.incremental_days = int(config.get('incremental_days') or DEFAULT_INCREMENTAL_DAYS)
+        # attributes joined from the entity cache instead of being requested on every row of the report
+        self.joined_attributes = {}
+        if get_bool_config(config, 'join_entity_attributes'):
+            self.joined_attributes = self.get_joined_attributes()
+            self.params = {**self.params, 'metrics': json.dumps([
+                metric for metric in json.loads(self.params['metrics']) if metric not in self.joined_attributes])}
+
+    def get_joined_attributes(self):
+        """
+            Returns the requested attributes which can be joined from the entities identified in the report rows
+        """
+        metrics = json.loads(self.params['metrics'])
+        fields = set(metrics + json.loads(self.params['dimensions']))
+        return {field: (entity_type, entity_field) for field, (entity_type, entity_field) in ENTITY_ATTRIBUTES.items()
+                if field in metrics and ENTITY_ID_KEYS[entity_type] in fields}
+
+    def add_entity_attributes(self, advertiser_id, records):
+        """
+            Add the joined attributes to the metrics of the report rows from the entities of the advertiser
+        """
+        for record in records:
+            if 'metrics' not in record:
+                continue
+            ids = {**record.get('dimensions', {}), **record['metrics']}
+            entities = {}
+            for field, (entity_type, entity_field) in self.joined_attributes.items():
+                if entity_type not in entities:
+                    entities[entity_type] = self.get_entity_cache().get_entity(advertiser_id, entity_type,
+                                                                               ids.get(ENTITY_ID_KEYS[entity_type]))
+                value = entities[entity_type].get(entity_field) if entities[entity_type] else None
+                # the report API returns the attributes as strings
+                record['metrics'][field] = value if value is None or isinstance(value, str) else str(value)
+
+    def request_page(self, path, params, offset):
+        """
+            Returns the response of the page, with the joined attributes added to the report rows
+        """
+        response, page_size = super().request_page(path, params, offset)
+        if self.joined_attributes and path == self.path and response['message'] == 'OK':
+            self.add_entity_attributes(params['advertiser_id'], response['data']['list'])
+        return response, page_size
+
+    def get_partition_ids(self, advertiser_id):
+        """
+            Returns the sorted IDs of the active and deleted entities used to partition the date windows.
+            The entities are requested during the run, not only kept within `entity_cache_ttl`, as the rows of
+            an entity missing from the partitions are never requested. The report rows of the entities purged
+            by TikTok are not requested by the partitions, without any known ID the date windows are requested
+            without partitions.
+        """
+        return sorted(self.get_entity_cache().get_entities(advertiser_id, self.partition_entity, current=True))
+
+    def get_partitions(self, partition_ids):
+        """
+            Returns the partition_ids split in chunks of partition_size
+        """
+        return [partition_ids[index:index + self.partition_size]
+                for index in range(0, len(partition_ids), self.partition_size)]
+
+    def get_partition_filter(self, partition):
+        """
+            Returns the `filtering` query param of the report API for the IDs of the partition
+        """
+        return json.dumps([{
+            "field_name": self.partition_filter_field,
+            "filter_type": "IN",
+            "filter_value": json.dumps(partition)
+        }])
+
+    def sync_partitions(self, stream, advertiser_id, partition_ids):
+        """
+            Sync the date window in chunks of entity IDs. The partitions are requested concurrently and the
+            synced partitions are checkpointed in the state so that an interrupted date window is resumed
+            from the pending partitions. The bookmark is written once all the partitions of the window are synced.
+        """
+        advertiser_id = str(advertiser_id)
+        stream_id = stream.tap_stream_id
+        partitions = self.get_partitions(partition_ids)
+        checkpoint = {
+            'start_date': self.params['start_date'],
+            'end_date': self.params['end_date'],
+            'partitions_hash': hashlib.sha1(json.dumps(partition_ids).encode('utf-8')).hexdigest(),
+            'completed_partitions': [],
+            'bookmark': None
+        }
+        previous_checkpoint = self.get_advertiser_state('partition_checkpoints', stream_id, advertiser_id)
+        # resume only if the same window is partitioned the same way, otherwise sync all the partitions again
+        if self.resumable_partitions and previous_checkpoint and all(
+                previous_checkpoint.get(key) == checkpoint[key] for key in ('start_date', 'end_date', 'partitions_hash')):
+            checkpoint = previous_checkpoint
+            LOGGER.info('Resuming %s for advertiser %s from the partition checkpoint, %s of %s partitions synced',
+                        stream_id, advertiser_id, len(checkpoint['completed_partitions']), len(partitions))
+
+        pending_partitions = [index for index in range(len(partitions)) if index not in checkpoint['completed_partitions']]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {}
+            for index in pending_partitions:
+                params = {**self.params, 'filtering': self.get_partition_filter(partitions[index])}
+                futures[executor.submit(self.get_all_pages, self.path, params, self.new_buffer())] = index
+            # records are written from the main thread in the order the partitions complete
+            for future in as_completed(futures):
+                bookmark_value = self.process_partition(stream, future.result(), advertiser_id)
+                if bookmark_value and (checkpoint['bookmark'] is None or bookmark_value > checkpoint['bookmark']):
+                    checkpoint['bookmark'] = bookmark_value
+                checkpoint['completed_partitions'].append(futures[future])
+                self.write_advertiser_state('partition_checkpoints', stream_id, advertiser_id, checkpoint)
+
+        self.process_partitioned_window(stream, advertiser_id)
+        if checkpoint['bookmark']:
+            self.write_advertiser_bookmark(stream_id, advertiser_id, checkpoint['bookmark'])
+        self.write_advertiser_state('partition_checkpoints', stream_id, advertiser_id, None)
+
+    def get_active_date_range(self, advertiser_id):
+        """
+            Returns the date range in which the advertiser had deliverable ads. The range is computed from the
+            active and deleted ads and merged with the range saved in the state by the previous run, as
+            deleted ads are purged by TikTok after some time. An open range is saved with the time it was seen
+            open, `open_at`, the ads delivered at least until then.
+        """
+        active_range = get_active_date_range(list(self.get_entity_cache().get_entities(advertiser_id, 'ads').values()))
+
+        previous_range = self.state.get('active_date_ranges', {}).get(str(advertiser_id))
+        if previous_range:
+            previous_start_date = parse(previous_range['start_date'])
+            if previous_range['end_date']:
+                previous_end_date = parse(previous_range['end_date'])
+            else:
+                # the ads of the open range may have been purged since, the range ends once seen open at the
+                # earliest. The ranges saved without `open_at` are seen open now.
+                open_at = parse(previous_range['open_at']) if previous_range.get('open_at') else now()
+                previous_end_date = open_at + ACTIVE_RANGE_BUFFER
+            if active_range is None:
+                active_range = {
+                    'start_date': previous_start_date,
+                    'end_date': previous_end_date
+                }
+            else:
+                active_range['start_date'] = min(active_range['start_date'], previous_start_date)
+                # an end date of None is an open range
+                if active_range['end_date'] is not None:
+                    active_range['end_date'] = max(active_range['end_date'], previous_end_date)
+
+        if active_range is not None:
+            saved_range = {
+                'start_date': utils.strftime(active_range['start_date']),
+                'end_date': utils.strftime(active_range['end_date']) if active_range['end_date'] else None
+            }
+            if active_range['end_date'] is None:
+                saved_range['open_at'] = utils.strftime(now())
+            self.state.setdefault('active_date_ranges', {})[str(advertiser_id)] = saved_range
+        LOGGER.info('Active date range for advertiser %s: %s', advertiser_id, active_range)
+        return active_range
+
+    def fetch_window(self, advertiser_id, date_batch, partition_ids=None):
+        """
+            Returns the records of the date window, the partitions of the window are requested one after the other
+        """
+        params = {
+            **self.params,
+            'advertiser_id': advertiser_id,
+            'start_date': date_batch['start_date'].date().isoformat(),
+            'end_date': date_batch['end_date'].date().isoformat()
+        }
+        records = self.new_buffer()
+        if not partition_ids:
+            return self.get_all_pages(self.path, params, records)
+        for partition in self.get_partitions(partition_ids):
+            self.get_all_pages(self.path, {**params, 'filtering': self.get_partition_filter(partition)}, records)
+        return records
+
+    def process_backfill_window(self, stream, advertiser_id, date_batch, records):
+        """
+            Process the records of a backfill date window and move the backfill cursor past the window.
+            The bookmark of the incremental lane is not updated.
+        """
+        stream_id = stream.tap_stream_id
+        self.process_batch(stream, records, advertiser_id, write_bookmarks=False)
+        backfill = self.get_advertiser_state('backfill_bookmarks', stream_id, advertiser_id)
+        cursor = date_batch['end_date'] + timedelta(days=1)
+        if cursor >= parse(backfill['end_date']):
+            LOGGER.info('Backfill of %s for advertiser %s is complete', stream_id, advertiser_id)
+            backfill = {**backfill, 'cursor': backfill['end_date'], 'completed': True}
+        else:
+            backfill['cursor'] = utils.strftime(cursor)
+        self.write_advertiser_state('backfill_bookmarks', stream_id, advertiser_id, backfill)
+
+    def get_backfill_batches(self, stream_id, advertiser_id, active_range=None):
+        """
+            Returns the date windows left in the backfill of the advertiser from its cursor saved in
+            `backfill_bookmarks`, pruned to the active date range with `prune_insights_windows`.
+            The backfill is marked `completed` once no date window is left, it is kept in the state so that
+            the history is not backfilled again.
+        """
+        backfill = self.get_advertiser_state('backfill_bookmarks', stream_id, advertiser_id)
+        if not backfill or backfill.get('completed'):
+            return []
+        backfill_batches = get_date_batches(parse(backfill['cursor']), parse(backfill['end_date']), self.window_days)
+        if get_bool_config(self.config, 'prune_insights_windows'):
+            backfill_batches = prune_date_batches(backfill_batches, active_range)
+        if not backfill_batches:
+            self.write_advertiser_state('backfill_bookmarks', stream_id, advertiser_id,
+                                        {**backfill, 'cursor': backfill['end_date'], 'completed': True})
+        return backfill_batches
+
+    def get_incremental_start_date(self, stream_id, advertiser_id):
+        """
+            Returns the start date of the incremental windows of the advertiser: its bookmark, but not before
+            the end of its backfill, pending or completed, as the backfill syncs the days before
+        """
+        start_date = self.get_start_date(stream_id, advertiser_id)
+        backfill = self.get_advertiser_state('backfill_bookmarks', stream_id, advertiser_id)
+        if backfill:
+            start_date = max(start_date, parse(backfill['end_date']))
+        return start_date
+
+    def get_date_batches(self, stream_id, advertiser_id):
+        """
+            Returns the incremental date windows of the advertiser, from `get_incremental_start_date`. The windows
+            start at the window interrupted by the previous run if any, as the bookmark is the last day with
+            records, so that the window is planned with the same dates and resumed from its checkpoint.
+        """
+        start_date = self.get_incremental_start_date(stream_id, advertiser_id)
+        for checkpoints in ('partition_checkpoints', 'page_checkpoints'):
+            checkpoint = self.get_advertiser_state(checkpoints, stream_id, advertiser_id)
+            if checkpoint and checkpoint.get('start_date'):
+                start_date = max(start_date, parse(checkpoint['start_date']).replace(tzinfo=start_date.tzinfo))
+        end_date = parse(self.config['end_date']) if 'end_date' in self.config else now()
+        return get_date_batches(start_date, end_date, self.window_days)
+
+    def schedule_windows(self, stream, advertiser_id):
+        """
+            Schedule the date windows of the advertiser in the incremental and backfill lanes. For an advertiser
+            without bookmark only the last `incremental_days` are synced in the incremental lane, the older
+            history is synced in the backfill lane with its own cursor saved in the state as `backfill_bookmarks`.
+            The incremental lane starts at the end of the backfill until it writes its own bookmark.
+        """
+        stream_id = stream.tap_stream_id
+        start_date = self.get_start_date(stream_id, advertiser_id)
+        end_date = parse(self.config['end_date']) if 'end_date' in self.config else now()
+        incremental_start_date = end_date - timedelta(days=self.incremental_days)
+        backfill = self.get_advertiser_state('backfill_bookmarks', stream_id, advertiser_id)
+        if backfill is None and get_bool_config(self.config, 'backfill_lane') and \
+                start_date == parse(self.config['start_date']) and start_date < incremental_start_date:
+            backfill = {
+                'cursor': utils.strftime(start_date),
+                'end_date': utils.strftime(incremental_start_date)
+            }
+            self.write_advertiser_state('backfill_bookmarks', stream_id, advertiser_id, backfill)
+
+        incremental_batches = self.get_date_batches(stream_id, advertiser_id)
+        active_range = None
+        if get_bool_config(self.config, 'prune_insights_windows'):
+            active_range = self.get_active_date_range(advertiser_id)
+            incremental_batches = prune_date_batches(incremental_batches, active_range)
+        backfill_batches = self.get_backfill_batches(stream_id, advertiser_id, active_range)
+
+        partition_ids = None
+        if self.partition_size and (incremental_batches or backfill_batches):
+            partition_ids = self.get_partition_ids(advertiser_id)
+        for date_batch in incremental_batches:
+            self.scheduler.add(INCREMENTAL_LANE, (stream_id, advertiser_id, INCREMENTAL_LANE),
+                               functools.partial(self.fetch_window, advertiser_id, date_batch, partition_ids),
+                               functools.partial(self.process_batch, stream, advertiser_id=advertiser_id))
+        for date_batch in backfill_batches:
+            self.scheduler.add(BACKFILL_LANE, (stream_id, advertiser_id, BACKFILL_LANE),
+                               functools.partial(self.fetch_window, advertiser_id, date_batch, partition_ids),
+                               functools.partial(self.process_backfill_window, stream, advertiser_id, date_batch))
 
     def do_sync(self, stream):
         """ Sync data from tap source for insight related stream"""
+        if self.scheduler is None and self.concurrent_windows:
+            # the date windows of the stream are fetched concurrently by its own scheduler
+            self.scheduler = WindowScheduler(self.max_workers)
+            try:
+                self.do_sync(stream)
+                self.scheduler.run()
+            finally:
+                self.scheduler = None
+            return
+
         if 'accounts' in self.config and self.req_advertiser_id:
             advertiser_ids = self.config['accounts']
             for advertiser_id in advertiser_ids:
+                # With the backfill lane enabled, the date windows are synced later by the scheduler
+                if self.scheduler is not None:
+                    self.schedule_windows(stream, advertiser_id)
+                    continue
                 self.params['advertiser_id'] = advertiser_id
                 date_batches = self.get_date_batches(stream.tap_stream_id, advertiser_id)
+                # Skip the date windows in which the advertiser had no ads to deliver
+                active_range = None
+                if get_bool_config(self.config, 'prune_insights_windows'):
+                    active_range = self.get_active_date_range(advertiser_id)
+                    date_batches = prune_date_batches(date_batches, active_range)
+                # The history left by a backfill lane since disabled is synced first, with its own cursor
+                backfill_batches = self.get_backfill_batches(stream.tap_stream_id, advertiser_id, active_range)
+                partition_ids = None
+                if self.partition_size and (date_batches or backfill_batches):
+                    partition_ids = self.get_partition_ids(advertiser_id)
+                for date_batch in backfill_batches:
+                    self.process_backfill_window(stream, advertiser_id, date_batch,
+                                                 self.fetch_window(advertiser_id, date_batch, partition_ids))
                 for date_batch in date_batches:
                     self.params['start_date'] = date_batch['start_date'].date().isoformat()
                     self.params['end_date'] = date_batch['end_date'].date().isoformat()
-                    self.sync_pages(stream)
+                    # without any known ID the date window is requested without partitions
+                    if partition_ids:
+                        self.sync_partitions(stream, advertiser_id, partition_ids)
+                    else:
+                        self.sync_pages(stream)
 
 
 class AdInsights(Insights):
@@ -459,6 +1387,119 @@ class AdInsights(Insights):
         "query_lifetime": "false"
     }
 
+    def __init__(self, client: TikTokClient, config, state = {}, emit_records=True, derived_streams=None):
+        super().__init__(client, config, state)
+        # `emit_records` is False when only the streams derived from ad_insights are selected
+        self.emit_records = emit_records
+        # list of (stream object, catalog entry) of the selected derived streams
+        self.derived_streams = derived_streams or []
+        # records of the synced partitions of the date window, rolled up once the window is complete
+        self.partition_records = self.new_buffer()
+
+    @property
+    def resumable_partitions(self):
+        """ The rollup of the derived streams needs the records of all the partitions of the date window """
+        return not self.derived_streams
+
+    def get_start_date(self, stream_id, advertiser_id):
+        """
+            Returns the earliest start date of ad_insights and its derived streams for the advertiser
+        """
+        stream_ids = [stream_id] if self.emit_records else []
+        stream_ids += [derived_catalog.tap_stream_id for _, derived_catalog in self.derived_streams]
+        return min(super(AdInsights, self).get_start_date(sid, advertiser_id) for sid in stream_ids)
+
+    def process_derived_records(self, records, advertiser_id, write_bookmarks=True):
+        """
+            Rolls up the transformed ad_insights records and process them for each derived stream
+        """
+        for derived_stream, derived_catalog in self.derived_streams:
+            rollup_records = rollup_ad_insights_records(records, derived_stream.rollup_keys)
+            derived_stream.process_batch(derived_catalog, rollup_records, advertiser_id, write_bookmarks=write_bookmarks)
+
+    def process_partition(self, stream, records, advertiser_id):
+        """
+            Process the ad_insights records of a partition, the derived streams are rolled up once all the
+            partitions of the date window are synced
+        """
+        if self.derived_streams:
+            self.partition_records.extend(transform_ad_insights_records(records))
+        if self.emit_records:
+            return super().process_batch(stream, records, advertiser_id, write_bookmarks=False)
+        return None
+
+    def process_partitioned_window(self, stream, advertiser_id, write_bookmarks=True):
+        """
+            Process the derived streams once all the partitions of the date window are synced
+        """
+        if self.derived_streams:
+            self.process_derived_records(self.partition_records, advertiser_id, write_bookmarks=write_bookmarks)
+        self.partition_records.close()
+
+    def process_batch(self, stream, records, advertiser_id, write_bookmarks=True):
+        """
+            Process the ad_insights records and the records of the derived streams rolled up from them
+        """
+        if self.derived_streams:
+            # the rollup works on a copy as pre_transform of ad_insights creates new records
+            with self.new_buffer() as transformed_records:
+                for record in records:
+                    transformed_records.extend(transform_ad_insights_records([record]))
+                self.process_derived_records(transformed_records, advertiser_id, write_bookmarks=write_bookmarks)
+        if self.emit_records:
+            return super().process_batch(stream, records, advertiser_id, write_bookmarks=write_bookmarks)
+        return None
+
+class AdInsightsHourly(Insights):
+    tap_stream_id = "ad_insights_hourly"
+    key_properties = ['advertiser_id', 'ad_id', 'adgroup_id', 'campaign_id', 'stat_time_hour']
+    replication_keys  = ['stat_time_hour']
+    path = "report/integrated/get/"
+    # The report API supports a range of 1 day with the stat_time_hour dimension,
+    # the daily windows are fetched concurrently and checkpointed per hour.
+    window_days = 1
+    concurrent_windows = True
+    params = {
+        "service_type": "AUCTION",
+        "report_type": "BASIC",
+        "data_level": "AUCTION_AD",
+        "dimensions": """[
+            "ad_id",
+            "stat_time_hour"
+        ]""",
+        "metrics": json.dumps(AUCTION_FIELDS),
+        "query_lifetime": "false"
+    }
+
+    def get_start_date(self, stream_id, advertiser_id):
+        """
+            Returns the start of the day of the bookmark, the hours of the day are synced from the daily window
+        """
+        start_date = super().get_start_date(stream_id, advertiser_id)
+        return start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+
+class DerivedInsights(Stream):
+    """
+        Insights rolled up locally from the ad_insights records, synced along with the ad_insights stream
+    """
+    parent_stream = "ad_insights"
+    replication_keys  = ['stat_time_day']
+    rollup_keys = []
+
+    def do_sync(self, stream):
+        """ Derived streams are synced by their parent stream """
+        LOGGER.info("Stream %s is synced along with %s", stream.tap_stream_id, self.parent_stream)
+
+class CampaignInsights(DerivedInsights):
+    tap_stream_id = "campaign_insights"
+    key_properties = ['advertiser_id', 'campaign_id', 'stat_time_day']
+    rollup_keys = ['campaign_id', 'stat_time_day']
+
+class AdGroupInsights(DerivedInsights):
+    tap_stream_id = "adgroup_insights"
+    key_properties = ['advertiser_id', 'campaign_id', 'adgroup_id', 'stat_time_day']
+    rollup_keys = ['campaign_id', 'adgroup_id', 'stat_time_day']
+
 class AdInsightsByAgeAndGender(Insights):
     tap_stream_id = "ad_insights_by_age_and_gender"
     key_properties = ['advertiser_id', 'ad_id', 'adgroup_id', 'campaign_id', 'stat_time_day', 'age', 'gender']
@@ -519,6 +1560,8 @@ class CampaignInsightsByProvince(Insights):
     key_properties = ['advertiser_id', 'campaign_id', 'stat_time_day', 'province_id']
     replication_keys  = ['stat_time_day']
     path = "report/integrated/get/"
+    partition_filter_field = "campaign_ids"
+    partition_entity = "campaigns"
     params = {
         "service_type": "AUCTION",
         "report_type": "AUDIENCE",
@@ -538,8 +1581,11 @@ STREAMS = {
     'adgroups': AdGroups,
     'ads': Ads,
     'ad_insights': AdInsights,
+    'ad_insights_hourly': AdInsightsHourly,
     'ad_insights_by_age_and_gender': AdInsightsByAgeAndGender,
     'ad_insights_by_country': AdInsightsByCountry,
     'ad_insights_by_platform': AdInsightsByPlatform,
-    'campaign_insights_by_province': CampaignInsightsByProvince
+    'campaign_insights_by_province': CampaignInsightsByProvince,
+    'campaign_insights': CampaignInsights,
+    'adgroup_insights': AdGroupInsights
 }
@@ -1,6 +1,7 @@
 import singer
 
-from tap_tiktok_ads.streams import STREAMS
+from tap_tiktok_ads.scheduler import WindowScheduler
+from tap_tiktok_ads.streams import STREAMS, Stream, get_bool_config
 
 LOGGER = singer.get_logger()
 
@@ -21,22 +22,59 @@ def update_currently_syncing(state, stream_name):
 def sync(tik_tok_client, config, state, catalog):
     """ Sync data from tap source """
     # Loop over selected streams in catalog
-    selected_streams = catalog.get_selected_streams(state)
+    selected_streams = list(catalog.get_selected_streams(state))
+    selected_stream_ids = [stream.tap_stream_id for stream in selected_streams]
+    synced_parent_streams = set()
+    # With the backfill lane enabled the insights date windows of all the streams are scheduled
+    # and synced together, the windows of the incremental lane first
+    scheduler = None
+    if get_bool_config(config, 'backfill_lane'):
+        scheduler = WindowScheduler(int(config.get('max_workers') or 1))
+    # Entities of the advertisers shared by the streams, requested on first use
+    entity_cache = Stream(tik_tok_client, config, state).get_entity_cache()
     for stream in selected_streams:
         if tik_tok_client.sandbox and stream.tap_stream_id == "advertisers":
             # api for advertisers does not work with sandbox accout as the advertiserid's are invalid
             LOGGER.info("Skipping stream: %s for sandbox", stream.tap_stream_id)
             continue
+
+        # Derived streams are synced along with their parent stream, the parent stream is synced
+        # without writing its own records if it is not selected
+        parent_stream_id = STREAMS[stream.tap_stream_id].parent_stream
+        if parent_stream_id and (parent_stream_id in selected_stream_ids or parent_stream_id in synced_parent_streams):
+            continue
+        parent_stream = catalog.get_stream(parent_stream_id) if parent_stream_id else stream
+        synced_parent_streams.add(parent_stream.tap_stream_id)
+        derived_streams = [derived_stream for derived_stream in selected_streams
+                           if STREAMS[derived_stream.tap_stream_id].parent_stream == parent_stream.tap_stream_id]
+
         LOGGER.info("Syncing stream: %s", stream.tap_stream_id)
         update_currently_syncing(state, stream.tap_stream_id)
 
-        singer.write_schema(
-            stream_name=stream.tap_stream_id,
-            schema=stream.schema.to_dict(),
-            key_properties=stream.key_properties,
-        )
+        for selected_stream in [stream] + [derived_stream for derived_stream in derived_streams if derived_stream != stream]:
+            singer.write_schema(
+                stream_name=selected_stream.tap_stream_id,
+                schema=selected_stream.schema.to_dict(),
+                key_properties=selected_stream.key_properties,
+            )
+
+        if derived_streams:
+            stream_obj = STREAMS[parent_stream.tap_stream_id](
+                tik_tok_client, config, state,
+                emit_records=not parent_stream_id,
+                derived_streams=[(STREAMS[derived_stream.tap_stream_id](tik_tok_client, config, state), derived_stream)
+                                 for derived_stream in derived_streams])
+        else:
+            stream_obj = STREAMS[stream.tap_stream_id](tik_tok_client, config, state)
+        stream_obj.scheduler = scheduler
+        stream_obj.selected_stream_ids = selected_stream_ids
+        stream_obj.entity_cache = entity_cache
+        stream_obj.do_sync(parent_stream)
 
-        stream_obj = STREAMS[stream.tap_stream_id](tik_tok_client, config, state)
-        stream_obj.do_sync(stream)
+    if scheduler is not None:
+        LOGGER.info("Syncing the scheduled date windows")
+        scheduler.run()
 
+    # the entities requested by the streams are written to the file of the cache once per sync
+    entity_cache.save()
     update_currently_syncing(state, None)
@@ -0,0 +1,159 @@
+import argparse
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import singer
+from singer import metrics, utils, Catalog
+
+from tap_tiktok_ads import get_accounts
+from tap_tiktok_ads.client import TikTokClient, RateLimiter, new_session, get_connection_stats, get_access_tokens
+from tap_tiktok_ads.discover import discover
+from tap_tiktok_ads.files import write_json
+from tap_tiktok_ads.sync import sync
+
+LOGGER = singer.get_logger()
+
+# suffixes of the files of a tenant next to its config <tenant>.json
+STATE_SUFFIX = '.state.json'
+OUTPUT_SUFFIX = '.singer.jsonl'
+# default number of tenants synced concurrently
+DEFAULT_MAX_TENANTS = 4
+
+
+class TenantOutput:
+    """
+        Stand-in for `sys.stdout` writing the Singer messages of each thread to the sink of its tenant, set
+        with `set_sink`, or to the standard output. The messages of a tenant are written by the thread
+        running its sync, the concurrent requests of the sync do not write messages.
+    """
+
+    def __init__(self, stdout):
+        self.stdout = stdout
+        self.local = threading.local()
+
+    def set_sink(self, sink):
+        self.local.sink = sink
+
+    def get_sink(self):
+        return getattr(self.local, 'sink', None) or self.stdout
+
+    def write(self, data):
+        return self.get_sink().write(data)
+
+    def flush(self):
+        self.get_sink().flush()
+
+
+def load_tenants(tenants_dir):
+    """
+        Returns the config of each tenant by name, from the files <tenant>.json of the directory
+    """
+    tenants = {}
+    for file_name in sorted(os.listdir(tenants_dir)):
+        if file_name.endswith('.json') and not file_name.endswith(STATE_SUFFIX):
+            with open(os.path.join(tenants_dir, file_name), encoding='utf-8') as config_file:
+                tenants[file_name[:-len('.json')]] = json.load(config_file)
+    return tenants
+
+
+def get_rate_limiters(tenants):
+    """
+        Returns a RateLimiter by access token, shared by the tenants of the token, with the lowest
+        `max_requests_per_second` of the tenants. The tokens of a tenant with several tokens each get
+        their RateLimiter. The tokens without limit have no RateLimiter.
+    """
+    rates = {}
+    for config in tenants.values():
+        if config.get('max_requests_per_second'):
+            rate = float(config['max_requests_per_second'])
+            for access_token in get_access_tokens(config['access_token']):
+                rates[access_token] = min(rate, rates.get(access_token, rate))
+    return {access_token: RateLimiter(rate) for access_token, rate in rates.items()}
+
+
+def sync_tenant(name, config, tenants_dir, output_dir, session, rate_limiters, catalog, output):
+    """
+        Sync the accounts of the tenant with the shared session and RateLimiters of its tokens, writing
+        its messages to <tenant>.singer.jsonl and its state to <tenant>.state.json
+    """
+    state_path = os.path.join(tenants_dir, name + STATE_SUFFIX)
+    state = {}
+    if os.path.exists(state_path):
+        with open(state_path, encoding='utf-8') as state_file:
+            state = json.load(state_file)
+    config['accounts'] = get_accounts(config)
+
+    with open(os.path.join(output_dir, name + OUTPUT_SUFFIX), 'w', encoding='utf-8') as sink:
+        output.set_sink(sink)
+        try:
+            with TikTokClient(access_token=config['access_token'],
+                              advertiser_id=config['accounts'],
+                              sandbox=config.get('sandbox', "false"),
+                              request_timeout=config.get('request_timeout'),
+                              max_workers=config.get('max_workers', 1),
+                              session=session,
+                              rate_limiters=rate_limiters,
+                              max_requests_per_second=config.get('max_requests_per_second')) as tik_tok_client:
+                config['accounts'] = tik_tok_client.valid_accounts
+                sync(tik_tok_client, config, state, catalog)
+        finally:
+            output.set_sink(None)
+            # the state is kept up to the last bookmark written
+            write_json(state_path, state)
+
+
+def run_tenants(tenants_dir, output_dir=None, catalog=None, max_tenants=DEFAULT_MAX_TENANTS):
+    """
+        Sync the tenants of the directory concurrently in one process, sharing the catalog, one connection
+        pool and a RateLimiter per access token. Returns the names of the tenants whose sync failed.
+    """
+    output_dir = output_dir or tenants_dir
+    tenants = load_tenants(tenants_dir)
+    catalog = catalog or discover()
+    rate_limiters = get_rate_limiters(tenants)
+    # connections for the concurrent requests of the tenants synced at once
+    max_workers = max([int(config.get('max_workers') or 1) for config in tenants.values()] or [1])
+    session = new_session(max_tenants * (max_workers + 1))
+
+    output = TenantOutput(sys.stdout)
+    sys.stdout = output
+    failed_tenants = []
+    try:
+        with ThreadPoolExecutor(max_workers=max_tenants) as executor:
+            futures = {name: executor.submit(sync_tenant, name, config, tenants_dir, output_dir, session,
+                                             rate_limiters, catalog, output)
+                       for name, config in tenants.items()}
+            for name, future in futures.items():
+                try:
+                    future.result()
+                    LOGGER.info('Synced tenant %s', name)
+                except Exception: # pylint: disable=broad-except
+                    LOGGER.exception('Sync of tenant %s failed', name)
+                    failed_tenants.append(name)
+    finally:
+        sys.stdout = output.stdout
+        for name, value in get_connection_stats(session).items():
+            metrics.log(LOGGER, metrics.Point('counter', 'http_{}'.format(name), value, {'tenants': len(tenants)}))
+        session.close()
+    return failed_tenants
+
+
+@utils.handle_top_exception(LOGGER)
+def main():
+    parser = argparse.ArgumentParser(description='Sync the TikTok Ads accounts of many tenants in one process')
+    parser.add_argument('-d', '--tenants-dir', required=True,
+                        help='Directory of the tenant configs <tenant>.json and states <tenant>.state.json')
+    parser.add_argument('-o', '--output-dir',
+                        help='Directory of the Singer messages <tenant>.singer.jsonl, the tenants directory by default')
+    parser.add_argument('-p', '--properties', '--catalog', dest='catalog',
+                        help='Catalog file shared by the tenants, discovered by default')
+    parser.add_argument('-w', '--max-tenants', type=int, default=DEFAULT_MAX_TENANTS,
+                        help='Number of tenants synced concurrently')
+    args = parser.parse_args()
+
+    catalog = Catalog.load(args.catalog) if args.catalog else None
+    failed_tenants = run_tenants(args.tenants_dir, args.output_dir, catalog, args.max_tenants)
+    if failed_tenants:
+        raise Exception('Sync failed for the tenants: {}'.format(', '.join(failed_tenants)))
@@ -0,0 +1,56 @@
+import hashlib
+import json
+import os
+import time
+import singer
+
+from tap_tiktok_ads.files import write_json
+
+LOGGER = singer.get_logger()
+
+# name of the file of the verifications, next to the state file
+VERIFICATION_CACHE_FILE = '.tap_tiktok_ads_verification.json'
+
+
+def get_verification_key(access_token, advertiser_ids, sandbox=False):
+    """
+        Returns the hash of the access token and the accounts, so that the token is not written to the file
+    """
+    value = json.dumps([access_token, sorted(str(advertiser_id) for advertiser_id in advertiser_ids), bool(sandbox)])
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+
+class VerificationCache:
+    """
+        Verifications of the access token and the accounts, kept in a file for `ttl` seconds so that the runs
+        within the TTL start without requesting the API. The verifications are keyed by `get_verification_key`.
+    """
+
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        # {verification_key: verified_at}
+        self.verifications = {}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as cache_file:
+                    self.verifications = json.load(cache_file)
+            except ValueError:
+                LOGGER.warning('Ignoring the invalid verification cache %s', path)
+
+    def is_verified(self, key):
+        """
+            Returns True if the token and accounts of the key were verified less than `ttl` seconds ago
+        """
+        verified_at = self.verifications.get(key)
+        return verified_at is not None and time.time() - verified_at < self.ttl
+
+    def set_verified(self, key):
+        """
+            Record the verification of the token and accounts of the key, dropping the expired verifications
+        """
+        now = time.time()
+        self.verifications = {other_key: verified_at for other_key, verified_at in self.verifications.items()
+                              if now - verified_at < self.ttl}
+        self.verifications[key] = now
+        write_json(self.path, self.verifications)
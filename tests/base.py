@@ -23,9 +23,12 @@ class TiktokBase(unittest.TestCase):
             # as we are running tests on sandbox account, the api call fails for the following stream despite using the sandbox url
             "advertisers",
             "ad_insights",
+            "ad_insights_hourly",
             "ad_insights_by_age_and_gender",
             "ad_insights_by_country",
             "ad_insights_by_platform",
+            "campaign_insights",
+            "adgroup_insights",
             "insights",
         }
 
@@ -97,6 +100,12 @@ class TiktokBase(unittest.TestCase):
                 self.REPLICATION_KEYS: {"stat_time_day"},
                 self.OBEYS_START_DATE: True
             },
+            "ad_insights_hourly": {
+                self.PRIMARY_KEYS: {"advertiser_id", "ad_id", "adgroup_id", "campaign_id", "stat_time_hour"},
+                self.REPLICATION_METHOD: self.INCREMENTAL,
+                self.REPLICATION_KEYS: {"stat_time_hour"},
+                self.OBEYS_START_DATE: True
+            },
             "ad_insights_by_age_and_gender": {
                 self.PRIMARY_KEYS: {"advertiser_id", "ad_id", "adgroup_id", "campaign_id", "stat_time_day", "age", "gender"},
                 self.REPLICATION_METHOD: self.INCREMENTAL,
@@ -120,6 +129,18 @@ class TiktokBase(unittest.TestCase):
                 self.REPLICATION_METHOD: self.INCREMENTAL,
                 self.REPLICATION_KEYS: {"stat_time_day"},
                 self.OBEYS_START_DATE: True
+            },
+            "campaign_insights": {
+                self.PRIMARY_KEYS: {"advertiser_id", "campaign_id", "stat_time_day"},
+                self.REPLICATION_METHOD: self.INCREMENTAL,
+                self.REPLICATION_KEYS: {"stat_time_day"},
+                self.OBEYS_START_DATE: True
+            },
+            "adgroup_insights": {
+                self.PRIMARY_KEYS: {"advertiser_id", "campaign_id", "adgroup_id", "stat_time_day"},
+                self.REPLICATION_METHOD: self.INCREMENTAL,
+                self.REPLICATION_KEYS: {"stat_time_day"},
+                self.OBEYS_START_DATE: True
             }
         }
 
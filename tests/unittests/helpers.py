@@ -0,0 +1,30 @@
+def get_response(records):
+    """
+        Returns mocked response of the single page for the provided records, the records are copied
+        as the stream transforms the records of the response in place
+    """
+    return {
+        "message": "OK",
+        "code": 0,
+        "data": {
+            "page_info": {
+                "total_number": len(records)
+            },
+            "list": [dict(record) for record in records]
+        }
+    }
+
+def get_page_response(page, total_number):
+    """
+        Returns mocked response of the page with one campaign per page
+    """
+    return {
+        "message": "OK",
+        "code": 0,
+        "data": {
+            "page_info": {
+                "total_number": total_number
+            },
+            "list": [{"campaign_id": str(page), "modify_time": "2021-02-0{} 00:00:00".format(page)}]
+        }
+    }
@@ -34,7 +34,8 @@ class TestErrorHandling(unittest.TestCase):
         }
 
         # mock request and raise error
-        mocked_request.side_effect = [get_response(200, {"code": 0, "message": "OK"}), get_response(200, {"code": 40001, "message": "advertiser account_id1 doesn't exist or has been deleted."})]
+        # the accounts are requested together, then one by one
+        mocked_request.side_effect = [get_response(200, {"code": 0, "message": "OK"})] + [get_response(200, {"code": 40001, "message": "advertiser account_id1 doesn't exist or has been deleted."})] * 3
         
         # create client and call function
         client = TikTokClient(config.get("access_token"), config.get('accounts'), False, config.get("user_agent"))
@@ -76,7 +77,8 @@ class TestErrorHandling(unittest.TestCase):
         }
 
         # mock request and raise error
-        mocked_request.side_effect = [get_response(200, {"code": 0, "message": "OK"}), get_response(200, {"code": 51008, "message": "Service error:"})]
+        # the accounts are requested together, then one by one
+        mocked_request.side_effect = [get_response(200, {"code": 0, "message": "OK"})] + [get_response(200, {"code": 51008, "message": "Service error:"})] * 3
         
         # create client and call function
         client = TikTokClient(config.get("access_token"), config.get('accounts'), False, config.get("user_agent"))
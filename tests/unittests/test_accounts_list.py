@@ -6,7 +6,7 @@ from tap_tiktok_ads import main
 # mock TikTokClient class
 class MockTikTokClient:
     def __init__(self, *args, **kwargs):
-        pass
+        self.valid_accounts = kwargs.get("advertiser_id")
 
     def __enter__(self):
         return self
@@ -34,8 +34,8 @@ class TestAccountsList(unittest.TestCase):
     """
 
     @mock.patch("singer.utils.parse_args")
-    @mock.patch("tap_tiktok_ads.sync")
-    @mock.patch("tap_tiktok_ads.TikTokClient")
+    @mock.patch("tap_tiktok_ads.sync.sync")
+    @mock.patch("tap_tiktok_ads.client.TikTokClient")
     def test_accounts_list(self, mocked_TikTokClient, mocked_sync, mocked_parse_args):
 
         # create config file
@@ -67,8 +67,8 @@ class TestAccountsList(unittest.TestCase):
         self.assertEqual(actual_config, expected_config)
 
     @mock.patch("singer.utils.parse_args")
-    @mock.patch("tap_tiktok_ads.sync")
-    @mock.patch("tap_tiktok_ads.TikTokClient")
+    @mock.patch("tap_tiktok_ads.sync.sync")
+    @mock.patch("tap_tiktok_ads.client.TikTokClient")
     def test_empty_accounts_list(self, mocked_TikTokClient, mocked_sync, mocked_parse_args):
 
         # create config file
@@ -93,8 +93,8 @@ class TestAccountsList(unittest.TestCase):
         self.assertTrue(str(e.exception), "Please provide atleast 1 Account ID.")
 
     @mock.patch("singer.utils.parse_args")
-    @mock.patch("tap_tiktok_ads.sync")
-    @mock.patch("tap_tiktok_ads.TikTokClient")
+    @mock.patch("tap_tiktok_ads.sync.sync")
+    @mock.patch("tap_tiktok_ads.client.TikTokClient")
     def test_invlaid_accounts_list(self, mocked_TikTokClient, mocked_sync, mocked_parse_args):
 
         # create config file
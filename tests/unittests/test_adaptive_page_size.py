@@ -0,0 +1,149 @@
+import unittest
+from unittest import mock
+import requests
+from urllib.parse import parse_qs, urlparse
+from tap_tiktok_ads.client import TikTokClient
+from tap_tiktok_ads.paging import PageSizeTuner
+from tap_tiktok_ads.streams import Stream
+
+def get_response(page, page_size, total_number):
+    """
+        Returns mocked response of the page with the IDs of the records as offsets
+    """
+    start = (page - 1) * page_size
+    return {
+        "message": "OK",
+        "code": 0,
+        "data": {
+            "page_info": {
+                "total_number": total_number
+            },
+            "list": [{"id": index} for index in range(start, min(start + page_size, total_number))]
+        }
+    }
+
+class TestPageSizeTuner(unittest.TestCase):
+    """
+        Test cases to verify the page size is tuned from the latency of the pages
+    """
+
+    def test_page_sizes(self):
+        """
+            Verify the page sizes are halved from the configured page size
+        """
+        self.assertEqual(PageSizeTuner(1000, 75).page_sizes, [1000, 500, 250, 125])
+
+    def test_shrink_if_slow(self):
+        """
+            Verify the page size is reduced if the latency exceeds the target
+        """
+        tuner = PageSizeTuner(1000, 75)
+        tuner.record(1000, 1000, 100)
+        self.assertEqual(tuner.page_size, 500)
+
+    def test_grow_if_fast(self):
+        """
+            Verify the larger page size is tried again if the latency is well below the target and
+            the smaller page size is kept if the larger one has a worse throughput
+        """
+        tuner = PageSizeTuner(1000, 75)
+        tuner.record(1000, 1000, 100)
+        tuner.record(500, 500, 10)
+        self.assertEqual(tuner.page_size, 500)
+
+        tuner = PageSizeTuner(1000, 75)
+        tuner.set_index(1)
+        tuner.record(500, 500, 10)
+        self.assertEqual(tuner.page_size, 1000)
+
+    def test_shrink_if_large_payload(self):
+        """
+            Verify the page size is reduced if the payload of a full page is too large
+        """
+        tuner = PageSizeTuner(1000, 75)
+        tuner.record(1000, 1000, 1, 64 * 1024 * 1024)
+        self.assertEqual(tuner.page_size, 500)
+
+    def test_page_size_of_offset(self):
+        """
+            Verify the larger page size is only used from an offset it divides
+        """
+        tuner = PageSizeTuner(1000, 75)
+        tuner.set_index(1)
+        tuner.set_index(0)
+        self.assertEqual(tuner.get_page_size(1500), 500)
+        self.assertEqual(tuner.get_page_size(2000), 1000)
+
+class TestAdaptivePageSize(unittest.TestCase):
+    """
+        Test cases to verify the pages are requested with the tuned page size
+    """
+
+    def get_stream(self, adaptive_page_size):
+        config = {"access_token": "mock_access_token", "page_size": 100, "adaptive_page_size": adaptive_page_size}
+        return Stream(TikTokClient("mock_access_token", []), config)
+
+    @staticmethod
+    def get_page(url):
+        """ Returns the page size and the page of the URL of a request """
+        query = parse_qs(urlparse(url).query)
+        return int(query['page_size'][0]), int(query['page'][0])
+
+    def mock_requests(self, mock_request, timeout_pages, total_number=250):
+        """
+            Mock the requests of the pages, the pages (page_size, page) of `timeout_pages` time out
+        """
+        def request(method, url, **kwargs):
+            page_size, page = self.get_page(url)
+            if (page_size, page) in timeout_pages:
+                raise requests.Timeout()
+            response = mock.Mock(status_code=200, content=b'')
+            response.json.return_value = get_response(page, page_size, total_number)
+            return response
+        mock_request.side_effect = request
+
+    @mock.patch("time.sleep")
+    @mock.patch("requests.Session.request")
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.check_access_token")
+    def test_retry_timeout_with_smaller_page(self, mock_check_access_token, mock_request, mock_sleep):
+        """
+            Verify a page timing out is requested again at once with a smaller page size and no record is skipped
+        """
+        self.mock_requests(mock_request, [(100, 2)])
+
+        records = self.get_stream("true").get_all_pages("ad/get/", {})
+
+        self.assertEqual([record["id"] for record in records], list(range(250)))
+        pages = [self.get_page(call[0][1]) for call in mock_request.call_args_list]
+        self.assertEqual(pages, [(100, 1), (100, 2), (50, 3), (50, 4), (50, 5)])
+        self.assertEqual(mock_sleep.call_count, 0)
+
+    @mock.patch("time.sleep")
+    @mock.patch("requests.Session.request")
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.check_access_token")
+    def test_smallest_page_retried_with_backoff(self, mock_check_access_token, mock_request, mock_sleep):
+        """
+            Verify each page size timing out is requested once, and the smallest one is retried with backoff
+        """
+        self.mock_requests(mock_request, [(100, 1), (50, 1)])
+
+        with self.assertRaises(requests.Timeout):
+            self.get_stream("true").get_all_pages("ad/get/", {})
+
+        pages = [self.get_page(call[0][1]) for call in mock_request.call_args_list]
+        self.assertEqual(pages, [(100, 1)] + [(50, 1)] * 5)
+
+    @mock.patch("time.sleep")
+    @mock.patch("requests.Session.request")
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.check_access_token")
+    def test_timeout_not_retried_by_default(self, mock_check_access_token, mock_request, mock_sleep):
+        """
+            Verify the timeout is retried with the same page size if `adaptive_page_size` is not enabled
+        """
+        self.mock_requests(mock_request, [(100, 1)])
+
+        with self.assertRaises(requests.Timeout):
+            self.get_stream("false").get_all_pages("ad/get/", {})
+
+        pages = [self.get_page(call[0][1]) for call in mock_request.call_args_list]
+        self.assertEqual(pages, [(100, 1)] * 5)
@@ -0,0 +1,121 @@
+import json
+import time
+import unittest
+from unittest import mock
+from tap_tiktok_ads.client import TikTokClient, TikTokAdsClientError
+from tap_tiktok_ads.streams import Advertisers
+
+def get(path=None, headers=None, params=None):
+    """
+        Returns the mocked response of the advertiser/info/ endpoint for the requested advertiser IDs
+    """
+    return {"code": 0, "message": "OK",
+            "data": {"list": [{"advertiser_id": advertiser_id, "create_time": 1609459200}
+                              for advertiser_id in json.loads(params["advertiser_ids"])]}}
+
+def get_error(code, message):
+    """
+        Returns the error of a response with the error code
+    """
+    response = mock.Mock()
+    response.json.return_value = {"code": code, "message": message}
+    return TikTokAdsClientError(message, response)
+
+@mock.patch("tap_tiktok_ads.client.TikTokClient.get", side_effect=get)
+class TestAdvertisersInfo(unittest.TestCase):
+    """
+        Test cases to verify the advertisers are requested in chunks and the advertisers of the verification are reused
+    """
+
+    accounts = [str(account) for account in range(250)]
+
+    def test_chunked_requests(self, mock_get):
+        """
+            Verify the advertiser IDs are requested in chunks of 100, in order
+        """
+        client = TikTokClient("mock_access_token", self.accounts, max_workers=3)
+        records = client.get_advertisers_info(self.accounts)
+
+        self.assertEqual([record["advertiser_id"] for record in records], self.accounts)
+        self.assertEqual(sorted(len(json.loads(call[1]["params"]["advertiser_ids"])) for call in mock_get.call_args_list),
+                         [50, 100, 100])
+
+    @mock.patch("tap_tiktok_ads.streams.Stream.process_batch")
+    @mock.patch("requests.Session.request")
+    def test_stream_reuses_verification(self, mock_request, mock_process_batch, mock_get):
+        """
+            Verify the advertisers stream uses the advertisers requested by the verification while fresh
+        """
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.json.return_value = {"code": 0, "message": "OK"}
+        client = TikTokClient("mock_access_token", self.accounts)
+        client.check_access_token()
+        self.assertEqual(mock_get.call_count, 3)
+
+        stream = Advertisers(client, {"access_token": "mock_access_token", "start_date": "2021-01-01T00:00:00Z",
+                                      "accounts": self.accounts}, {})
+        stream.do_sync(mock.Mock(tap_stream_id="advertisers"))
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(len(mock_process_batch.call_args[0][1]), 250)
+
+        with mock.patch("time.time", return_value=time.time() + 3600):
+            stream.do_sync(mock.Mock(tap_stream_id="advertisers"))
+        self.assertEqual(mock_get.call_count, 6)
+
+class TestAccountValidation(unittest.TestCase):
+    """
+        Test cases to verify the invalid accounts are isolated and the sync proceeds with the valid accounts
+    """
+
+    @mock.patch("requests.Session.request")
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.get")
+    def test_invalid_accounts_isolated(self, mock_get, mock_request):
+        """
+            Verify a chunk with invalid IDs is split until the invalid IDs are isolated
+        """
+        def get_advertisers(path=None, headers=None, params=None):
+            advertiser_ids = json.loads(params["advertiser_ids"])
+            if "13" in advertiser_ids or "142" in advertiser_ids:
+                raise get_error(40001, "advertiser doesn't exist or has been deleted.")
+            return get(path, headers, params)
+        mock_get.side_effect = get_advertisers
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.json.return_value = {"code": 0, "message": "OK"}
+        accounts = [str(account) for account in range(150)]
+        client = TikTokClient("mock_access_token", accounts, max_workers=2)
+
+        self.assertTrue(client.check_access_token())
+
+        self.assertEqual([advertiser_id for advertiser_id, valid in client.account_validity.items() if not valid], ["13", "142"])
+        self.assertEqual(client.valid_accounts, [account for account in accounts if account not in ("13", "142")])
+        self.assertEqual(len(client.get_advertisers_info(client.valid_accounts)), 148)
+
+    @mock.patch("requests.Session.request")
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.get", side_effect=get_error(40001, "Invalid advertiser"))
+    def test_all_accounts_invalid(self, mock_get, mock_request):
+        """
+            Verify the error is raised if none of the accounts is valid
+        """
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.json.return_value = {"code": 0, "message": "OK"}
+        client = TikTokClient("mock_access_token", ["1", "2"])
+
+        with self.assertRaises(TikTokAdsClientError) as e:
+            client.check_access_token()
+        self.assertEqual(str(e.exception), "Invalid advertiser")
+
+    @mock.patch("requests.Session.request")
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.get", side_effect=get_error(50000, "System error"))
+    def test_system_error_not_split(self, mock_get, mock_request):
+        """
+            Verify an error other than an invalid account fails the verification without splitting the chunk
+        """
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.json.return_value = {"code": 0, "message": "OK"}
+        client = TikTokClient("mock_access_token", [str(account) for account in range(16)])
+
+        with self.assertRaises(TikTokAdsClientError) as e:
+            client.check_access_token()
+        self.assertEqual(str(e.exception), "System error")
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(client.account_validity, {})
@@ -0,0 +1,165 @@
+import threading
+import unittest
+from unittest import mock
+from dateutil.parser import parse
+from tap_tiktok_ads.client import TikTokClient
+from tap_tiktok_ads.scheduler import WindowScheduler, INCREMENTAL_LANE, BACKFILL_LANE
+from tap_tiktok_ads.streams import AdInsights
+
+class TestWindowScheduler(unittest.TestCase):
+    """
+        Test cases to verify the date windows are scheduled by lane and processed in order
+    """
+
+    def test_incremental_lane_first(self):
+        """
+            Verify the windows of the incremental lane are fetched before the backfill ones
+        """
+        fetched = []
+        scheduler = WindowScheduler(max_workers=1)
+        scheduler.add(BACKFILL_LANE, 'backfill', lambda: fetched.append('backfill'), lambda records: None)
+        scheduler.add(INCREMENTAL_LANE, 'incremental', lambda: fetched.append('incremental'), lambda records: None)
+        scheduler.run()
+        self.assertEqual(fetched, ['incremental', 'backfill'])
+
+    def test_process_in_order(self):
+        """
+            Verify the windows of the same sequence are processed in order even if fetched out of order
+        """
+        first_window_fetching = threading.Event()
+        second_window_fetched = threading.Event()
+
+        def fetch_first():
+            first_window_fetching.set()
+            second_window_fetched.wait(5)
+            return 1
+
+        def fetch_second():
+            first_window_fetching.wait(5)
+            second_window_fetched.set()
+            return 2
+
+        processed = []
+        scheduler = WindowScheduler(max_workers=2)
+        scheduler.add(INCREMENTAL_LANE, 'key', fetch_first, processed.append)
+        scheduler.add(INCREMENTAL_LANE, 'key', fetch_second, processed.append)
+        scheduler.run()
+        self.assertEqual(processed, [1, 2])
+
+class TestBackfillLane(unittest.TestCase):
+    """
+        Test cases to verify the history of a new advertiser is synced in the backfill lane
+    """
+
+    config = {"access_token": "mock_access_token", "start_date": "2021-01-01T00:00:00Z", "end_date": "2021-04-01T00:00:00Z",
+              "accounts": ["1234"], "backfill_lane": "true", "incremental_days": 10}
+
+    def test_schedule_new_advertiser(self):
+        """
+            Verify the last `incremental_days` are scheduled in the incremental lane and the older days in the backfill lane
+        """
+        state = {}
+        stream = AdInsights(TikTokClient("mock_access_token", []), self.config, state)
+        stream.scheduler = mock.Mock()
+
+        stream.schedule_windows(mock.Mock(tap_stream_id='ad_insights'), "1234")
+
+        self.assertEqual(state['backfill_bookmarks']['ad_insights']['1234'],
+                         {'cursor': '2021-01-01T00:00:00.000000Z', 'end_date': '2021-03-22T00:00:00.000000Z'})
+        lanes = [call[0][0] for call in stream.scheduler.add.call_args_list]
+        self.assertEqual(lanes, [INCREMENTAL_LANE, BACKFILL_LANE, BACKFILL_LANE, BACKFILL_LANE])
+
+    def test_schedule_advertiser_with_bookmark(self):
+        """
+            Verify an advertiser with bookmark and without backfill is only synced in the incremental lane
+        """
+        state = {"bookmarks": {"ad_insights": {"1234": "2021-03-01T00:00:00Z"}}}
+        stream = AdInsights(TikTokClient("mock_access_token", []), self.config, state)
+        stream.scheduler = mock.Mock()
+
+        stream.schedule_windows(mock.Mock(tap_stream_id='ad_insights'), "1234")
+
+        self.assertNotIn('backfill_bookmarks', state)
+        lanes = [call[0][0] for call in stream.scheduler.add.call_args_list]
+        self.assertEqual(lanes, [INCREMENTAL_LANE, INCREMENTAL_LANE])
+
+    @mock.patch("tap_tiktok_ads.streams.AdInsights.process_batch")
+    def test_backfill_cursor(self, mock_process_batch):
+        """
+            Verify the backfill cursor moves past the processed window and the backfill is marked completed
+        """
+        state = {"backfill_bookmarks": {"ad_insights": {"1234": {'cursor': '2021-01-01T00:00:00.000000Z',
+                                                                 'end_date': '2021-03-22T00:00:00.000000Z'}}}}
+        stream = AdInsights(TikTokClient("mock_access_token", []), self.config, state)
+        catalog = mock.Mock(tap_stream_id='ad_insights')
+
+        stream.process_backfill_window(catalog, "1234", {'start_date': parse('2021-01-01T00:00:00Z'),
+                                                         'end_date': parse('2021-01-30T00:00:00Z')}, [])
+        self.assertEqual(state['backfill_bookmarks']['ad_insights']['1234']['cursor'], '2021-01-31T00:00:00.000000Z')
+        mock_process_batch.assert_called_with(catalog, [], "1234", write_bookmarks=False)
+
+        stream.process_backfill_window(catalog, "1234", {'start_date': parse('2021-03-02T00:00:00Z'),
+                                                         'end_date': parse('2021-03-22T00:00:00Z')}, [])
+        self.assertEqual(state['backfill_bookmarks']['ad_insights']['1234'],
+                         {'cursor': '2021-03-22T00:00:00.000000Z', 'end_date': '2021-03-22T00:00:00.000000Z', 'completed': True})
+
+    @mock.patch("tap_tiktok_ads.streams.AdInsights.sync_pages")
+    @mock.patch("tap_tiktok_ads.streams.AdInsights.process_batch")
+    @mock.patch("tap_tiktok_ads.streams.AdInsights.fetch_window", return_value=[])
+    def test_backfill_without_lane(self, mock_fetch_window, mock_process_batch, mock_sync_pages):
+        """
+            Verify a backfill left in the state is completed before the incremental windows if `backfill_lane` is disabled
+        """
+        config = {**self.config, "backfill_lane": "false"}
+        state = {"bookmarks": {"ad_insights": {"1234": "2021-03-22T00:00:00Z"}},
+                 "backfill_bookmarks": {"ad_insights": {"1234": {'cursor': '2021-03-01T00:00:00.000000Z',
+                                                                 'end_date': '2021-03-22T00:00:00.000000Z'}}}}
+        stream = AdInsights(TikTokClient("mock_access_token", []), config, state)
+        catalog = mock.Mock(tap_stream_id='ad_insights')
+        synced = []
+        mock_process_batch.side_effect = lambda *args, **kwargs: synced.append('backfill')
+        mock_sync_pages.side_effect = lambda *args: synced.append('incremental')
+
+        stream.do_sync(catalog)
+
+        self.assertEqual(mock_fetch_window.call_args[0][1], {'start_date': parse('2021-03-01T00:00:00Z'),
+                                                             'end_date': parse('2021-03-22T00:00:00Z')})
+        mock_process_batch.assert_called_with(catalog, [], "1234", write_bookmarks=False)
+        self.assertEqual(synced, ['backfill', 'incremental'])
+        self.assertTrue(state['backfill_bookmarks']['ad_insights']['1234']['completed'])
+
+    def test_pending_backfill_without_bookmark(self):
+        """
+            Verify the incremental lane starts at the end of a pending backfill while it has no bookmark,
+            so that the history is not synced by both lanes
+        """
+        state = {"backfill_bookmarks": {"ad_insights": {"1234": {'cursor': '2021-02-01T00:00:00.000000Z',
+                                                                 'end_date': '2021-03-22T00:00:00.000000Z'}}}}
+        stream = AdInsights(TikTokClient("mock_access_token", []), self.config, state)
+        stream.scheduler = mock.Mock()
+
+        stream.schedule_windows(mock.Mock(tap_stream_id='ad_insights'), "1234")
+
+        windows = {lane: [] for lane in (INCREMENTAL_LANE, BACKFILL_LANE)}
+        for call in stream.scheduler.add.call_args_list:
+            windows[call[0][0]].append(call[0][2].args[1])
+        self.assertEqual([window['start_date'] for window in windows[INCREMENTAL_LANE]], [parse('2021-03-22T00:00:00Z')])
+        self.assertEqual([window['start_date'] for window in windows[BACKFILL_LANE]],
+                         [parse('2021-02-01T00:00:00Z'), parse('2021-03-03T00:00:00Z')])
+
+    def test_completed_backfill_not_repeated(self):
+        """
+            Verify a completed backfill of an advertiser still without bookmark is not started again
+        """
+        state = {"backfill_bookmarks": {"ad_insights": {"1234": {'cursor': '2021-03-22T00:00:00.000000Z',
+                                                                 'end_date': '2021-03-22T00:00:00.000000Z',
+                                                                 'completed': True}}}}
+        stream = AdInsights(TikTokClient("mock_access_token", []), self.config, state)
+        stream.scheduler = mock.Mock()
+
+        stream.schedule_windows(mock.Mock(tap_stream_id='ad_insights'), "1234")
+
+        self.assertTrue(state['backfill_bookmarks']['ad_insights']['1234']['completed'])
+        lanes = [call[0][0] for call in stream.scheduler.add.call_args_list]
+        self.assertEqual(lanes, [INCREMENTAL_LANE])
+        self.assertEqual(stream.scheduler.add.call_args[0][2].args[1]['start_date'], parse('2021-03-22T00:00:00Z'))
@@ -0,0 +1,105 @@
+import sys
+import unittest
+from unittest import mock
+import requests
+from tap_tiktok_ads.client import TikTokClient
+
+class TestConnectionPool(unittest.TestCase):
+    """
+        Test cases to verify the connection pool is sized for the concurrency and its reuse is reported
+    """
+
+    def test_pool_sized_for_workers(self):
+        """
+            Verify the pool keeps a connection per worker, at least the default size, unless configured
+        """
+        self.assertEqual(TikTokClient("mock_access_token", []).pool_maxsize, 10)
+        self.assertEqual(TikTokClient("mock_access_token", [], max_workers=16).pool_maxsize, 17)
+        self.assertEqual(TikTokClient("mock_access_token", [], max_workers="16", pool_maxsize="4").pool_maxsize, 4)
+
+    def test_connection_stats(self):
+        """
+            Verify the requests made with a connection already opened are counted as reused
+        """
+        client = TikTokClient("mock_access_token", [], max_workers=16)
+        adapter = client._TikTokClient__session.get_adapter("https://business-api.tiktok.com")
+        self.assertEqual(adapter._pool_maxsize, 17)
+        pool = adapter.poolmanager.connection_from_url("https://business-api.tiktok.com")
+        pool.num_connections = 2
+        pool.num_requests = 10
+
+        self.assertEqual(client.get_connection_stats(),
+                         {"requests": 10, "new_connections": 2, "reused_connections": 8, "tls_handshakes": 2})
+
+    @mock.patch("singer.metrics.log")
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.check_access_token")
+    def test_stats_logged_on_exit(self, mock_check_access_token, mock_log):
+        """
+            Verify the connection stats are logged as metrics when the client is closed
+        """
+        with TikTokClient("mock_access_token", []):
+            pass
+        self.assertEqual([call[0][1].metric for call in mock_log.call_args_list],
+                         ["http_requests", "http_new_connections", "http_reused_connections", "http_tls_handshakes"])
+
+class MockTimeoutException(Exception):
+    pass
+
+class MockTransportError(Exception):
+    pass
+
+def get_httpx():
+    """
+        Returns the mocked httpx module
+    """
+    return mock.Mock(TimeoutException=MockTimeoutException, TransportError=MockTransportError)
+
+class TestHttp2Transport(unittest.TestCase):
+    """
+        Test cases to verify the requests are multiplexed over HTTP/2 connections when enabled
+    """
+
+    def test_missing_httpx(self):
+        """
+            Verify a clear error is raised if httpx is not installed
+        """
+        with mock.patch.dict(sys.modules, {"httpx": None}):
+            with self.assertRaises(Exception) as e:
+                TikTokClient("mock_access_token", [], http2="true")
+        self.assertIn("tap-tiktok-ads[http2]", str(e.exception))
+
+    def test_multiplexed_requests(self):
+        """
+            Verify the transport is HTTP/2 and the requests sharing a connection are counted as reused
+        """
+        httpx = get_httpx()
+        network_stream = mock.Mock()
+        response = mock.Mock(status_code=200, extensions={"network_stream": network_stream})
+        response.json.return_value = {"code": 0, "message": "OK", "data": {}}
+        httpx.Client.return_value.request.return_value = response
+        with mock.patch.dict(sys.modules, {"httpx": httpx}):
+            client = TikTokClient("mock_access_token", [], http2="true", pool_maxsize=2)
+        client._TikTokClient__verified = True
+
+        for _ in range(3):
+            client.get(path="campaign/get/", params={"page": 1})
+
+        httpx.HTTPTransport.assert_called_once_with(http2=True, limits=httpx.Limits.return_value, retries=3)
+        httpx.Limits.assert_called_once_with(max_connections=2, max_keepalive_connections=2)
+        self.assertEqual(client.get_connection_stats(),
+                         {"requests": 3, "new_connections": 1, "reused_connections": 2, "tls_handshakes": 1})
+
+    def test_timeout_retried(self):
+        """
+            Verify the timeouts of the HTTP/2 transport are raised as the requests timeouts
+        """
+        httpx = get_httpx()
+        httpx.Client.return_value.request.side_effect = MockTimeoutException("timed out")
+        with mock.patch.dict(sys.modules, {"httpx": httpx}):
+            client = TikTokClient("mock_access_token", [], http2="true", request_timeout=1)
+        client._TikTokClient__verified = True
+
+        with mock.patch("time.sleep"):
+            with self.assertRaises(requests.Timeout):
+                client.get(path="campaign/get/")
+        self.assertEqual(httpx.Client.return_value.request.call_count, 5)
@@ -0,0 +1,47 @@
+import threading
+import unittest
+from unittest import mock
+from tap_tiktok_ads.daemon import run_daemon
+
+class TestDaemon(unittest.TestCase):
+    """
+        Test cases to verify the daemon syncs on schedule with the client and the state kept between the cycles
+    """
+
+    @mock.patch("tap_tiktok_ads.daemon.sync")
+    def test_cycles_share_state(self, mock_sync):
+        """
+            Verify each cycle syncs with the same client and the state updated by the previous cycles
+        """
+        client, catalog, state = mock.Mock(), mock.Mock(), {}
+        mock_sync.side_effect = lambda client, config, state, catalog: state.setdefault("cycles", []).append(len(state.get("cycles", [])))
+        config = {"daemon_interval": "0.01", "daemon_cycles": "3"}
+
+        run_daemon(client, config, state, catalog)
+
+        self.assertEqual(state["cycles"], [0, 1, 2])
+        self.assertEqual(mock_sync.call_args_list, [mock.call(client, config, state, catalog)] * 3)
+
+    @mock.patch("tap_tiktok_ads.daemon.sync")
+    def test_stop_after_cycle(self, mock_sync):
+        """
+            Verify the daemon stops after the current cycle when stopped, without waiting for the interval
+        """
+        stop_event = threading.Event()
+        mock_sync.side_effect = lambda *args: stop_event.set()
+
+        run_daemon(mock.Mock(), {"daemon_interval": "3600"}, {}, mock.Mock(), stop_event)
+
+        self.assertEqual(mock_sync.call_count, 1)
+
+    @mock.patch("tap_tiktok_ads.daemon.sync")
+    def test_interval_between_starts(self, mock_sync):
+        """
+            Verify the wait between the cycles is the interval minus the duration of the cycle
+        """
+        stop_event = mock.Mock()
+        stop_event.is_set.side_effect = [False, False, True]
+        with mock.patch("time.monotonic", side_effect=[0, 100, 100, 100, 1000, 1000]):
+            run_daemon(mock.Mock(), {"daemon_interval": "900"}, {}, mock.Mock(), stop_event)
+
+        self.assertEqual(stop_event.wait.call_args_list, [mock.call(800), mock.call(0)])
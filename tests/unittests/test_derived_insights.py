@@ -0,0 +1,98 @@
+import unittest
+from unittest import mock
+from singer import Schema
+from tap_tiktok_ads.client import TikTokClient
+from tap_tiktok_ads.schemas import get_schemas
+from tap_tiktok_ads.streams import rollup_ad_insights_records, AdInsights, CampaignInsights, AdGroupInsights
+
+class MockCatalog():
+    '''Mocked the catalog entry of the stream.'''
+    def __init__(self, tap_stream_id):
+        schemas, field_metadata = get_schemas()
+        self.tap_stream_id = tap_stream_id
+        self.schema = Schema.from_dict(schemas[tap_stream_id])
+        self.metadata = field_metadata[tap_stream_id]
+
+def get_record(ad_id, adgroup_id, spend, impressions, clicks):
+    """
+        Returns mocked ad_insights record as returned by the report API
+    """
+    return {
+        "metrics": {
+            "campaign_id": "1", "campaign_name": "campaign", "adgroup_id": adgroup_id, "adgroup_name": "adgroup",
+            "spend": spend, "impressions": impressions, "clicks": clicks, "reach": "10", "frequency": "1.5"
+        },
+        "dimensions": {
+            "ad_id": ad_id, "stat_time_day": "2021-01-01 00:00:00"
+        }
+    }
+
+class TestDerivedInsights(unittest.TestCase):
+    """
+        Test cases to verify the campaign and adgroup insights are rolled up from the ad_insights records
+    """
+
+    def test_rollup_ad_insights_records(self):
+        """
+            Verify the additive metrics are summed up, the ratios are recomputed and non-additive metrics are excluded
+        """
+        records = [
+            {"campaign_id": "1", "campaign_name": "campaign", "stat_time_day": "2021-01-01 00:00:00",
+             "spend": "0.1", "impressions": "100", "clicks": "2", "reach": "10"},
+            {"campaign_id": "1", "campaign_name": "campaign", "stat_time_day": "2021-01-01 00:00:00",
+             "spend": "0.2", "impressions": "300", "clicks": "-", "reach": "10"},
+            {"campaign_id": "2", "campaign_name": "campaign2", "stat_time_day": "2021-01-01 00:00:00",
+             "spend": "0", "impressions": "0", "clicks": "0"}
+        ]
+        rollup_records = rollup_ad_insights_records(records, ['campaign_id', 'stat_time_day'])
+
+        self.assertEqual(len(rollup_records), 2)
+        self.assertEqual(rollup_records[0]['spend'], 0.3)
+        self.assertEqual(rollup_records[0]['impressions'], 400)
+        self.assertEqual(rollup_records[0]['clicks'], 2)
+        self.assertEqual(rollup_records[0]['cpc'], 0.15)
+        self.assertEqual(rollup_records[0]['ctr'], 0.5)
+        self.assertEqual(rollup_records[0]['campaign_name'], 'campaign')
+        self.assertNotIn('reach', rollup_records[0])
+        # Verify ratios with zero denominator are set to zero
+        self.assertEqual(rollup_records[1]['cpm'], 0)
+
+    @mock.patch("singer.write_state")
+    @mock.patch("singer.write_record")
+    def test_derived_streams_without_ad_insights(self, mock_write_record, mock_write_state):
+        """
+            Verify only the derived records are written when ad_insights is not selected
+        """
+        config = {"access_token": "mock_access_token", "start_date": "2021-01-01T00:00:00Z", "accounts": ["1234"]}
+        state = {}
+        client = TikTokClient(config["access_token"], [])
+        derived_streams = [
+            (CampaignInsights(client, config, state), MockCatalog('campaign_insights')),
+            (AdGroupInsights(client, config, state), MockCatalog('adgroup_insights'))
+        ]
+        stream = AdInsights(client, config, state, emit_records=False, derived_streams=derived_streams)
+        records = [get_record("11", "21", "1.5", "100", "3"), get_record("12", "21", "2.5", "300", "1"),
+                   get_record("13", "22", "1", "100", "0")]
+
+        stream.process_batch(MockCatalog('ad_insights'), records, "1234")
+
+        written_streams = [args[0] for args, _ in mock_write_record.call_args_list]
+        self.assertEqual(written_streams, ['campaign_insights', 'adgroup_insights', 'adgroup_insights'])
+        campaign_record = mock_write_record.call_args_list[0][0][1]
+        self.assertEqual(campaign_record['spend'], 5.0)
+        self.assertEqual(campaign_record['impressions'], 500)
+        self.assertEqual(campaign_record['advertiser_id'], "1234")
+        self.assertEqual(set(state['bookmarks']), {'campaign_insights', 'adgroup_insights'})
+
+    def test_start_date_of_derived_streams(self):
+        """
+            Verify the date windows start from the earliest bookmark of ad_insights and the derived streams
+        """
+        config = {"access_token": "mock_access_token", "start_date": "2021-01-01T00:00:00Z", "accounts": ["1234"]}
+        state = {"bookmarks": {"ad_insights": {"1234": "2021-05-01T00:00:00Z"},
+                               "campaign_insights": {"1234": "2021-03-01T00:00:00Z"}}}
+        client = TikTokClient(config["access_token"], [])
+        derived_streams = [(CampaignInsights(client, config, state), MockCatalog('campaign_insights'))]
+        stream = AdInsights(client, config, state, derived_streams=derived_streams)
+
+        self.assertEqual(stream.get_start_date('ad_insights', '1234').isoformat(), '2021-03-01T00:00:00+00:00')
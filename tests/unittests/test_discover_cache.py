@@ -0,0 +1,47 @@
+import unittest
+from unittest import mock
+from singer import metadata
+from tap_tiktok_ads import discover as discover_module
+from tap_tiktok_ads.discover import discover
+
+class TestDiscoverCache(unittest.TestCase):
+    """
+        Test cases to verify the catalog is built once per process while the schemas are unchanged
+    """
+
+    def setUp(self):
+        discover_module.CATALOG_CACHE.clear()
+
+    @mock.patch("tap_tiktok_ads.discover.get_schemas", wraps=discover_module.get_schemas)
+    def test_catalog_built_once(self, mock_get_schemas):
+        """
+            Verify the catalog is reused by the next discoveries
+        """
+        catalog = discover()
+        self.assertEqual(discover().to_dict(), catalog.to_dict())
+        self.assertEqual(mock_get_schemas.call_count, 1)
+        self.assertEqual(len(catalog.streams), 12)
+
+    def test_catalog_not_shared(self):
+        """
+            Verify the changes made to a discovered catalog are not returned by the next discoveries
+        """
+        catalog = discover()
+        stream = catalog.get_stream('campaigns')
+        mdata = metadata.to_map(stream.metadata)
+        metadata.write(mdata, (), 'selected', True)
+        stream.schema.properties.pop('campaign_id')
+
+        stream = discover().get_stream('campaigns')
+        self.assertNotIn('selected', metadata.to_map(stream.metadata)[()])
+        self.assertIn('campaign_id', stream.schema.properties)
+
+    @mock.patch("tap_tiktok_ads.discover.get_schemas", wraps=discover_module.get_schemas)
+    def test_schema_change(self, mock_get_schemas):
+        """
+            Verify the catalog is built again when the content of the schemas changes
+        """
+        catalog = discover()
+        with mock.patch("tap_tiktok_ads.discover.get_schemas_hash", return_value="changed"):
+            self.assertIsNot(discover(), catalog)
+        self.assertEqual(mock_get_schemas.call_count, 2)
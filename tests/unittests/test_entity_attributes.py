@@ -0,0 +1,96 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from tap_tiktok_ads.client import TikTokClient
+from tap_tiktok_ads.entity_cache import EntityCache
+from tap_tiktok_ads.streams import AdInsights, CampaignInsightsByProvince
+from helpers import get_response
+
+ENTITIES = {
+    "ads": [{"ad_id": "1", "ad_name": "ad", "ad_text": "text", "modify_time": "2021-02-01 00:00:00"}],
+    "adgroups": [{"adgroup_id": "2", "adgroup_name": "adgroup", "budget": 10.5, "modify_time": "2021-02-02 00:00:00"}],
+    "campaigns": [{"campaign_id": "3", "campaign_name": "campaign", "budget": 100, "modify_time": "2021-02-03 00:00:00"}]
+}
+
+class TestEntityCache(unittest.TestCase):
+    """
+        Test cases to verify the entities are requested once per run and persisted between runs
+    """
+
+    def test_requested_once(self):
+        """
+            Verify the entities are requested on first use and an unknown ID requests the new entities once
+        """
+        fetch_entities = mock.Mock(return_value=ENTITIES["ads"])
+        cache = EntityCache(fetch_entities, {"ads": "ad_id"})
+
+        self.assertEqual(cache.get_entity("1234", "ads", 1)["ad_name"], "ad")
+        self.assertEqual(cache.get_entity("1234", "ads", "1")["ad_name"], "ad")
+        self.assertIsNone(cache.get_entity("1234", "ads", "5"))
+        self.assertIsNone(cache.get_entity("1234", "ads", "6"))
+        self.assertEqual(fetch_entities.call_args_list, [mock.call("1234", "ads", None),
+                                                         mock.call("1234", "ads", "2021-02-01 00:00:00")])
+
+    def test_persisted(self):
+        """
+            Verify the next run loads the cached entities and requests the entities modified since the previous run
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "entity_cache.json")
+            cache = EntityCache(mock.Mock(return_value=ENTITIES["ads"]), {"ads": "ad_id"}, path)
+            cache.get_entities("1234", "ads")
+            cache.save()
+
+            fetch_entities = mock.Mock(return_value=[])
+            cache = EntityCache(fetch_entities, {"ads": "ad_id"}, path)
+            self.assertEqual(cache.get_entity("1234", "ads", "1")["ad_name"], "ad")
+            fetch_entities.assert_called_once_with("1234", "ads", "2021-02-01 00:00:00")
+
+class TestJoinEntityAttributes(unittest.TestCase):
+    """
+        Test cases to verify the entity attributes are joined to the report rows instead of being requested
+    """
+
+    config = {"access_token": "mock_access_token", "start_date": "2021-01-01T00:00:00Z", "accounts": ["1234"],
+              "join_entity_attributes": "true"}
+
+    def test_metrics_without_attributes(self):
+        """
+            Verify the joined attributes are not requested from the report API
+        """
+        stream = AdInsights(TikTokClient("mock_access_token", []), self.config)
+        metrics = json.loads(stream.params['metrics'])
+        self.assertNotIn('ad_name', metrics)
+        self.assertNotIn('campaign_name', metrics)
+        self.assertIn('adgroup_id', metrics)
+        self.assertIn('campaign_name', json.loads(AdInsights.params['metrics']))
+
+    def test_attributes_of_identified_entities(self):
+        """
+            Verify only the attributes of the entities identified in the rows are joined
+        """
+        stream = CampaignInsightsByProvince(TikTokClient("mock_access_token", []), self.config)
+        self.assertEqual(set(stream.joined_attributes), {'campaign_name', 'campaign_budget', 'objective_type', 'rf_campaign_type'})
+
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.get")
+    def test_join_attributes(self, mock_get):
+        """
+            Verify the attributes are added to the report rows from the ad, adgroup and campaign of the row
+        """
+        def get(path=None, headers=None, params=None):
+            entity_type = {"ad/get/": "ads", "adgroup/get/": "adgroups", "campaign/get/": "campaigns"}.get(path)
+            if entity_type:
+                return get_response([] if 'primary_status' in params.get('filtering', '') else ENTITIES[entity_type])
+            return get_response([{"metrics": {"adgroup_id": "2", "campaign_id": "3", "spend": "1.00"},
+                                  "dimensions": {"ad_id": "1", "stat_time_day": "2021-02-01 00:00:00"}}])
+        mock_get.side_effect = get
+        stream = AdInsights(TikTokClient("mock_access_token", []), self.config)
+
+        records = stream.get_all_pages(stream.path, {**stream.params, 'advertiser_id': "1234"})
+
+        metrics = records[0]['metrics']
+        self.assertEqual((metrics['ad_name'], metrics['adgroup_name'], metrics['campaign_name']), ("ad", "adgroup", "campaign"))
+        self.assertEqual((metrics['budget'], metrics['campaign_budget']), ("10.5", "100"))
+        self.assertIsNone(metrics['call_to_action'])
@@ -0,0 +1,120 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+from tap_tiktok_ads.client import TikTokClient
+from tap_tiktok_ads.entity_cache import EntityCache
+from tap_tiktok_ads.streams import Campaigns, AdInsights, ENTITY_ID_KEYS
+from helpers import get_response
+
+CAMPAIGNS = [{"campaign_id": "1", "modify_time": "2021-02-01 00:00:00"}]
+DELETED_CAMPAIGNS = [{"campaign_id": "2", "modify_time": "2021-02-02 00:00:00"}]
+
+def get(path=None, headers=None, params=None):
+    """
+        Returns the mocked response of the active or deleted campaigns
+    """
+    return get_response(DELETED_CAMPAIGNS if 'STATUS_DELETE' in params.get('filtering', '') else CAMPAIGNS)
+
+class TestEntityCacheTTL(unittest.TestCase):
+    """
+        Test cases to verify the entities kept in the file are used without request during the TTL
+    """
+
+    def test_fresh_within_ttl(self):
+        """
+            Verify the entities of the file are used as is within the TTL and refreshed afterwards
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "entity_cache.json")
+            cache = EntityCache(mock.Mock(return_value=CAMPAIGNS), ENTITY_ID_KEYS, path)
+            cache.get_entities("1234", "campaigns")
+            cache.save()
+
+            fetch_entities = mock.Mock(return_value=[])
+            cache = EntityCache(fetch_entities, ENTITY_ID_KEYS, path, ttl=3600)
+            self.assertEqual(list(cache.get_entities("1234", "campaigns")), ["1"])
+            self.assertFalse(fetch_entities.called)
+
+            with mock.patch("time.time", return_value=time.time() + 7200):
+                cache = EntityCache(fetch_entities, ENTITY_ID_KEYS, path, ttl=3600)
+                cache.get_entities("1234", "campaigns")
+            fetch_entities.assert_called_once_with("1234", "campaigns", "2021-02-01 00:00:00")
+
+    def test_current_entities_within_ttl(self):
+        """
+            Verify the entities kept within the TTL are refreshed once when the current entities are required
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "entity_cache.json")
+            cache = EntityCache(mock.Mock(return_value=CAMPAIGNS), ENTITY_ID_KEYS, path)
+            cache.get_entities("1234", "campaigns")
+            cache.save()
+
+            fetch_entities = mock.Mock(return_value=DELETED_CAMPAIGNS)
+            cache = EntityCache(fetch_entities, ENTITY_ID_KEYS, path, ttl=3600)
+            self.assertEqual(sorted(cache.get_entities("1234", "campaigns", current=True)), ["1", "2"])
+            cache.get_entities("1234", "campaigns", current=True)
+            fetch_entities.assert_called_once_with("1234", "campaigns", "2021-02-01 00:00:00")
+
+    @mock.patch("tap_tiktok_ads.entity_cache.write_json")
+    def test_saved_once(self, mock_write_json):
+        """
+            Verify the file is written once by `save` for all the entities added, and not written again without change
+        """
+        cache = EntityCache(mock.Mock(return_value=CAMPAIGNS), ENTITY_ID_KEYS, "entity_cache.json")
+        for advertiser_id in ("1234", "5678"):
+            cache.get_entities(advertiser_id, "campaigns")
+            cache.set_entities(advertiser_id, "campaigns", DELETED_CAMPAIGNS, time.time())
+        self.assertFalse(mock_write_json.called)
+
+        cache.save()
+        cache.save()
+        mock_write_json.assert_called_once_with("entity_cache.json", cache.entities)
+
+class TestSharedEntityCache(unittest.TestCase):
+    """
+        Test cases to verify the entities are shared by the streams of the run
+    """
+
+    config = {"access_token": "mock_access_token", "start_date": "2021-01-01T00:00:00Z", "accounts": ["1234"],
+              "include_deleted": "true"}
+
+    def get_stream(self, stream_class, entity_cache):
+        stream = stream_class(TikTokClient("mock_access_token", []), self.config, {})
+        stream.entity_cache = entity_cache
+        return stream
+
+    @mock.patch("tap_tiktok_ads.streams.Stream.process_batch")
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.get", side_effect=get)
+    def test_stream_populates_cache(self, mock_get, mock_process_batch):
+        """
+            Verify the entities synced by the stream are used by the other streams without request
+        """
+        entity_cache = Campaigns(TikTokClient("mock_access_token", []), self.config, {}).get_entity_cache()
+        self.get_stream(Campaigns, entity_cache).do_sync(mock.Mock(tap_stream_id="campaigns"))
+        self.assertEqual(mock_get.call_count, 2)
+
+        partition_ids = self.get_stream(AdInsights, entity_cache).get_entity_cache().get_entities("1234", "campaigns")
+        self.assertEqual(sorted(partition_ids), ["1", "2"])
+        self.assertEqual(partition_ids["2"]["current_status"], "DELETE")
+        self.assertEqual(mock_get.call_count, 2)
+
+    @mock.patch("tap_tiktok_ads.streams.Stream.process_batch")
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.get", side_effect=get)
+    def test_stream_uses_cache(self, mock_get, mock_process_batch):
+        """
+            Verify the stream uses the entities requested by another stream during the run
+        """
+        entity_cache = Campaigns(TikTokClient("mock_access_token", []), self.config, {}).get_entity_cache()
+        entity_cache.get_entities("1234", "campaigns")
+        self.assertEqual(mock_get.call_count, 2)
+
+        self.get_stream(Campaigns, entity_cache).do_sync(mock.Mock(tap_stream_id="campaigns"))
+
+        self.assertEqual(mock_get.call_count, 2)
+        records = mock_process_batch.call_args[0][1]
+        self.assertEqual([record["campaign_id"] for record in records], ["1", "2"])
+        # the cached entities are not transformed
+        self.assertIsNot(records[0], entity_cache.get_entities("1234", "campaigns")["1"])
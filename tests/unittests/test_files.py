@@ -0,0 +1,33 @@
+import json
+import os
+import tempfile
+import unittest
+from tap_tiktok_ads.files import write_json
+
+class TestWriteJson(unittest.TestCase):
+    """
+        Test cases to verify the JSON files are replaced at once
+    """
+
+    def test_write_json(self):
+        """
+            Verify the value replaces the content of the file
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "state.json")
+            write_json(path, {"bookmarks": {}})
+            write_json(path, {"bookmarks": {"ads": {}}})
+            with open(path, encoding="utf-8") as json_file:
+                self.assertEqual(json.load(json_file), {"bookmarks": {"ads": {}}})
+
+    def test_failed_write_keeps_file(self):
+        """
+            Verify the previous file is kept if the value cannot be written
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "state.json")
+            write_json(path, {"bookmarks": {}})
+            with self.assertRaises(TypeError):
+                write_json(path, {"bookmarks": object()})
+            with open(path, encoding="utf-8") as json_file:
+                self.assertEqual(json.load(json_file), {"bookmarks": {}})
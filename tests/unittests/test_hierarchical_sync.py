@@ -0,0 +1,124 @@
+import json
+import unittest
+from unittest import mock
+from datetime import datetime, timezone
+from tap_tiktok_ads.client import TikTokClient
+from tap_tiktok_ads.streams import Campaigns, AdGroups
+from helpers import get_response
+
+class TestHierarchicalSync(unittest.TestCase):
+    """
+        Test cases to verify the children are only requested for the enabled and changed parents
+    """
+
+    config = {"access_token": "mock_access_token", "start_date": "2021-01-01T00:00:00Z", "accounts": ["1234"],
+              "hierarchical_sync": "true"}
+
+    @mock.patch("singer.write_record")
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.get")
+    def test_campaigns_index(self, mock_get, mock_write_record):
+        """
+            Verify the synced campaigns are indexed as changed and the enabled campaigns are tracked
+        """
+        mock_get.return_value = get_response([
+            {"campaign_id": "1", "operation_status": "ENABLE", "create_time": "2021-02-01 00:00:00"},
+            {"campaign_id": "2", "operation_status": "DISABLE", "create_time": "2021-02-01 00:00:00"}
+        ])
+        state = {"hierarchy": {"campaigns": {"1234": {"enabled": ["2", "3"], "changed": []}}}}
+        stream = Campaigns(TikTokClient("mock_access_token", []), self.config, state)
+        catalog = mock.Mock(tap_stream_id='campaigns', metadata=[])
+        catalog.schema.to_dict.return_value = {"type": "object", "properties": {}}
+
+        stream.do_sync(catalog)
+
+        self.assertEqual(state["hierarchy"]["campaigns"]["1234"], {"enabled": ["1", "3"], "changed": ["1", "2"]})
+
+    @mock.patch("singer.write_record")
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.get")
+    def test_campaigns_index_without_adgroups(self, mock_get, mock_write_record):
+        """
+            Verify the changed campaigns are not indexed if the adgroups are not selected and the next sync
+            of the adgroups is a full scan
+        """
+        mock_get.return_value = get_response([
+            {"campaign_id": "1", "operation_status": "ENABLE", "create_time": "2021-02-01 00:00:00"}
+        ])
+        state = {"hierarchy": {"campaigns": {"1234": {"enabled": [], "changed": ["2"]}}},
+                 "hierarchy_full_scans": {"adgroups": {"1234": "2021-03-01T00:00:00.000000Z"}}}
+        stream = Campaigns(TikTokClient("mock_access_token", []), self.config, state)
+        stream.selected_stream_ids = ["campaigns"]
+        catalog = mock.Mock(tap_stream_id='campaigns', metadata=[])
+        catalog.schema.to_dict.return_value = {"type": "object", "properties": {}}
+
+        stream.do_sync(catalog)
+
+        self.assertEqual(state["hierarchy"]["campaigns"]["1234"], {"enabled": ["1"], "changed": []})
+        self.assertEqual(state["hierarchy_full_scans"]["adgroups"], {})
+
+    @mock.patch("tap_tiktok_ads.streams.Stream.process_batch")
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.get", return_value=get_response([]))
+    def test_adgroups_of_changed_campaigns(self, mock_get, mock_process_batch):
+        """
+            Verify the adgroups are requested for the enabled and changed campaigns and the changes are consumed
+        """
+        state = {"hierarchy": {"campaigns": {"1234": {"enabled": ["1", "3"], "changed": ["1", "2"]}}},
+                 "hierarchy_full_scans": {"adgroups": {"1234": "2021-03-01T00:00:00.000000Z"}}}
+        stream = AdGroups(TikTokClient("mock_access_token", []), self.config, state)
+
+        with mock.patch("tap_tiktok_ads.streams.now", return_value=datetime(2021, 3, 3, tzinfo=timezone.utc)):
+            stream.do_sync(stream)
+
+        self.assertEqual(json.loads(mock_get.call_args[1]['params']['filtering']), {"campaign_ids": ["1", "2", "3"]})
+        self.assertEqual(state["hierarchy"]["campaigns"]["1234"], {"enabled": ["1", "3"], "changed": []})
+        self.assertEqual(state["hierarchy_full_scans"]["adgroups"]["1234"], "2021-03-01T00:00:00.000000Z")
+
+    @mock.patch("tap_tiktok_ads.streams.Stream.process_batch")
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.get", return_value=get_response([]))
+    def test_adgroups_full_scan(self, mock_get, mock_process_batch):
+        """
+            Verify all the adgroups modified since the previous full scan are requested once the full scan is due
+        """
+        config = {**self.config, "server_side_filtering": "true", "hierarchy_full_scan_days": "7"}
+        state = {"hierarchy": {"campaigns": {"1234": {"enabled": ["1"], "changed": ["2"]}}},
+                 "hierarchy_full_scans": {"adgroups": {"1234": "2021-03-01T00:00:00.000000Z"}},
+                 "bookmarks": {"adgroups": {"1234": "2021-03-07T00:00:00.000000Z"}}}
+        stream = AdGroups(TikTokClient("mock_access_token", []), config, state)
+
+        with mock.patch("tap_tiktok_ads.streams.now", return_value=datetime(2021, 3, 8, tzinfo=timezone.utc)):
+            stream.do_sync(stream)
+
+        self.assertEqual(json.loads(mock_get.call_args[1]['params']['filtering']),
+                         {"modified_after": "2021-03-01 00:00:00"})
+        self.assertEqual(state["hierarchy"]["campaigns"]["1234"], {"enabled": ["1"], "changed": []})
+        self.assertEqual(state["hierarchy_full_scans"]["adgroups"]["1234"], "2021-03-08T00:00:00.000000Z")
+        self.assertEqual(stream.full_scan_since, {})
+
+    @mock.patch("tap_tiktok_ads.streams.Stream.process_batch")
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.get", return_value=get_response([]))
+    def test_adgroups_without_index(self, mock_get, mock_process_batch):
+        """
+            Verify all the adgroups are requested if the campaigns of the advertiser are not indexed yet
+        """
+        stream = AdGroups(TikTokClient("mock_access_token", []), self.config, {})
+
+        stream.do_sync(stream)
+
+        self.assertNotIn('filtering', mock_get.call_args[1]['params'])
+
+    @mock.patch("singer.write_record")
+    def test_full_scan_bookmark_not_moved_back(self, mock_write_record):
+        """
+            Verify the adgroups modified before the bookmark are written by the full scan without moving the bookmark back
+        """
+        state = {"bookmarks": {"adgroups": {"1234": "2021-03-07T00:00:00.000000Z"}}}
+        stream = AdGroups(TikTokClient("mock_access_token", []), self.config, state)
+        stream.full_scan_since["1234"] = "2021-03-01T00:00:00.000000Z"
+        catalog = mock.Mock(tap_stream_id='adgroups', metadata=[])
+        catalog.schema.to_dict.return_value = {"type": "object", "properties": {
+            "modify_time": {"type": ["null", "string"], "format": "date-time"}}}
+
+        stream.process_batch(catalog, [{"adgroup_id": "1", "modify_time": "2021-03-02 00:00:00"},
+                                       {"adgroup_id": "2", "modify_time": "2021-02-01 00:00:00"}], "1234")
+
+        self.assertEqual(mock_write_record.call_count, 1)
+        self.assertEqual(state["bookmarks"]["adgroups"]["1234"], "2021-03-07T00:00:00.000000Z")
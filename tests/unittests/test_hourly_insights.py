@@ -0,0 +1,73 @@
+import unittest
+from unittest import mock
+from dateutil.parser import parse
+from tap_tiktok_ads.client import TikTokClient
+from tap_tiktok_ads.streams import get_date_batches, AdInsightsHourly
+
+def get_response(day):
+    """
+        Returns mocked response with 2 hourly records of the day
+    """
+    return {
+        "message": "OK",
+        "code": 0,
+        "data": {
+            "page_info": {
+                "total_number": 2
+            },
+            "list": [
+                {"metrics": {}, "dimensions": {"ad_id": "1", "stat_time_hour": day + " 01:00:00"}},
+                {"metrics": {}, "dimensions": {"ad_id": "1", "stat_time_hour": day + " 00:00:00"}}
+            ]
+        }
+    }
+
+class TestHourlyInsights(unittest.TestCase):
+    """
+        Test cases to verify the hourly insights are synced in concurrent daily windows
+    """
+
+    def test_daily_date_batches(self):
+        """
+            Verify the date batches of a single day, including the current incomplete day
+        """
+        date_batches = get_date_batches(parse('2021-01-01T00:00:00Z'), parse('2021-01-02T10:00:00Z'), window_days=1)
+        expected_batches = [
+            {'start_date': parse('2021-01-01T00:00:00Z'), 'end_date': parse('2021-01-01T00:00:00Z')},
+            {'start_date': parse('2021-01-02T00:00:00Z'), 'end_date': parse('2021-01-02T00:00:00Z')}
+        ]
+        self.assertEqual(date_batches, expected_batches)
+
+    def test_start_date_from_bookmark(self):
+        """
+            Verify the sync restarts from the beginning of the day of the bookmarked hour
+        """
+        config = {"access_token": "mock_access_token", "start_date": "2021-01-01T00:00:00Z", "accounts": ["1234"]}
+        state = {"bookmarks": {"ad_insights_hourly": {"1234": "2021-01-05T13:00:00.000000Z"}}}
+        stream = AdInsightsHourly(TikTokClient("mock_access_token", []), config, state)
+        self.assertEqual(stream.get_start_date("ad_insights_hourly", "1234"), parse('2021-01-05T00:00:00Z'))
+
+    @mock.patch("singer.write_state")
+    @mock.patch("singer.write_record")
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.get")
+    def test_concurrent_daily_windows(self, mock_get, mock_write_record, mock_write_state):
+        """
+            Verify each day is requested separately and the records are written in order with the bookmark per hour
+        """
+        mock_get.side_effect = lambda path=None, headers=None, params=None: get_response(params['start_date'])
+        config = {"access_token": "mock_access_token", "start_date": "2021-01-01T00:00:00Z",
+                  "end_date": "2021-01-03T00:00:00Z", "accounts": ["1234"], "max_workers": 3}
+        state = {}
+        stream = AdInsightsHourly(TikTokClient("mock_access_token", []), config, state)
+        catalog = mock.Mock(tap_stream_id='ad_insights_hourly', metadata=[])
+        catalog.schema.to_dict.return_value = {"type": "object", "properties": {"ad_id": {"type": "string"},
+                                                                                "stat_time_hour": {"type": "string"}}}
+
+        stream.do_sync(catalog)
+
+        requested_days = sorted((call[1]['params']['start_date'], call[1]['params']['end_date']) for call in mock_get.call_args_list)
+        self.assertEqual(requested_days, [('2021-01-01', '2021-01-01'), ('2021-01-02', '2021-01-02')])
+        written_hours = [call[0][1]['stat_time_hour'] for call in mock_write_record.call_args_list]
+        self.assertEqual(written_hours, sorted(written_hours))
+        self.assertEqual(state['bookmarks']['ad_insights_hourly']['1234'], '2021-01-02 01:00:00')
+        self.assertIsNone(stream.scheduler)
@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+# Baseline of the imports of `tap_tiktok_ads.discover` below the package, which only imports singer: about 5ms
+# with the bytecode compiled. The budget leaves room for slower machines.
+IMPORT_TIME_BUDGET_US = 15000
+# number of measures of the import time, the fastest is kept
+IMPORT_TIME_RUNS = 3
+
+def get_import_times(statement, pycache_prefix=None):
+    """
+        Returns the self and cumulative import times in microseconds of each module imported by the
+        statement in a new interpreter, with the bytecode kept under `pycache_prefix` if set
+    """
+    command = [sys.executable, "-X", "importtime"]
+    env = None
+    if pycache_prefix:
+        command += ["-X", "pycache_prefix=" + pycache_prefix]
+        env = {**os.environ, "PYTHONDONTWRITEBYTECODE": ""}
+    output = subprocess.run(command + ["-c", statement], capture_output=True, text=True, check=True, env=env).stderr
+    import_times = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_time, cumulative_time, module = line[len("import time:"):].split("|")
+        import_times[module.strip()] = (int(self_time), int(cumulative_time))
+    return import_times
+
+class TestImportTime(unittest.TestCase):
+    """
+        Test cases to verify the modules of the tap are imported only when used
+    """
+
+    def test_package_import(self):
+        """
+            Verify importing the package does not import the modules of the tap
+        """
+        modules = [module for module in get_import_times("import tap_tiktok_ads") if module.startswith("tap_tiktok_ads.")]
+        self.assertEqual(modules, [])
+
+    def test_discovery_import(self):
+        """
+            Verify the discovery does not import the sync and stays within the import time budget. The budget
+            covers all the modules imported by the discovery, including the third-party ones, except singer
+            imported with the package. The bytecode is compiled by a first import, as for an installed package.
+        """
+        with tempfile.TemporaryDirectory() as pycache_prefix:
+            get_import_times("import tap_tiktok_ads.discover", pycache_prefix)
+            runs = [get_import_times("import tap_tiktok_ads.discover", pycache_prefix) for _ in range(IMPORT_TIME_RUNS)]
+        for module in ("tap_tiktok_ads.sync", "tap_tiktok_ads.http2", "tap_tiktok_ads.verification_cache"):
+            self.assertNotIn(module, runs[0])
+        import_time = min(import_times["tap_tiktok_ads.discover"][1] - import_times["tap_tiktok_ads"][1]
+                          for import_times in runs)
+        self.assertLess(import_time, IMPORT_TIME_BUDGET_US)
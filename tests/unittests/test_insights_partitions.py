@@ -0,0 +1,125 @@
+import hashlib
+import json
+import unittest
+from unittest import mock
+from tap_tiktok_ads.client import TikTokClient
+from tap_tiktok_ads.streams import AdInsights, MAX_PARTITION_SIZE
+from helpers import get_response
+
+def mocked_get(path=None, headers=None, params=None):
+    """
+        Returns the ad IDs for `ad/get/` and one record per ad of the partition for the report API
+    """
+    if path == "ad/get/":
+        if 'filtering' in params:
+            return get_response([{"ad_id": "4"}])
+        return get_response([{"ad_id": "1"}, {"ad_id": "3"}, {"ad_id": "2"}])
+    ad_ids = json.loads(json.loads(params['filtering'])[0]['filter_value'])
+    return get_response([{"metrics": {}, "dimensions": {"ad_id": ad_id, "stat_time_day": "2021-01-0{} 00:00:00".format(ad_id)}}
+                         for ad_id in ad_ids])
+
+class TestInsightsPartitions(unittest.TestCase):
+    """
+        Test cases to verify the date windows of insights are partitioned by chunks of ad IDs
+    """
+
+    config = {"access_token": "mock_access_token", "start_date": "2021-01-01T00:00:00Z", "end_date": "2021-01-10T00:00:00Z",
+              "accounts": ["1234"], "insights_partition_size": 2, "max_workers": 2}
+
+    def test_partition_size_limit(self):
+        """
+            Verify the partition size is limited to the maximum IDs supported by the API
+        """
+        stream = AdInsights(TikTokClient("mock_access_token", []), {**self.config, "insights_partition_size": "1000"}, {})
+        self.assertEqual(stream.partition_size, MAX_PARTITION_SIZE)
+
+    @mock.patch("tap_tiktok_ads.streams.Stream.process_batch", return_value=None)
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.get", side_effect=mocked_get)
+    def test_partitioned_window(self, mock_get, mock_process_batch):
+        """
+            Verify each partition is requested with the `IN` filter of its ad IDs and the checkpoint is removed
+            once the window is synced
+        """
+        state = {}
+        stream = AdInsights(TikTokClient("mock_access_token", []), self.config, state)
+
+        stream.do_sync(stream)
+
+        filter_values = sorted(json.loads(call[1]['params']['filtering'])[0]['filter_value']
+                               for call in mock_get.call_args_list if call[1]['path'] == stream.path)
+        self.assertEqual(filter_values, ['["1", "2"]', '["3", "4"]'])
+        for call in mock_process_batch.call_args_list:
+            self.assertEqual(call[1], {'write_bookmarks': False})
+        self.assertEqual(state['partition_checkpoints'], {'ad_insights': {}})
+
+    @mock.patch("tap_tiktok_ads.streams.Stream.process_batch", return_value=None)
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.get")
+    def test_window_without_ids(self, mock_get, mock_process_batch):
+        """
+            Verify the date window of an advertiser without known ad IDs is requested without partitions
+        """
+        mock_get.side_effect = lambda path=None, headers=None, params=None: get_response(
+            [] if path == "ad/get/" else [{"metrics": {}, "dimensions": {"ad_id": "9", "stat_time_day": "2021-01-02 00:00:00"}}])
+        state = {}
+        stream = AdInsights(TikTokClient("mock_access_token", []), self.config, state)
+
+        stream.do_sync(stream)
+
+        report_calls = [call for call in mock_get.call_args_list if call[1]['path'] == stream.path]
+        self.assertEqual(len(report_calls), 1)
+        self.assertNotIn('filtering', report_calls[0][1]['params'])
+        self.assertEqual(len(mock_process_batch.call_args[0][1]), 1)
+        self.assertNotIn('partition_checkpoints', state)
+
+    @mock.patch("singer.write_record")
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.get", side_effect=mocked_get)
+    def test_resume_from_checkpoint(self, mock_get, mock_write_record):
+        """
+            Verify the partitions synced by the previous run are skipped and the bookmark is written once all
+            the partitions are synced
+        """
+        stream = AdInsights(TikTokClient("mock_access_token", []), self.config, {})
+        checkpoint = {
+            'start_date': '2021-01-01',
+            'end_date': '2021-01-10',
+            'partitions_hash': None,
+            'completed_partitions': [1],
+            'bookmark': '2021-01-04T00:00:00.000000Z'
+        }
+        stream.state = {"partition_checkpoints": {"ad_insights": {"1234": checkpoint}}}
+        stream.params['start_date'] = '2021-01-01'
+        stream.params['end_date'] = '2021-01-10'
+        partition_ids = ["1", "2", "3", "4"]
+        checkpoint['partitions_hash'] = hashlib.sha1(json.dumps(partition_ids).encode('utf-8')).hexdigest()
+        catalog = mock.Mock(tap_stream_id='ad_insights', metadata=[])
+        catalog.schema.to_dict.return_value = {"type": "object", "properties": {"ad_id": {"type": "string"}, "stat_time_day": {"type": "string"}}}
+
+        stream.sync_partitions(catalog, "1234", partition_ids)
+
+        self.assertEqual([call[0][1]['ad_id'] for call in mock_write_record.call_args_list], ["1", "2"])
+        self.assertEqual(stream.state['bookmarks']['ad_insights']['1234'], '2021-01-04T00:00:00.000000Z')
+        self.assertEqual(stream.state['partition_checkpoints']['ad_insights'], {})
+
+    @mock.patch("tap_tiktok_ads.streams.Stream.process_batch", return_value=None)
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.get", side_effect=mocked_get)
+    def test_resume_second_window(self, mock_get, mock_process_batch):
+        """
+            Verify a run stopped in the second date window resumes it from its checkpoint, although the
+            bookmark is the last day with records of the first window
+        """
+        config = {**self.config, "end_date": "2021-03-10T00:00:00Z"}
+        partitions_hash = hashlib.sha1(json.dumps(["1", "2", "3", "4"]).encode('utf-8')).hexdigest()
+        state = {
+            "bookmarks": {"ad_insights": {"1234": "2021-01-30T00:00:00.000000Z"}},
+            "partition_checkpoints": {"ad_insights": {"1234": {'start_date': '2021-01-31', 'end_date': '2021-03-01',
+                                                               'partitions_hash': partitions_hash,
+                                                               'completed_partitions': [0], 'bookmark': None}}}
+        }
+        stream = AdInsights(TikTokClient("mock_access_token", []), config, state)
+
+        stream.do_sync(stream)
+
+        requests = [(call[1]['params']['start_date'], json.loads(call[1]['params']['filtering'])[0]['filter_value'])
+                    for call in mock_get.call_args_list if call[1]['path'] == stream.path]
+        self.assertEqual(sorted(requests), [('2021-01-31', '["3", "4"]'),
+                                            ('2021-03-02', '["1", "2"]'), ('2021-03-02', '["3", "4"]')])
@@ -0,0 +1,133 @@
+import unittest
+from unittest import mock
+from dateutil.parser import parse
+from tap_tiktok_ads.client import TikTokClient
+from tap_tiktok_ads.streams import get_active_date_range, prune_date_batches, get_date_batches, AdInsights
+from helpers import get_response
+
+class TestInsightsPruning(unittest.TestCase):
+    """
+        Test cases to verify the insights date windows are pruned with the active date range of the ads
+    """
+
+    def test_active_date_range_with_enabled_ad(self):
+        """
+            Verify the active date range is open ended if any of the ads is enabled
+        """
+        records = [
+            {"create_time": "2021-03-05 13:52:31", "modify_time": "2021-03-06 13:52:31", "operation_status": "ENABLE"},
+            {"create_time": "2021-02-05 13:52:31", "modify_time": "2021-02-06 13:52:31", "operation_status": "DISABLE"}
+        ]
+        active_range = get_active_date_range(records)
+        self.assertEqual(active_range, {'start_date': parse('2021-02-04T13:52:31Z'), 'end_date': None})
+
+    def test_active_date_range_with_disabled_ads(self):
+        """
+            Verify the active date range ends at the last modification if all the ads are disabled or deleted
+        """
+        records = [
+            {"create_time": "2021-03-05 13:52:31", "modify_time": "2021-04-06 13:52:31", "operation_status": "DISABLE"},
+            {"create_time": "2021-02-05 13:52:31", "modify_time": "2021-05-06 13:52:31", "operation_status": "ENABLE",
+             "current_status": "DELETE"}
+        ]
+        active_range = get_active_date_range(records)
+        self.assertEqual(active_range, {'start_date': parse('2021-02-04T13:52:31Z'), 'end_date': parse('2021-05-07T13:52:31Z')})
+
+    def test_active_date_range_without_ads(self):
+        """
+            Verify no active date range is returned if the advertiser has no ads
+        """
+        self.assertIsNone(get_active_date_range([]))
+
+    def test_prune_date_batches(self):
+        """
+            Verify the date batches outside the active date range are dropped and the others are clipped
+        """
+        date_batches = get_date_batches(parse('2021-01-01T00:00:00Z'), parse('2021-06-01T00:00:00Z'))
+        active_range = {'start_date': parse('2021-02-10T00:00:00Z'), 'end_date': parse('2021-03-10T00:00:00Z')}
+        expected_batches = [
+            {'start_date': parse('2021-02-10T00:00:00Z'), 'end_date': parse('2021-03-01T00:00:00Z')},
+            {'start_date': parse('2021-03-02T00:00:00Z'), 'end_date': parse('2021-03-10T00:00:00Z')}
+        ]
+        self.assertEqual(prune_date_batches(date_batches, active_range), expected_batches)
+
+    def test_prune_date_batches_without_active_range(self):
+        """
+            Verify all the date batches are dropped if the advertiser has no ads
+        """
+        date_batches = get_date_batches(parse('2021-01-01T00:00:00Z'), parse('2021-06-01T00:00:00Z'))
+        self.assertEqual(prune_date_batches(date_batches, None), [])
+
+    @mock.patch("tap_tiktok_ads.streams.now", return_value=parse('2021-04-01T00:00:00Z'))
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.get")
+    def test_active_date_range_merged_with_state(self, mock_get, mock_now):
+        """
+            Verify the start of the active date range saved in the state is kept when older ads are purged,
+            and the open range is saved with the time it was seen open
+        """
+        mock_get.side_effect = [
+            get_response([{"ad_id": "1", "create_time": "2021-03-05 00:00:00", "modify_time": "2021-03-05 00:00:00", "operation_status": "ENABLE"}]),
+            get_response([])
+        ]
+        config = {"access_token": "mock_access_token", "start_date": "2021-01-01T00:00:00Z", "accounts": ["1234"]}
+        state = {"active_date_ranges": {"1234": {"start_date": "2021-01-15T00:00:00.000000Z", "end_date": None}}}
+        stream = AdInsights(TikTokClient(config["access_token"], []), config, state)
+
+        active_range = stream.get_active_date_range("1234")
+
+        self.assertEqual(active_range, {'start_date': parse('2021-01-15T00:00:00Z'), 'end_date': None})
+        self.assertEqual(state["active_date_ranges"]["1234"], {"start_date": "2021-01-15T00:00:00.000000Z", "end_date": None,
+                                                              "open_at": "2021-04-01T00:00:00.000000Z"})
+
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.get")
+    def test_active_date_range_end_merged_with_state(self, mock_get):
+        """
+            Verify the end of the active date range saved in the state is kept when the later ads are purged
+        """
+        disabled_ad = {"ad_id": "1", "create_time": "2021-02-01 00:00:00", "modify_time": "2021-03-10 00:00:00", "operation_status": "DISABLE"}
+        mock_get.side_effect = [get_response([disabled_ad]), get_response([])]
+        config = {"access_token": "mock_access_token", "start_date": "2021-01-01T00:00:00Z", "accounts": ["1234"]}
+        state = {"active_date_ranges": {"1234": {"start_date": "2021-01-15T00:00:00.000000Z", "end_date": "2021-05-01T00:00:00.000000Z"}}}
+        stream = AdInsights(TikTokClient(config["access_token"], []), config, state)
+
+        self.assertEqual(stream.get_active_date_range("1234"),
+                         {'start_date': parse('2021-01-15T00:00:00Z'), 'end_date': parse('2021-05-01T00:00:00Z')})
+
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.get")
+    def test_open_range_closed(self, mock_get):
+        """
+            Verify an open range saved in the state ends once all the ads stopped, at the latest of the
+            last modification of the ads and the time the range was seen open
+        """
+        disabled_ad = {"ad_id": "1", "create_time": "2021-02-01 00:00:00", "modify_time": "2021-02-10 00:00:00", "operation_status": "DISABLE"}
+        mock_get.side_effect = [get_response([disabled_ad]), get_response([])] * 2
+        config = {"access_token": "mock_access_token", "start_date": "2021-01-01T00:00:00Z", "accounts": ["1234"]}
+
+        state = {"active_date_ranges": {"1234": {"start_date": "2021-01-15T00:00:00.000000Z", "end_date": None,
+                                                 "open_at": "2021-01-20T00:00:00.000000Z"}}}
+        stream = AdInsights(TikTokClient(config["access_token"], []), config, state)
+        self.assertEqual(stream.get_active_date_range("1234")['end_date'], parse('2021-02-11T00:00:00Z'))
+        self.assertEqual(state["active_date_ranges"]["1234"], {"start_date": "2021-01-15T00:00:00.000000Z",
+                                                              "end_date": "2021-02-11T00:00:00.000000Z"})
+
+        state = {"active_date_ranges": {"1234": {"start_date": "2021-01-15T00:00:00.000000Z", "end_date": None,
+                                                 "open_at": "2021-03-01T00:00:00.000000Z"}}}
+        stream = AdInsights(TikTokClient(config["access_token"], []), config, state)
+        self.assertEqual(stream.get_active_date_range("1234")['end_date'], parse('2021-03-02T00:00:00Z'))
+
+    @mock.patch("tap_tiktok_ads.streams.Stream.sync_pages")
+    @mock.patch("tap_tiktok_ads.streams.Insights.get_active_date_range")
+    def test_do_sync_skips_inactive_windows(self, mock_active_range, mock_sync_pages):
+        """
+            Verify only the windows overlapping the active date range are requested
+        """
+        mock_active_range.return_value = {'start_date': parse('2021-05-01T00:00:00Z'), 'end_date': parse('2021-05-03T00:00:00Z')}
+        config = {"access_token": "mock_access_token", "start_date": "2021-01-01T00:00:00Z",
+                  "end_date": "2021-06-01T00:00:00Z", "accounts": ["1234"], "prune_insights_windows": "true"}
+        stream = AdInsights(TikTokClient(config["access_token"], []), config, {})
+
+        stream.do_sync(stream)
+
+        self.assertEqual(mock_sync_pages.call_count, 1)
+        self.assertEqual(stream.params['start_date'], '2021-05-01')
+        self.assertEqual(stream.params['end_date'], '2021-05-03')
@@ -0,0 +1,128 @@
+import unittest
+from unittest import mock
+from tap_tiktok_ads.client import TikTokClient
+from tap_tiktok_ads.streams import Campaigns, AdInsights
+from helpers import get_page_response
+
+class TestPageCheckpoints(unittest.TestCase):
+    """
+        Test cases to verify the scans are resumed from the page following the checkpoint
+    """
+
+    config = {"access_token": "mock_access_token", "start_date": "2021-01-01T00:00:00Z", "accounts": ["1234"],
+              "page_checkpoints": "true", "page_size": 1}
+
+    def get_stream(self, state):
+        stream = Campaigns(TikTokClient("mock_access_token", []), self.config, state)
+        stream.params['advertiser_id'] = "1234"
+        catalog = mock.Mock(tap_stream_id='campaigns', metadata=[])
+        catalog.schema.to_dict.return_value = {"type": "object", "properties": {"campaign_id": {"type": "string"},
+                                                                               "modify_time": {"type": "string", "format": "date-time"}}}
+        return stream, catalog
+
+    def get_checkpoint(self, stream, page, total_number):
+        """
+            Returns the checkpoint of the scan after the page
+        """
+        with mock.patch("tap_tiktok_ads.client.TikTokClient.get", side_effect=Exception("interrupted")) as mock_get:
+            mock_get.side_effect = [get_page_response(p, total_number) for p in range(1, page + 1)] + [Exception("interrupted")]
+            stream_obj, catalog = stream
+            with self.assertRaises(Exception):
+                stream_obj.sync_pages(catalog)
+        return stream_obj.state['page_checkpoints']['campaigns']['1234']
+
+    @mock.patch("singer.write_record")
+    def test_resume_from_next_page(self, mock_write_record):
+        """
+            Verify the interrupted scan resumes from the page after the last completed page
+        """
+        state = {}
+        checkpoint = self.get_checkpoint(self.get_stream(state), 2, 3)
+        self.assertEqual((checkpoint['page'], checkpoint['total_number']), (2, 3))
+        # Verify the bookmark is not written before the scan is complete
+        self.assertNotIn('bookmarks', state)
+
+        stream, catalog = self.get_stream(state)
+        with mock.patch("tap_tiktok_ads.client.TikTokClient.get", return_value=get_page_response(3, 3)) as mock_get:
+            stream.sync_pages(catalog)
+
+        self.assertEqual([call[1]['params']['page'] for call in mock_get.call_args_list], [3])
+        self.assertEqual(state['page_checkpoints']['campaigns'], {})
+        self.assertEqual(state['bookmarks']['campaigns']['1234'], '2021-02-03T00:00:00.000000Z')
+
+    @mock.patch("singer.write_record")
+    def test_restart_if_total_changed(self, mock_write_record):
+        """
+            Verify the scan restarts from the first page if the total number of records changed
+        """
+        state = {}
+        self.get_checkpoint(self.get_stream(state), 2, 3)
+
+        stream, catalog = self.get_stream(state)
+        with mock.patch("tap_tiktok_ads.client.TikTokClient.get",
+                        side_effect=lambda path=None, headers=None, params=None: get_page_response(params['page'], 2)) as mock_get:
+            stream.sync_pages(catalog)
+
+        self.assertEqual([call[1]['params']['page'] for call in mock_get.call_args_list], [3, 1, 2])
+        self.assertEqual(state['page_checkpoints']['campaigns'], {})
+
+class TestInsightsPageCheckpoints(unittest.TestCase):
+    """
+        Test cases to verify the insights date window interrupted by a run is resumed from its page checkpoint
+    """
+
+    config = {"access_token": "mock_access_token", "start_date": "2021-01-01T00:00:00Z", "end_date": "2021-03-01T00:00:00Z",
+              "accounts": ["1234"], "page_checkpoints": "true", "page_size": 1}
+
+    @staticmethod
+    def get_insights_response(params):
+        """
+            Returns mocked response of the page with one record per page, on the last day of the window
+        """
+        return {
+            "message": "OK",
+            "code": 0,
+            "data": {
+                "page_info": {
+                    "total_number": 2
+                },
+                "list": [{"metrics": {}, "dimensions": {"ad_id": str(params['page']),
+                                                        "stat_time_day": params['end_date'] + " 00:00:00"}}]
+            }
+        }
+
+    def run_sync(self, state, interrupted_page=None):
+        """
+            Sync the stream, the run is interrupted at the page (start_date, page) if provided. Returns the
+            requested pages.
+        """
+        pages = []
+        def get(path=None, headers=None, params=None):
+            if path == "ad/get/":
+                return {"message": "OK", "code": 0, "data": {"page_info": {"total_number": 0}, "list": []}}
+            if (params['start_date'], params['page']) == interrupted_page:
+                raise Exception("interrupted")
+            pages.append((params['start_date'], params['page']))
+            return self.get_insights_response(params)
+
+        stream = AdInsights(TikTokClient("mock_access_token", []), self.config, state)
+        catalog = mock.Mock(tap_stream_id='ad_insights', metadata=[])
+        catalog.schema.to_dict.return_value = {"type": "object", "properties": {"ad_id": {"type": "string"},
+                                                                               "stat_time_day": {"type": "string", "format": "date-time"}}}
+        with mock.patch("tap_tiktok_ads.client.TikTokClient.get", side_effect=get):
+            stream.do_sync(catalog)
+        return pages
+
+    @mock.patch("singer.write_record")
+    def test_resume_second_window(self, mock_write_record):
+        """
+            Verify a run stopped in the second date window resumes it from the next page, although the
+            bookmark is the last day with records of the first window
+        """
+        state = {}
+        with self.assertRaises(Exception):
+            self.run_sync(state, interrupted_page=('2021-01-31', 2))
+        self.assertEqual(state['bookmarks']['ad_insights']['1234'], '2021-01-30T00:00:00.000000Z')
+
+        self.assertEqual(self.run_sync(state), [('2021-01-31', 2)])
+        self.assertEqual(state['bookmarks']['ad_insights']['1234'], '2021-03-01T00:00:00.000000Z')
@@ -0,0 +1,67 @@
+import threading
+import unittest
+from unittest import mock
+from tap_tiktok_ads.client import TikTokClient
+from tap_tiktok_ads.streams import Campaigns
+from helpers import get_page_response
+
+class TestPrefetchPages(unittest.TestCase):
+    """
+        Test cases to verify the next pages are fetched while the current page is written
+    """
+
+    config = {"access_token": "mock_access_token", "start_date": "2021-01-01T00:00:00Z", "accounts": ["1234"],
+              "page_size": 1, "prefetch_pages": 1}
+
+    def get_stream(self, state):
+        stream = Campaigns(TikTokClient("mock_access_token", []), self.config, state)
+        stream.params['advertiser_id'] = "1234"
+        catalog = mock.Mock(tap_stream_id='campaigns', metadata=[])
+        catalog.schema.to_dict.return_value = {"type": "object", "properties": {"campaign_id": {"type": "string"},
+                                                                               "modify_time": {"type": "string", "format": "date-time"}}}
+        return stream, catalog
+
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.get")
+    def test_fetch_while_writing(self, mock_get):
+        """
+            Verify the second page is fetched by the background thread while the first page is written
+        """
+        second_page_fetched = threading.Event()
+
+        def get(path=None, headers=None, params=None):
+            if params['page'] == 2:
+                second_page_fetched.set()
+            return get_page_response(params['page'], 3)
+        mock_get.side_effect = get
+
+        written_pages = []
+        def write_record(stream_id, record):
+            if record['campaign_id'] == '1':
+                # the first page is written once the next page is prefetched
+                self.assertTrue(second_page_fetched.wait(5))
+            written_pages.append(record['campaign_id'])
+
+        state = {}
+        stream, catalog = self.get_stream(state)
+        with mock.patch("singer.write_record", side_effect=write_record):
+            stream.sync_pages(catalog)
+
+        self.assertEqual(written_pages, ['1', '2', '3'])
+        self.assertEqual(state['bookmarks']['campaigns']['1234'], '2021-02-03T00:00:00.000000Z')
+        # the pages are not checkpointed without `page_checkpoints`
+        self.assertNotIn('page_checkpoints', state)
+
+    @mock.patch("singer.write_record")
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.get")
+    def test_fetch_error(self, mock_get, mock_write_record):
+        """
+            Verify an error raised by the background thread is raised by the sync after the fetched pages are written
+        """
+        mock_get.side_effect = [get_page_response(1, 3), Exception("fetch error")]
+        stream, catalog = self.get_stream({})
+
+        with self.assertRaises(Exception) as e:
+            stream.sync_pages(catalog)
+
+        self.assertEqual(str(e.exception), "fetch error")
+        self.assertEqual(mock_write_record.call_count, 1)
@@ -0,0 +1,118 @@
+import unittest
+from unittest import mock
+from tap_tiktok_ads.buffer import RecordBuffer, CompactRecords
+from tap_tiktok_ads.client import TikTokClient
+from tap_tiktok_ads.streams import Campaigns
+
+class TestRecordBuffer(unittest.TestCase):
+    """
+        Test cases to verify the records are spilled to disk past the threshold and read back in order
+    """
+
+    def test_insertion_order(self):
+        """
+            Verify the records are iterated in the order they were added without sort key
+        """
+        with RecordBuffer(max_records=3) as buffer:
+            buffer.extend({"id": index} for index in range(10))
+            self.assertEqual(len(buffer.runs), 3)
+            self.assertEqual(len(buffer.records), 1)
+            self.assertEqual(len(buffer), 10)
+            self.assertEqual([record["id"] for record in buffer], list(range(10)))
+
+    def test_external_merge_sort(self):
+        """
+            Verify the spilled runs are merged by the sort key, keeping the order of the records with equal keys
+        """
+        records = [{"key": key, "id": index} for index, key in enumerate([5, 1, 3, 1, 4, 2, 5, 1, 0])]
+        with RecordBuffer(max_records=2, sort_key=lambda x: x["key"]) as buffer:
+            buffer.extend(records)
+            expected_records = sorted(records, key=lambda x: x["key"])
+            self.assertEqual(list(buffer), expected_records)
+            # the buffer can be iterated again
+            self.assertEqual(list(buffer), expected_records)
+
+    def test_no_spill_by_default(self):
+        """
+            Verify the records are held in memory if no threshold is set
+        """
+        buffer = RecordBuffer(sort_key=lambda x: x)
+        buffer.extend([3, 1, 2])
+        self.assertEqual(buffer.runs, [])
+        self.assertEqual(list(buffer), [1, 2, 3])
+
+    def test_close(self):
+        """
+            Verify the spill files are removed on close
+        """
+        buffer = RecordBuffer(max_records=1)
+        buffer.extend([1, 2])
+        runs = buffer.runs
+        buffer.close()
+        self.assertTrue(all(run.closed for run in runs))
+        self.assertEqual(list(buffer), [])
+
+class TestSpilledSync(unittest.TestCase):
+    """
+        Test cases to verify the records are written in order of the replication key when spilled to disk
+    """
+
+    @mock.patch("singer.write_state")
+    @mock.patch("singer.write_record")
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.get")
+    def test_sync_with_spilled_records(self, mock_get, mock_write_record, mock_write_state):
+        """
+            Verify the records of all the pages are written sorted by `modify_time` with the buffer spilled to disk
+        """
+        days = [5, 3, 9, 1, 7, 2, 8]
+        mock_get.side_effect = lambda path=None, headers=None, params=None: {
+            "message": "OK",
+            "code": 0,
+            "data": {
+                "page_info": {"total_number": len(days)},
+                "list": [{"campaign_id": str(day), "modify_time": "2021-02-0{} 00:00:00".format(day)}
+                         for day in days[(params['page'] - 1) * 2:params['page'] * 2]]
+            }
+        }
+        config = {"access_token": "mock_access_token", "start_date": "2021-01-01T00:00:00Z", "accounts": ["1234"],
+                  "page_size": 2, "buffer_max_records": 3}
+        state = {}
+        stream = Campaigns(TikTokClient("mock_access_token", []), config, state)
+        catalog = mock.Mock(tap_stream_id='campaigns', metadata=[])
+        catalog.schema.to_dict.return_value = {"type": "object", "properties": {"campaign_id": {"type": "string"},
+                                                                               "modify_time": {"type": "string", "format": "date-time"}}}
+
+        stream.do_sync(catalog)
+
+        written_ids = [call[0][1]['campaign_id'] for call in mock_write_record.call_args_list]
+        self.assertEqual(written_ids, [str(day) for day in sorted(days)])
+        self.assertEqual(state['bookmarks']['campaigns']['1234'], '2021-02-09T00:00:00.000000Z')
+
+class TestCompactRecords(unittest.TestCase):
+    """
+        Test cases to verify the records are held in a compact form and expanded when iterated
+    """
+
+    records = [
+        {"metrics": {"spend": "1.00", "campaign_name": "campaign"}, "dimensions": {"ad_id": "1", "stat_time_day": "2021-01-02"}},
+        # the strings decoded from the responses are distinct objects
+        {"metrics": {"spend": "2.00", "campaign_name": "".join(["camp", "aign"])}, "dimensions": {"ad_id": "2", "stat_time_day": "2021-01-01"}}
+    ]
+
+    def test_pack_and_unpack(self):
+        """
+            Verify the layouts of the records are shared and the repeated strings are shared between the records
+        """
+        compact_records = CompactRecords()
+        packed_records = [compact_records.pack(record) for record in self.records]
+        self.assertEqual(len(compact_records.layout_keys), 3)
+        self.assertIs(packed_records[0][1][0][1][1], packed_records[1][1][0][1][1])
+        self.assertEqual([compact_records.unpack(record) for record in packed_records], self.records)
+
+    def test_compact_buffer(self):
+        """
+            Verify the compact records are sorted and spilled to disk as the records
+        """
+        with RecordBuffer(max_records=1, sort_key=lambda x: x["dimensions"]["stat_time_day"], compact=True) as buffer:
+            buffer.extend(self.records)
+            self.assertEqual(list(buffer), [self.records[1], self.records[0]])
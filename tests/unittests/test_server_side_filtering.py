@@ -0,0 +1,62 @@
+import json
+import unittest
+from unittest import mock
+from tap_tiktok_ads.client import TikTokClient
+from tap_tiktok_ads.streams import Campaigns
+
+mock_response = {
+    "message": "OK",
+    "code": 0,
+    "data": {
+        "page_info": {
+            "total_number": 0
+        },
+        "list": []
+    }
+}
+
+@mock.patch("tap_tiktok_ads.streams.Stream.process_batch")
+@mock.patch("tap_tiktok_ads.client.TikTokClient.get", return_value=mock_response)
+class TestServerSideFiltering(unittest.TestCase):
+    """
+        Test cases to verify the bookmark is passed in the `filtering` param of the ad management streams
+    """
+
+    state = {"bookmarks": {"campaigns": {"1234": "2021-08-10T06:56:51.000000Z"}}}
+
+    def test_filter_by_bookmark(self, mock_get, mock_process_batch):
+        """
+            Verify the active and deleted entities are filtered by the bookmark of the advertiser
+        """
+        config = {"access_token": "mock_access_token", "start_date": "2021-01-01T00:00:00Z", "accounts": ["1234"],
+                  "server_side_filtering": "true", "include_deleted": "true"}
+        stream = Campaigns(TikTokClient("mock_access_token", []), config, self.state)
+
+        stream.do_sync(stream)
+
+        filters = [json.loads(call[1]['params']['filtering']) for call in mock_get.call_args_list]
+        self.assertEqual(filters, [{"modified_after": "2021-08-10 06:56:51"},
+                                   {"modified_after": "2021-08-10 06:56:51", "primary_status": "STATUS_DELETE"}])
+
+    def test_no_filter_without_bookmark(self, mock_get, mock_process_batch):
+        """
+            Verify all the entities are requested for an advertiser without bookmark
+        """
+        config = {"access_token": "mock_access_token", "start_date": "2021-01-01T00:00:00Z", "accounts": ["5678"],
+                  "server_side_filtering": "true"}
+        stream = Campaigns(TikTokClient("mock_access_token", []), config, self.state)
+
+        stream.do_sync(stream)
+
+        self.assertNotIn('filtering', mock_get.call_args[1]['params'])
+
+    def test_no_filter_by_default(self, mock_get, mock_process_batch):
+        """
+            Verify the bookmark is not passed to the API if `server_side_filtering` is not enabled
+        """
+        config = {"access_token": "mock_access_token", "start_date": "2021-01-01T00:00:00Z", "accounts": ["1234"]}
+        stream = Campaigns(TikTokClient("mock_access_token", []), config, self.state)
+
+        stream.do_sync(stream)
+
+        self.assertNotIn('filtering', mock_get.call_args[1]['params'])
@@ -4,7 +4,7 @@ from unittest import mock
 from dateutil.parser import parse
 from tap_tiktok_ads.client import TikTokClient
 from tap_tiktok_ads.streams import get_date_batches, transform_ad_management_records, transform_ad_insights_records, \
-    pre_transform, transform_advertisers_records, Campaigns
+    pre_transform, transform_advertisers_records, merge_records, Campaigns
 
 mock_config = {
             "accounts": [1234567890],
@@ -277,7 +277,38 @@ class TestSync(unittest.TestCase):
                 item['data']['list'][0]["current_status"] = "DELETE"
             mock_records = mock_records + item['data']['list']
         mock_get.assert_called_with(path='campaign/get/', headers={'Access-Token': 'mock_access_token'}, params={'advertiser_id': 1234567890, 'page_size': 1000, 'page': 1, 'filtering': '{"primary_status": "STATUS_DELETE"}'})
-        mock_process.assert_called_with(stream_object, mock_records, '1234567890')
+        args, _ = mock_process.call_args
+        self.assertEqual((args[0], list(args[1]), args[2]), (stream_object, mock_records, '1234567890'))
+
+    def test_merge_records(self):
+        """
+            Verify an active record is replaced by the deleted record of the entity, whose modify_time is newer
+        """
+        records = [
+            {'advertiser_id': 10, 'campaign_id': 1, 'modify_time': '2021-01-01 00:00:00'},
+            {'advertiser_id': 10, 'campaign_id': 2, 'modify_time': '2021-01-01 00:00:00'}
+        ]
+        deleted_records = [
+            {'advertiser_id': 10, 'campaign_id': 2, 'modify_time': '2021-01-02 00:00:00', 'current_status': 'DELETE'},
+            {'advertiser_id': 10, 'campaign_id': 3, 'modify_time': '2021-01-02 00:00:00', 'current_status': 'DELETE'}
+        ]
+        expected_result = [
+            {'advertiser_id': 10, 'campaign_id': 1, 'modify_time': '2021-01-01 00:00:00'},
+            {'advertiser_id': 10, 'campaign_id': 2, 'modify_time': '2021-01-02 00:00:00', 'current_status': 'DELETE'},
+            {'advertiser_id': 10, 'campaign_id': 3, 'modify_time': '2021-01-02 00:00:00', 'current_status': 'DELETE'}
+        ]
+        self.assertEqual(list(merge_records(records, deleted_records, ['advertiser_id', 'campaign_id'])), expected_result)
+
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.get")
+    @mock.patch("tap_tiktok_ads.streams.Stream.process_batch")
+    def test_concurrent_delete_records(self, mock_process, mock_get):
+        mock_get.side_effect = lambda path=None, headers=None, params=None: mock_response[1 if 'filtering' in params else 0]
+        client = TikTokClient(mock_config.get("access_token"), [])
+        stream_object = Campaigns(client, {**mock_config, "max_workers": 2}, {})
+        stream_object.do_sync(stream_object)
+        args, _ = mock_process.call_args
+        self.assertEqual([record['campaign_id'] for record in args[1]], [12345, 67890])
+        self.assertEqual(mock_get.call_count, 2)
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,135 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+import singer
+from tap_tiktok_ads.client import RateLimiter, TikTokClient
+from tap_tiktok_ads.streams import Campaigns
+from tap_tiktok_ads.tenants import run_tenants, get_rate_limiters
+
+TENANTS = {
+    "tenant_a": {"start_date": "2021-01-01T00:00:00Z", "access_token": "token_1", "accounts": "1, 2", "max_requests_per_second": 10},
+    "tenant_b": {"start_date": "2021-01-01T00:00:00Z", "access_token": "token_1", "accounts": "3", "max_requests_per_second": 5},
+    "tenant_c": {"start_date": "2021-01-01T00:00:00Z", "access_token": "token_2", "accounts": "4"}
+}
+
+def sync(tik_tok_client, config, state, catalog):
+    """
+        Mocked sync writing a record per account and the bookmark of the accounts
+    """
+    if config["access_token"] == "token_2":
+        raise Exception("Invalid token")
+    for account in config["accounts"]:
+        singer.write_record("campaigns", {"advertiser_id": account})
+        state.setdefault("bookmarks", {}).setdefault("campaigns", {})[account] = "2021-02-01T00:00:00.000000Z"
+    singer.write_state(state)
+
+class TestTenants(unittest.TestCase):
+    """
+        Test cases to verify the tenants are synced in one process with their own output and state
+    """
+
+    def test_rate_limiters_by_token(self):
+        """
+            Verify the tenants of the same token share the lowest rate
+        """
+        rate_limiters = get_rate_limiters(TENANTS)
+        self.assertEqual(list(rate_limiters), ["token_1"])
+        self.assertEqual(rate_limiters["token_1"].interval, 0.2)
+
+    def test_rate_limiters_of_token_pool(self):
+        """
+            Verify each token of a pool gets its rate limiter, shared with the tenants of the token
+        """
+        tenants = {**TENANTS, "tenant_d": {"access_token": "token_1, token_3", "accounts": "5", "max_requests_per_second": 8}}
+        rate_limiters = get_rate_limiters(tenants)
+        self.assertEqual(sorted(rate_limiters), ["token_1", "token_3"])
+        self.assertEqual(rate_limiters["token_3"].interval, 0.125)
+
+        client = TikTokClient("token_1, token_3", [], rate_limiters=rate_limiters, max_requests_per_second=8)
+        self.assertIs(client.token_pool.rate_limiters["token_1"], rate_limiters["token_1"])
+        self.assertIs(client.token_pool.rate_limiters["token_3"], rate_limiters["token_3"])
+        self.assertIsNone(client.rate_limiter)
+
+    @mock.patch("time.sleep")
+    @mock.patch("time.monotonic", return_value=100)
+    def test_rate_limiter(self, mock_monotonic, mock_sleep):
+        """
+            Verify the requests sharing the limiter are spaced by the interval of the rate
+        """
+        rate_limiter = RateLimiter(4)
+        for _ in range(3):
+            rate_limiter.acquire()
+        self.assertEqual(mock_sleep.call_args_list, [mock.call(0.25), mock.call(0.5)])
+
+    @mock.patch("tap_tiktok_ads.tenants.sync", side_effect=sync)
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.check_access_token", return_value=True)
+    def test_run_tenants(self, mock_check_access_token, mock_sync):
+        """
+            Verify each tenant writes its messages and state to its own files, with the shared session and
+            the rate limiter of its token, and a failed tenant does not stop the others
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            for name, config in TENANTS.items():
+                with open(os.path.join(directory, name + ".json"), "w", encoding="utf-8") as config_file:
+                    json.dump(config, config_file)
+            with open(os.path.join(directory, "tenant_a.state.json"), "w", encoding="utf-8") as state_file:
+                json.dump({"bookmarks": {"ads": {"1": "2021-01-15T00:00:00.000000Z"}}}, state_file)
+
+            failed_tenants = run_tenants(directory, catalog=mock.Mock(), max_tenants=3)
+
+            self.assertEqual(failed_tenants, ["tenant_c"])
+            with open(os.path.join(directory, "tenant_a.singer.jsonl"), encoding="utf-8") as output_file:
+                messages = [json.loads(line) for line in output_file]
+            self.assertEqual([message["record"]["advertiser_id"] for message in messages if message["type"] == "RECORD"], ["1", "2"])
+            with open(os.path.join(directory, "tenant_a.state.json"), encoding="utf-8") as state_file:
+                self.assertEqual(sorted(json.load(state_file)["bookmarks"]), ["ads", "campaigns"])
+            with open(os.path.join(directory, "tenant_b.singer.jsonl"), encoding="utf-8") as output_file:
+                self.assertEqual(json.loads(output_file.readline())["record"], {"advertiser_id": "3"})
+
+        clients = {call[0][1]["access_token"]: call[0][0] for call in mock_sync.call_args_list}
+        clients_a = [call[0][0] for call in mock_sync.call_args_list if call[0][1]["access_token"] == "token_1"]
+        self.assertIs(clients_a[0].rate_limiter, clients_a[1].rate_limiter)
+        self.assertIs(clients_a[0]._TikTokClient__session, clients["token_2"]._TikTokClient__session)
+        self.assertIsNone(clients["token_2"].rate_limiter)
+
+class TestConcurrentTenantStreams(unittest.TestCase):
+    """
+        Test cases to verify the streams of concurrent tenants do not share their request params
+    """
+
+    @mock.patch("tap_tiktok_ads.streams.Stream.process_batch")
+    def test_concurrent_do_sync(self, mock_process_batch):
+        """
+            Verify two tenants syncing the same stream at the same time request their own advertiser only
+        """
+        # both tenants set their advertiser before either requests it
+        barrier = threading.Barrier(2, timeout=5)
+        requested = {}
+
+        def get_filtering(stream_id, advertiser_id):
+            barrier.wait()
+            return {}
+
+        def get(path=None, headers=None, params=None):
+            requested.setdefault(threading.current_thread().name, []).append(params["advertiser_id"])
+            return {"code": 0, "message": "OK", "data": {"page_info": {"total_number": 0}, "list": []}}
+
+        def do_sync(account):
+            config = {"access_token": "mock_access_token", "start_date": "2021-01-01T00:00:00Z", "accounts": [account]}
+            client = mock.Mock(spec=TikTokClient)
+            client.get.side_effect = get
+            stream = Campaigns(client, config, {})
+            with mock.patch.object(stream, "get_filtering", side_effect=get_filtering):
+                stream.do_sync(mock.Mock(tap_stream_id="campaigns"))
+
+        threads = [threading.Thread(target=do_sync, args=(account,), name=account) for account in ("1", "2")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(requested, {"1": ["1"], "2": ["2"]})
+        self.assertEqual(Campaigns.params, {})
@@ -0,0 +1,79 @@
+import unittest
+from unittest import mock
+from tap_tiktok_ads.client import TikTokClient, TokenPool, get_access_tokens
+
+def get_response(code, message="OK"):
+    """
+        Returns the mocked response with the error code
+    """
+    response = mock.Mock(status_code=200)
+    response.json.return_value = {"code": code, "message": message, "data": {}}
+    return response
+
+class TestTokenPool(unittest.TestCase):
+    """
+        Test cases to verify the requests are spread over the access tokens of the pool
+    """
+
+    def test_access_tokens(self):
+        """
+            Verify the access tokens are read from a comma-separated string or a list
+        """
+        self.assertEqual(get_access_tokens("token_1, token_2"), ["token_1", "token_2"])
+        self.assertEqual(get_access_tokens(["token_1"]), ["token_1"])
+        self.assertEqual(get_access_tokens(None), [])
+        self.assertIsNone(TikTokClient("token_1", []).token_pool)
+
+    def test_least_used_token(self):
+        """
+            Verify the requests are spread evenly over the tokens without rate
+        """
+        token_pool = TokenPool(["token_1", "token_2"])
+        self.assertEqual([token_pool.acquire() for _ in range(4)], ["token_1", "token_2", "token_1", "token_2"])
+
+    @mock.patch("time.sleep")
+    @mock.patch("time.monotonic", return_value=100)
+    def test_most_remaining_budget(self, mock_monotonic, mock_sleep):
+        """
+            Verify the request is sent with the token available first for its rate
+        """
+        token_pool = TokenPool(["token_1", "token_2"], requests_per_second=2)
+        self.assertEqual([token_pool.acquire() for _ in range(3)], ["token_1", "token_2", "token_1"])
+        self.assertEqual(mock_sleep.call_args_list, [mock.call(0.5)])
+
+    def test_rate_per_token(self):
+        """
+            Verify each token of the client gets its own rate, not a rate shared by the tokens
+        """
+        client = TikTokClient("token_1,token_2", [], max_requests_per_second=2)
+        rate_limiters = client.token_pool.rate_limiters
+        self.assertIsNot(rate_limiters["token_1"], rate_limiters["token_2"])
+        self.assertEqual(rate_limiters["token_1"].interval, 0.5)
+        self.assertIsNone(client.rate_limiter)
+
+    @mock.patch("requests.Session.request")
+    def test_fail_over_on_quota(self, mock_request):
+        """
+            Verify the request exceeding the quota of its token is sent again with the other token,
+            and the token is set aside
+        """
+        mock_request.side_effect = [get_response(40100, "Too many requests"), get_response(0), get_response(0)]
+        client = TikTokClient("token_1,token_2", [])
+        client._TikTokClient__verified = True
+
+        client.get(path="campaign/get/")
+        client.get(path="campaign/get/")
+
+        tokens = [call[1]["headers"]["Access-Token"] for call in mock_request.call_args_list]
+        self.assertEqual(tokens, ["token_1", "token_2", "token_2"])
+
+    @mock.patch("requests.Session.request")
+    def test_verify_each_token(self, mock_request):
+        """
+            Verify each token of the pool is verified
+        """
+        mock_request.return_value = get_response(0)
+        client = TikTokClient("token_1,token_2", [])
+        client.check_access_token()
+        tokens = [call[1]["headers"]["Access-Token"] for call in mock_request.call_args_list]
+        self.assertEqual(tokens, ["token_1", "token_2"])
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+from tap_tiktok_ads import main
+from tap_tiktok_ads.client import TikTokClient
+from tap_tiktok_ads.verification_cache import VerificationCache, get_verification_key
+
+class MockParseArgs:
+    def __init__(self, config, discover):
+        self.config = config
+        self.catalog = {}
+        self.discover = discover
+        self.state = {}
+
+class TestVerificationCache(unittest.TestCase):
+    """
+        Test cases to verify the verification of the token and accounts is reused by the runs within the TTL
+    """
+
+    def test_key(self):
+        """
+            Verify the key does not depend on the order of the accounts and does not contain the token
+        """
+        key = get_verification_key("mock_access_token", ["2", "1"])
+        self.assertEqual(key, get_verification_key("mock_access_token", ["1", "2"]))
+        self.assertNotEqual(key, get_verification_key("other_access_token", ["1", "2"]))
+        self.assertNotIn("mock_access_token", key)
+
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.check_access_token", return_value=True)
+    def test_verified_within_ttl(self, mock_check_access_token):
+        """
+            Verify the token and accounts are verified again only after the TTL
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "verification.json")
+            for _ in range(2):
+                with TikTokClient("mock_access_token", ["1"], verification_cache=VerificationCache(path, 3600)):
+                    pass
+            self.assertEqual(mock_check_access_token.call_count, 1)
+
+            with mock.patch("time.time", return_value=time.time() + 7200):
+                with TikTokClient("mock_access_token", ["1"], verification_cache=VerificationCache(path, 3600)):
+                    pass
+            self.assertEqual(mock_check_access_token.call_count, 2)
+
+            # other accounts are verified
+            with TikTokClient("mock_access_token", ["1", "2"], verification_cache=VerificationCache(path, 3600)):
+                pass
+            self.assertEqual(mock_check_access_token.call_count, 3)
+
+    @mock.patch("tap_tiktok_ads.client.TikTokClient.check_access_token", return_value=False)
+    def test_failed_verification_not_cached(self, mock_check_access_token):
+        """
+            Verify a failed verification is not reused
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "verification.json")
+            with TikTokClient("mock_access_token", ["1"], verification_cache=VerificationCache(path, 3600)):
+                pass
+            self.assertFalse(os.path.exists(path))
+
+    @mock.patch("singer.utils.parse_args")
+    @mock.patch("tap_tiktok_ads.discover.discover")
+    @mock.patch("tap_tiktok_ads.client.TikTokClient")
+    def test_discovery_without_verification(self, mocked_TikTokClient, mocked_discover, mocked_parse_args):
+        """
+            Verify the discovery does not create the client verifying the token and accounts
+        """
+        mocked_parse_args.return_value = MockParseArgs({"start_date": "2022-01-01T00:00:00Z", "access_token": "test_access_token",
+                                                        "accounts": "1"}, discover=True)
+        main()
+        self.assertFalse(mocked_TikTokClient.called)
+        mocked_discover.return_value.dump.assert_called_once_with()